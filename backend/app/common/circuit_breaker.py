@@ -0,0 +1,159 @@
+import logging
+import math
+import time
+from collections import deque
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """The breaker is open (or its half-open probe slots are taken): the call was not made."""
+
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker for one downstream dependency.
+
+    closed     every call goes through; the last `window` outcomes are kept. Once at
+               least `min_calls` are in, a failure rate >= `failure_rate` or a slow-call
+               rate >= `slow_call_rate` (calls over `slow_call_seconds`) opens it.
+    open       calls are refused (CircuitOpen) for `open_seconds`.
+    half_open  up to `half_open_probes` calls go through as probes. All of them
+               succeeding (and fast) closes the breaker; any failure re-opens it.
+
+    Usage:  if not breaker.allow(): raise CircuitOpen()
+            ... then exactly one of record(ok, seconds) / release()
+    Not thread-safe: meant for one event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 50,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: deque = deque(maxlen=window)  # (failed, slow)
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+        # 📊 Counters (read by /metrics)
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.clock() - self.opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight + self._probe_successes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes_in_flight += 1
+        return True
+
+    def record(self, ok: bool, seconds: float):
+        slow = seconds >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+            if not ok or slow:
+                self._open()
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._transition(CLOSED)
+            return
+        if self.state == OPEN:
+            return  # a call admitted before the breaker opened; it already counted
+
+        self._outcomes.append((not ok, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slows = sum(1 for _, was_slow in self._outcomes if was_slow)
+        if failures >= self.failure_rate * len(self._outcomes) or slows >= self.slow_call_rate * len(self._outcomes):
+            self._open()
+
+    def release(self):
+        """The admitted call ended without an outcome (cancelled): frees its probe slot."""
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def _open(self):
+        self.opened += 1
+        self.opened_at = self.clock()
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"🔌 Circuit '{self.name}': {self.state} -> {state}")
+        self.state = state
+        self._outcomes.clear()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def stats(self) -> dict:
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        return {
+            "state": self.state,
+            "calls_in_window": len(self._outcomes),
+            "failure_rate": round(failures / len(self._outcomes), 4) if self._outcomes else 0.0,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+class AdaptiveTimeout:
+    """
+    Request timeout that follows observed latency: `multiplier` x the `percentile`
+    of the last `window` calls, clamped to [minimum, maximum].
+    Until `min_samples` calls have been seen it stays at `maximum`.
+    Feed it timed-out calls too (at the time waited): they are the only samples that
+    can push the timeout back up after the dependency gets slower.
+    """
+
+    def __init__(self, minimum: float, maximum: float, percentile: float = 99.0,
+                 multiplier: float = 2.0, window: int = 200, min_samples: int = 20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+
+    def reset(self):
+        """Forget the samples (back to `maximum`), e.g. once the dependency recovered from an outage."""
+        self._samples.clear()
+
+    def current(self) -> float:
+        if len(self._samples) < self.min_samples:
+            return self.maximum
+        ordered = sorted(self._samples)
+        # Nearest-rank percentile
+        rank = max(math.ceil(self.percentile / 100 * len(ordered)), 1)
+        return min(max(ordered[rank - 1] * self.multiplier, self.minimum), self.maximum)
@@ -1,9 +1,17 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import asyncio
+import multiprocessing
 import os
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 🔐 bcrypt cost (2^rounds iterations). Raising it upgrades old hashes on their next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -11,6 +19,76 @@ def get_password_hash(password):
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password, hashed_password):
+    """(valid, new_hash): new_hash is set when the stored hash uses an outdated cost."""
+    if not hashed_password:
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# ==========================================
+# 🧮 PASSWORD HASHING POOL
+# bcrypt burns ~100-300ms of CPU per call. Running it in worker processes keeps it
+# off the event loop AND out of the threadpool other sync routes share, and lets
+# login throughput scale with cores.
+# ==========================================
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash jobs allowed to wait for a worker; past this, logins are turned away (503)
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+class PasswordHashingBusy(Exception):
+    """Too many hash jobs are already queued."""
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: never fork a process that is running an event loop and threads
+        _pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+async def _run_in_pool(fn, *args):
+    global _pending, _pool
+    if _pending >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashingBusy()
+    _pending += 1
+    pool = _get_pool()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM kill...): start a fresh pool for the next caller
+        if _pool is pool:
+            _pool = None
+        raise
+    finally:
+        _pending -= 1
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool(get_password_hash, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str):
+    """Async `verify_and_update` on the hashing pool (one round trip for verify + rehash)."""
+    return await _run_in_pool(verify_and_update, plain_password, hashed_password)
+
+def start_hash_pool():
+    """Spawns the workers up front so the first logins don't pay for process start-up."""
+    pool = _get_pool()
+    for _ in range(PASSWORD_HASH_WORKERS):
+        pool.submit(int)
+
+def shutdown_hash_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+def hash_pool_stats() -> dict:
+    return {"workers": PASSWORD_HASH_WORKERS, "pending": _pending, "max_queue": PASSWORD_HASH_MAX_QUEUE}
+
 # Grab these from your .env
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
@@ -21,4 +99,4 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     # This creates the encrypted token string
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
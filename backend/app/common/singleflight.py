@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Request coalescing: while a call for `key` is running, every other caller with the
+    same key awaits that call's result instead of starting its own.
+    Errors reach every waiter. Nothing is remembered once the call finishes
+    (that is the response cache's job).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: dict = {}
+
+        # 📊 Counters (read by /metrics)
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.collapsed += 1
+            logger.info(f"🔗 [{self.name}] Joined an in-flight call ({len(self._in_flight)} running).")
+
+        # Shield: one waiter giving up (client disconnect) must not cancel the call for the others
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task: asyncio.Future):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as seen even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._in_flight),
+        }
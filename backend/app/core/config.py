@@ -9,8 +9,100 @@ class Settings(BaseSettings):
     LANGFLOW_ORG_ID: str
     LANGFLOW_TOKEN: str
 
+    # 🔌 Langflow HTTP Client (one pooled client per worker)
+    LANGFLOW_TIMEOUT_SECONDS: float = 45.0
+    LANGFLOW_MAX_CONNECTIONS: int = 20
+    LANGFLOW_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LANGFLOW_KEEPALIVE_EXPIRY: float = 30.0
+    LANGFLOW_HTTP2: bool = False  # needs the optional 'h2' package
+    # Max concurrent calls to Langflow; extra requests wait locally
+    LANGFLOW_MAX_IN_FLIGHT: int = 16
+    # Use Langflow's ?stream=true output for /planning/generate/stream (token-by-token chat_response)
+    LANGFLOW_STREAMING: bool = False
+
+    # ⏱️ Adaptive timeout: LANGFLOW_TIMEOUT_MULTIPLIER x the p<PERCENTILE> of recent successful
+    # calls, kept within [LANGFLOW_TIMEOUT_MIN_SECONDS, LANGFLOW_TIMEOUT_SECONDS]
+    LANGFLOW_TIMEOUT_MIN_SECONDS: float = 5.0
+    LANGFLOW_TIMEOUT_PERCENTILE: float = 99.0
+    LANGFLOW_TIMEOUT_MULTIPLIER: float = 2.0
+    # Retries of 5xx answers stop once this much time has gone by
+    LANGFLOW_RETRY_BUDGET_SECONDS: float = 20.0
+
+    # 🔌 Circuit breaker: while open, planning answers at once, locally when it can (LOCAL_INTENT_*),
+    # else with missing_info=["SERVICE_UNAVAILABLE"]
+    LANGFLOW_BREAKER_ENABLED: bool = True
+    LANGFLOW_BREAKER_WINDOW: int = 50           # recent calls considered
+    LANGFLOW_BREAKER_MIN_CALLS: int = 10        # before the rates below mean anything
+    LANGFLOW_BREAKER_FAILURE_RATE: float = 0.5
+    LANGFLOW_BREAKER_SLOW_SECONDS: float = 20.0
+    LANGFLOW_BREAKER_SLOW_RATE: float = 0.8
+    LANGFLOW_BREAKER_OPEN_SECONDS: float = 30.0  # then half-open: a few probe calls decide
+    LANGFLOW_BREAKER_HALF_OPEN_PROBES: int = 3
+
+    # 🏃 Local intent extraction (regex + RapidFuzz, no Langflow call).
+    # Planning queries it is at least this sure about (0-1) never reach Langflow; 1.01 turns that off
+    LOCAL_INTENT_ENABLED: bool = True
+    LOCAL_INTENT_MIN_CONFIDENCE: float = 0.85
+    # While Langflow is down (breaker open / retries used up), a local answer this sure beats an error
+    LOCAL_INTENT_FALLBACK_CONFIDENCE: float = 0.3
+
+    # ⚡ AI Response Cache (identical / near-identical queries skip Langflow)
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 512
+    AI_CACHE_TTL_SECONDS: float = 600.0
+    # 0 disables near-duplicate lookup; otherwise a RapidFuzz score (0-100)
+    AI_CACHE_FUZZY_THRESHOLD: float = 0.0
+
+    # 📚 Batch Planning (/planning/generate/batch)
+    PLANNING_BATCH_MAX_ITEMS: int = 50
+    # How many items of one batch may be waiting on Langflow at the same time
+    PLANNING_BATCH_CONCURRENCY: int = 4
+
+    # 💬 Planning Sessions (/planning/sessions): follow-ups send only the new message to the AI
+    # Idle sessions expire after this long
+    PLANNING_SESSION_TTL_SECONDS: float = 1800.0
+    # Ranked candidates kept per session; follow-ups narrow/re-rank these before searching again
+    PLANNING_SESSION_CANDIDATES: int = 50
+
+    # 🧵 Request Tracing (X-Request-ID + Server-Timing on every response)
+    # Span breakdowns are logged only for requests slower than this...
+    TRACE_SLOW_REQUEST_MS: float = 2000.0
+    # ...or for this fraction of all requests (0.0 - 1.0)
+    TRACE_SAMPLE_RATE: float = 0.01
+
+    # 🔐 Auth Cache (decoded JWTs + vendor records for get_current_vendor)
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
+    # Upper bound on how long another worker may serve a vendor record after it changed
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+
     # ✅ Database (The URL used by SQLAlchemy)
     DATABASE_URL: str
+    # How long a booting worker waits for Postgres before reporting startup failure
+    DB_STARTUP_TIMEOUT_SECONDS: float = 60.0
+    # Seed demo data into an empty database on boot (once per cluster, advisory-locked)
+    SEED_ON_STARTUP: bool = True
+
+    # 📦 In-memory Package Catalog (serves matching without touching Postgres)
+    CATALOG_CACHE_ENABLED: bool = True
+    # How often each worker asks Postgres "did the catalog change?"
+    CATALOG_VERSION_CHECK_SECONDS: float = 30.0
+    # Hard upper bound on snapshot age, even if the version looks unchanged
+    CATALOG_MAX_AGE_SECONDS: float = 300.0
+    # Set by `python -m app.serve`: workers map this shared file instead of each loading the catalog
+    CATALOG_SNAPSHOT_PATH: str = ""
+    # 📣 Package writes NOTIFY this channel; each worker LISTENs and patches its snapshot in place
+    CATALOG_NOTIFY_ENABLED: bool = True
+    CATALOG_NOTIFY_CHANNEL: str = "catalog_changes"
+
+    # 🔤 Full-text relevance in venue matching (ts_rank over package name + description).
+    # 0 = off. When on, searches with free-text terms are ranked by Postgres, not the catalog.
+    MATCH_TEXT_WEIGHT: float = 0.0
+
+    # 📍 Locations: RapidFuzz score (0-100) a misspelt place must reach to resolve
+    LOCATION_MATCH_THRESHOLD: float = 85.0
+    # Venue matches also include places this close to the requested one (0 = that place only)
+    LOCATION_NEARBY_KM: float = 0.0
 
     # 🛠️ ADDED: Infrastructure Variables (Fixes the validation error)
     # These match the variables inside your .env file
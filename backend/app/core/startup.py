@@ -0,0 +1,152 @@
+"""
+🚦 STARTUP
+
+What each worker does before it reports ready, in order:
+  1. wait_for_database   async SELECT 1 with backoff (the event loop keeps serving /health/live)
+  2. ensure_schema       nothing when `alembic upgrade head` already ran (start.sh / deploy);
+                         otherwise runs it in-process under a Postgres advisory lock (the
+                         Docker CMD skips start.sh). create_all + stamp only off Postgres
+  3. seed_once           under a Postgres advisory lock, so N workers booting together
+                         seed at most once and never race each other
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Arbitrary app-wide key for pg_advisory_lock (same value in every worker and container)
+SCHEMA_LOCK_KEY = 4_711_001
+
+class Readiness:
+    """Flipped by the startup task; read by /health/ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.stage = "starting"
+        self.error: Optional[str] = None
+
+    def advance(self, stage: str):
+        self.stage = stage
+        logger.info(f"🚦 Startup: {stage}")
+
+    def fail(self, error: str):
+        self.stage, self.error = "failed", error
+        logger.critical(f"❌ Startup failed: {error}")
+
+readiness = Readiness()
+
+async def ping(async_engine, timeout: float = 2.0) -> bool:
+    async def select_one():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    try:
+        await asyncio.wait_for(select_one(), timeout)
+        return True
+    except Exception:
+        return False
+
+async def wait_for_database(async_engine, timeout: float = 60.0, max_interval: float = 5.0) -> bool:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    interval = 0.25
+    attempt = 0
+    while True:
+        attempt += 1
+        if await ping(async_engine):
+            logger.info("✅ Database connection successful!")
+            return True
+        if loop.time() + interval > deadline:
+            return False
+        logger.warning(f"⚠️ Database unavailable, retrying in {interval:.2f}s... (attempt {attempt})")
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, max_interval)
+
+def alembic_config(connection=None):
+    from alembic.config import Config
+    cfg = Config(str(ALEMBIC_INI))
+    cfg.attributes["configure_logger"] = False
+    if connection is not None:
+        cfg.attributes["connection"] = connection
+    return cfg
+
+def migration_heads() -> Optional[set]:
+    """Head revision(s) of migrations/ (None if the Alembic files aren't shipped with this build)."""
+    if not ALEMBIC_INI.exists():
+        return None
+    from alembic.script import ScriptDirectory
+    return set(ScriptDirectory.from_config(alembic_config()).get_heads())
+
+def database_revisions(conn) -> set:
+    from alembic.runtime.migration import MigrationContext
+    return set(MigrationContext.configure(conn).get_current_heads())
+
+def ensure_schema(engine, metadata) -> str:
+    """
+    Returns what it did: "current", "behind", "migrated" or "created".
+    A database Alembic never touched is migrated to head (the indexes and backfills
+    only migrations create come with it), so later `alembic upgrade head` runs are no-ops.
+    """
+    heads = migration_heads()
+    with engine.connect() as conn:
+        current = database_revisions(conn)
+    if heads is not None and current == heads:
+        return "current"
+    if current:
+        # Alembic owns this database; never patch it with create_all, just say so
+        logger.warning(f"⚠️ Database is at {sorted(current)}, code expects {sorted(heads or [])}. Run `alembic upgrade head`.")
+        return "behind"
+
+    with advisory_lock(engine):
+        # Another worker may have finished while this one waited for the lock
+        with engine.connect() as conn:
+            if heads is not None and database_revisions(conn) == heads:
+                return "current"
+        if heads is None:
+            metadata.create_all(bind=engine)
+            return "created"
+
+        from alembic import command
+        with engine.connect() as conn:
+            if engine.dialect.name == "postgresql":
+                # Alembic runs the transactions (and the CONCURRENTLY index builds outside them)
+                command.upgrade(alembic_config(conn), "head")
+                return "migrated"
+            # The migrations are Postgres-only (ARRAY, GIN, CONCURRENTLY): create, then record head
+            metadata.create_all(bind=conn)
+            command.stamp(alembic_config(conn), "head")
+            conn.commit()
+    return "created"
+
+class advisory_lock:
+    """Session-level pg_advisory_lock on its own connection (no-op on other databases)."""
+
+    def __init__(self, engine, key: int = SCHEMA_LOCK_KEY):
+        self.engine = engine
+        self.key = key
+        self.conn = None
+
+    def __enter__(self):
+        if self.engine.dialect.name == "postgresql":
+            self.conn = self.engine.connect()
+            self.conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": self.key})
+            self.conn.commit()
+        return self
+
+    def __exit__(self, *exc):
+        if self.conn is not None:
+            try:
+                self.conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                self.conn.commit()
+            finally:
+                self.conn.close()
+        return False
+
+def seed_once(engine, seed):
+    # Workers that lose the race wait here, then find the data and skip
+    with advisory_lock(engine):
+        seed()
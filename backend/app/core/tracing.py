@@ -0,0 +1,124 @@
+"""
+🧵 REQUEST TRACING
+
+Every request gets an id (X-Request-ID, taken from the caller when it sends one) and a
+`Trace` that code along the way adds spans to:
+
+    from app.core.tracing import span
+
+    with span("ai"):
+        analysis = await ai_service.generate_date_plan(query)
+
+Spans are summed per name into a `Server-Timing` header (visible in browser dev tools),
+and the full span list is logged only for slow requests (TRACE_SLOW_REQUEST_MS) or a
+sampled fraction (TRACE_SAMPLE_RATE). Outside a request, `span()` does nothing.
+"""
+import logging
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+class Trace:
+    __slots__ = ("request_id", "started", "spans")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.spans = []  # (name, offset_ms, duration_ms), in finishing order
+
+    def add(self, name: str, started: float, finished: float):
+        self.spans.append((name, (started - self.started) * 1000, (finished - started) * 1000))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        totals, counts = {}, {}
+        for name, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+            counts[name] = counts.get(name, 0) + 1
+        parts = [
+            f'{name};dur={duration:.1f}' + (f';desc="x{counts[name]}"' if counts[name] > 1 else "")
+            for name, duration in totals.items()
+        ]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def breakdown(self) -> str:
+        return " | ".join(f"{name} +{offset:.0f}ms {duration:.1f}ms" for name, offset, duration in self.spans)
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+def current_request_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.request_id if trace is not None else None
+
+@contextmanager
+def span(name: str):
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter())
+
+class TracingMiddleware:
+    """
+    Pure ASGI middleware. The trace lives in a ContextVar, so spans recorded in sync
+    dependencies (run in the threadpool) and in tasks started by the request land in it too.
+    Server-Timing covers the spans finished before the response headers go out; for
+    streaming responses the log line still has the full breakdown.
+    """
+
+    def __init__(self, app, slow_ms: float = 2000.0, sample_rate: float = 0.0):
+        self.app = app
+        self.slow_ms = slow_ms
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        trace = Trace(request_id or uuid.uuid4().hex)
+        token = _current.set(trace)
+        status = [500]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", trace.request_id.encode("latin-1")))
+                headers.append((b"server-timing", trace.server_timing(trace.elapsed_ms()).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            total_ms = trace.elapsed_ms()
+            slow = total_ms >= self.slow_ms
+            if slow or (self.sample_rate and random.random() < self.sample_rate):
+                log = logger.warning if slow else logger.info
+                log(
+                    f"{'🐢 Slow' if slow else '🧵 Sampled'} request {trace.request_id}: "
+                    f"{scope['method']} {scope['path']} -> {status[0]} in {total_ms:.0f}ms "
+                    f"[{trace.breakdown() or 'no spans'}]"
+                )
@@ -1,13 +1,27 @@
-import time
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.exc import OperationalError
-from app.core.database import engine, Base
+from fastapi.responses import JSONResponse
+from app.core.database import engine, async_engine, async_read_engine, SessionLocal, ReadSessionLocal, Base
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.tracing import TracingMiddleware
+from app.core.startup import readiness, wait_for_database, ensure_schema, seed_once, ping
 
 # --- IMPORT ROUTERS ---
 from app.routers import auth
 from app.routers import planning
+from app.routers import metrics
+from app.routers import catalog
+from app.routers import packages
+
+# --- IMPORT SERVICES (Long-lived clients) ---
+from app.services.ai_service import ai_service
+from app.services.vendor_service import package_catalog, location_index
+from app.services.package_catalog import run_refresh_loop
+from app.services.catalog_events import listen_for_catalog_changes, listener_dsn
+from app.common.security import start_hash_pool, shutdown_hash_pool
 
 # --- IMPORT EXCEPTION HANDLERS ---
 # ✅ The Safety Net: Catches crashes and returns clean JSON
@@ -40,6 +54,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing"],
+)
+
+# 📊 Per-route request timing (read at /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# 🧵 Request id + Server-Timing on every response; span logs for slow/sampled requests
+app.add_middleware(
+    TracingMiddleware,
+    slow_ms=settings.TRACE_SLOW_REQUEST_MS,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
 )
 
 # =========================================================
@@ -52,40 +77,129 @@ add_exception_handlers(app)
 # 2. Register Routers
 app.include_router(auth.router)
 app.include_router(planning.router)
+app.include_router(metrics.router)
+app.include_router(catalog.router)
+app.include_router(packages.router)
 
 # =========================================================
 # 🛡️ STARTUP LOGIC
 # =========================================================
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
+    # Runs in the background: the worker answers /health/live right away,
+    # and /health/ready flips to 200 once prepare() is done
+    app.state.startup_task = asyncio.create_task(prepare())
+
+async def prepare():
     logger.info("⏳ Starting up... Waiting for Database to wake up...")
-    
-    # 1. RETRY LOOP: Wait for Postgres (Fixes "Race Condition")
-    db_connected = False
-    for i in range(15): # Try 15 times (30 seconds total)
-        try:
-            # Try to create tables. If DB is locked/starting, this will fail safely.
-            Base.metadata.create_all(bind=engine)
-            db_connected = True
-            logger.info("✅ Database connection successful!")
-            break
-        except OperationalError:
-            logger.warning(f"⚠️ Database unavailable, retrying in 2s... ({i+1}/15)")
-            time.sleep(2)
-            
-    if not db_connected:
-        logger.critical("❌ CRITICAL: Database failed to start after 30s. Exiting.")
+
+    # 1. WAIT FOR POSTGRES (non-blocking, exponential backoff)
+    readiness.advance("waiting for database")
+    if not await wait_for_database(async_engine, timeout=settings.DB_STARTUP_TIMEOUT_SECONDS):
+        readiness.fail(f"Database unreachable after {settings.DB_STARTUP_TIMEOUT_SECONDS:.0f}s")
         return
 
-    # 2. RUN SEEDER
-    logger.info("🌱 Checking Seed Data...")
     try:
-        seed_data()
-        logger.info("✅ Seeding check complete.")
+        # 2. SCHEMA (no-op when migrations are current)
+        readiness.advance("checking schema")
+        schema = await asyncio.to_thread(ensure_schema, engine, Base.metadata)
+        logger.info(f"🧱 Schema: {schema}")
+
+        # 3. RUN SEEDER (once per cluster, under an advisory lock)
+        if settings.SEED_ON_STARTUP:
+            readiness.advance("seeding")
+            logger.info("🌱 Checking Seed Data...")
+            await asyncio.to_thread(seed_once, engine, seed_data)
+            logger.info("✅ Seeding check complete.")
     except Exception as e:
-        logger.error(f"⚠️ Seeding warning: {e}")
+        logger.error(f"⚠️ Schema/seed warning: {e}")
+
+    # 4. LOCATION INDEX (before the catalog: matching resolves places through it)
+    await load_location_index()
+
+    # 5. CATALOG SNAPSHOT
+    await load_package_catalog()
+
+    readiness.ready = True
+    readiness.advance("ready")
+
+@app.on_event("startup")
+async def open_ai_client():
+    # One pooled Langflow client per worker (keep-alive instead of a handshake per plan)
+    await ai_service.startup()
+
+@app.on_event("startup")
+def open_hash_pool():
+    # 🧮 bcrypt worker processes, started before the first login needs them
+    start_hash_pool()
+
+async def load_location_index():
+    # 📍 Small table, loaded once; unresolved places fall back to ILIKE on location_base
+    readiness.advance("loading locations")
+    try:
+        await asyncio.to_thread(location_index.load, ReadSessionLocal)
+    except Exception as e:
+        logger.error(f"⚠️ Location index failed, location filters will use ILIKE: {e}")
+
+async def load_package_catalog():
+    # 📦 Snapshot the catalog once, then keep it fresh in the background
+    if package_catalog is None:
+        return
+    readiness.advance("loading catalog")
+    try:
+        await asyncio.to_thread(package_catalog.load, ReadSessionLocal)
+    except Exception as e:
+        logger.error(f"⚠️ Catalog snapshot failed, matching will query Postgres: {e}")
+
+    app.state.catalog_refresher = asyncio.create_task(run_refresh_loop(
+        package_catalog,
+        ReadSessionLocal,
+        interval=settings.CATALOG_VERSION_CHECK_SECONDS,
+        max_age=settings.CATALOG_MAX_AGE_SECONDS,
+    ))
+
+    # 📣 Vendor package writes arrive as NOTIFYs and are patched in within milliseconds;
+    # the refresh loop above is the safety net for anything the listener misses
+    if settings.CATALOG_NOTIFY_ENABLED and async_engine.dialect.name == "postgresql":
+        # Changed rows are read from the primary: a replica may not have the write yet
+        app.state.catalog_listener = asyncio.create_task(listen_for_catalog_changes(
+            package_catalog,
+            SessionLocal,
+            dsn=listener_dsn(async_engine.url),
+            channel=settings.CATALOG_NOTIFY_CHANNEL,
+        ))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for name in ("startup_task", "catalog_refresher", "catalog_listener"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await ai_service.shutdown()
+    shutdown_hash_pool()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
 
 @app.get("/health")
 def health_check():
     logger.info("Health check endpoint hit.")
-    return {"status": "active", "system": "Occacia Core"}
\ No newline at end of file
+    return {"status": "active", "system": "Occacia Core"}
+
+# =========================================================
+# 🩺 ORCHESTRATOR PROBES
+# =========================================================
+@app.get("/health/live")
+def liveness():
+    # The process is up and the event loop answers. Never touches the DB.
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    # Ready = startup finished AND the database answers right now
+    if readiness.ready and await ping(async_engine):
+        return {"status": "ready"}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "not_ready", "stage": readiness.stage, "error": readiness.error},
+    )
\ No newline at end of file
@@ -1,2 +1,3 @@
 from .marketplace import Vendor, Package
+from .planning import PlanningSession
 # This lets you do: from app.models import Vendor
\ No newline at end of file
@@ -1,15 +1,30 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, ARRAY, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Computed, Index, Integer, String, Float, Boolean, ForeignKey, Text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR  # Postgres ARRAY: supports && / @> (GIN-indexed)
+from sqlalchemy.orm import deferred, relationship
 from app.core.database import Base
 
+class Location(Base):
+    __tablename__ = "locations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # canonical spelling, e.g. "Nuwara Eliya"
+    aliases = Column(ARRAY(String), default=list)       # lowercase alternatives: ["nuwaraeliya", "little england"]
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+
+    # "Within N km" searches prefilter on a lat/lon bounding box (range scan)
+    __table_args__ = (Index("ix_locations_lat_lon", "latitude", "longitude"),)
+
 class Vendor(Base):
     __tablename__ = "vendors"
 
     id = Column(Integer, primary_key=True, index=True)
     business_name = Column(String, index=True)
     location_base = Column(String) # e.g., "Kandy", "Colombo"
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True, index=True) # location_base, resolved
     email = Column(String, unique=True, index=True) # <--- The field we were missing!
     phone = Column(String, nullable=True)
+    hashed_password = Column(String, nullable=True) # bcrypt; NULL for vendors who can't log in (seeded/imported)
     is_verified = Column(Boolean, default=False)
     
     # Relationships
@@ -28,5 +43,22 @@ class Package(Base):
     max_guests = Column(Integer)
     tags = Column(ARRAY(String)) # ["outdoor", "wifi", "vegan"]
     location_coverage = Column(String, nullable=True)
+    # Full-text search (GIN-indexed): name weighs more than description. Postgres keeps it
+    # up to date; deferred so loading a Package never pulls it.
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
+
+    vendor = relationship("Vendor", back_populates="packages")
+
+    # A vendor's package names are unique: the bulk import upserts on them
+    __table_args__ = (Index("uq_packages_vendor_name", "vendor_id", "name", unique=True),)
+
+class CatalogVersion(Base):
+    """Single row (id=1): bumped in the same transaction as every package write."""
+    __tablename__ = "catalog_version"
 
-    vendor = relationship("Vendor", back_populates="packages")
\ No newline at end of file
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
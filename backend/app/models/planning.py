@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from app.core.database import Base
+
+class PlanningSession(Base):
+    """One multi-turn conversation on /planning/sessions (shared by every worker)."""
+    __tablename__ = "planning_sessions"
+
+    id = Column(String(32), primary_key=True)          # secrets.token_urlsafe: unguessable
+    analysis = Column(JSONB, nullable=False)           # everything the AI has understood so far
+    candidate_ids = Column(ARRAY(Integer), default=list)  # last turn's ranked package ids
+    turns = Column(Integer, nullable=False, default=1)
+    # Sessions idle for PLANNING_SESSION_TTL_SECONDS are gone (b-tree: expiry + purge are range scans)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
-from datetime import timedelta
 
 # Internal Imports
 from app.core.database import get_db
 from app.schemas.vendor_schema import VendorRegisterRequest, VendorResponse
 from app.services import vendor_service
-from app.common.security import verify_password, create_access_token, SECRET_KEY, ALGORITHM
+from app.core.tracing import span
+from app.common.security import (
+    create_access_token, hash_password_async, verify_and_update_async, PasswordHashingBusy,
+    SECRET_KEY, ALGORITHM,
+)
 
 # 1. SETUP ROUTER & AUTH SCHEME
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -19,30 +23,49 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/vendors/login")
 # ==========================================
 # 👮‍♂️ THE SECURITY GUARD (Dependency)
 # ==========================================
-def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
     """
     Decodes the JWT token and retrieves the logged-in vendor.
     If the token is fake/expired, it throws a 401 error.
+
+    Both steps are cached per worker (vendor_service.auth_cache): a repeat token skips
+    the decode, a known vendor skips Postgres. Misses fall back to the DB as before.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        # Decode the "Digital ID Card"
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+    cache = vendor_service.auth_cache
+
+    email = cache.email_for_token(token) if cache is not None else None
+    if email is None:
+        try:
+            # Decode the "Digital ID Card"
+            with span("jwt"):
+                payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            email: str = payload.get("sub")
+            if email is None:
+                raise credentials_exception
+        except JWTError:
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    # Check if the user still exists in the database
-    vendor = vendor_service.get_vendor_by_email(db, email=email)
+        if cache is not None:
+            cache.remember_token(token, email, expires_at=payload.get("exp"))
+
+    if cache is not None:
+        vendor = cache.vendor(email)
+        if vendor is not None:
+            return vendor
+        generation = cache.generation
+
+    # Check if the user still exists in the database (sync session -> threadpool)
+    with span("vendor_lookup"):
+        vendor = await run_in_threadpool(vendor_service.get_vendor_by_email, db, email)
     if vendor is None:
         raise credentials_exception
-        
+
+    if cache is not None:
+        return cache.remember_vendor(vendor, generation)
     return vendor
 
 # ==========================================
@@ -51,33 +74,57 @@ def get_current_vendor(token: str = Depends(oauth2_scheme), db: Session = Depend
 
 # 1. REGISTER (Public)
 @router.post("/vendors/register", response_model=VendorResponse, status_code=status.HTTP_201_CREATED)
-def register_vendor(vendor_data: VendorRegisterRequest, db: Session = Depends(get_db)):
+async def register_vendor(vendor_data: VendorRegisterRequest, db: Session = Depends(get_db)):
     # Check for Duplicate Email
-    if vendor_service.get_vendor_by_email(db, email=vendor_data.email):
+    if await run_in_threadpool(vendor_service.get_vendor_by_email, db, vendor_data.email):
         raise HTTPException(status_code=400, detail="This email is already taken!")
     
     # Check for Duplicate Display Name
-    if vendor_service.get_vendor_by_display_name(db, name=vendor_data.display_name):
+    if await run_in_threadpool(vendor_service.get_vendor_by_display_name, db, vendor_data.business_name):
         raise HTTPException(status_code=400, detail="Business name already in use!")
 
-    return vendor_service.create_vendor(db, vendor_data)
+    # Hash on the password pool (CPU-heavy), store on the threadpool (I/O)
+    hashed_password = await hash_password_or_503(vendor_data.password)
+    return await run_in_threadpool(vendor_service.create_vendor, db, vendor_data, hashed_password)
+
+async def hash_password_or_503(password: str) -> str:
+    try:
+        return await hash_password_async(password)
+    except PasswordHashingBusy:
+        raise busy_exception()
+
+def busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins right now. Please try again in a moment.",
+        headers={"Retry-After": "1"},
+    )
 
 # 2. LOGIN (Public)
 @router.post("/vendors/login")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     # Find the user
-    vendor = vendor_service.get_vendor_by_email(db, email=form_data.username)
+    vendor = await run_in_threadpool(vendor_service.get_vendor_by_email, db, form_data.username)
     
-    # Verify Password
-    if not vendor or not verify_password(form_data.password, vendor.hashed_password):
+    # Verify Password (on the hashing pool, never on the event loop or the threadpool)
+    valid, new_hash = False, None
+    if vendor is not None:
+        try:
+            valid, new_hash = await verify_and_update_async(form_data.password, vendor.hashed_password)
+        except PasswordHashingBusy:
+            raise busy_exception()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Stored hash uses an outdated cost (BCRYPT_ROUNDS changed): upgrade it now that we know the password
+    if new_hash is not None:
+        await run_in_threadpool(vendor_service.update_password_hash, db, vendor, new_hash)
     
     # Create the Token
-    access_token_expires = timedelta(minutes=60)
     access_token = create_access_token(
         data={"sub": vendor.email},
     )
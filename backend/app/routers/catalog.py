@@ -0,0 +1,49 @@
+import logging
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_read_db
+from app.core.tracing import span
+from app.schemas.catalog_schema import CatalogPage
+from app.services.catalog_service import InvalidCursor, browse_filters, build_browse_query, page_of
+from app.services.vendor_service import location_index
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/catalog", tags=["Catalog"])
+
+@router.get("/packages", response_model=CatalogPage)
+async def list_packages(
+    location: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    min_price: Optional[float] = Query(default=None, ge=0),
+    max_price: Optional[float] = Query(default=None, ge=0),
+    guests: Optional[int] = Query(default=None, ge=1),
+    radius_km: Optional[float] = Query(default=None, gt=0, le=500),
+    sort: Literal["price", "score"] = "price",
+    cursor: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Browse the catalog page by page. `sort=price` (cheapest first, index-backed) or
+    `sort=score` (same ranking as planning matches). Any number of `tags` match if the
+    package has at least one of them. `location` is resolved fuzzily ("Kandy City",
+    "Nuwara Elia"); add `radius_km` to include places nearby. Follow `next_cursor`
+    for the next page.
+    """
+    place = location_index.resolve(location) if location else None
+    if radius_km and place is None:
+        raise HTTPException(status_code=400, detail="radius_km needs a known location.")
+
+    filters = browse_filters(location, tags, min_price, max_price, guests, place=place, radius_km=radius_km)
+    try:
+        query = build_browse_query(filters, sort=sort, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with span("db"):
+        rows = (await db.execute(query)).all()
+    return ORJSONResponse(page_of(rows, sort, limit))
@@ -0,0 +1,96 @@
+import time
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.database import engine, async_engine, read_engine, async_read_engine
+from app.core.metrics import REGISTRY, counter_callback, gauge_callback
+from app.common.security import hash_pool_stats
+from app.services.ai_service import ai_service
+from app.services.vendor_service import async_vendor_service, auth_cache, package_catalog
+
+# 1. SETUP ROUTER
+router = APIRouter(tags=["Monitoring"])
+
+# ==========================================
+# 📊 SCRAPE-TIME VALUES (read when /metrics is hit, free otherwise)
+# ==========================================
+ENGINES = {"sync": engine, "async": async_engine}
+if read_engine is not engine:
+    ENGINES.update({"sync_read": read_engine, "async_read": async_read_engine})
+
+def _pool_stat(method: str) -> dict:
+    values = {}
+    for name, eng in ENGINES.items():
+        read = getattr(eng.pool, method, None)  # SQLite's pools don't track these
+        if read is not None:
+            values[(name,)] = read()
+    return values
+
+def _caches() -> dict:
+    caches = {}
+    if ai_service.cache is not None:
+        caches["ai_response"] = ai_service.cache
+    if auth_cache is not None:
+        caches["auth_token"] = auth_cache.tokens
+        caches["auth_vendor"] = auth_cache.vendors
+    return caches
+
+def _cache_stat(key: str) -> dict:
+    return {(name,): cache.stats()[key] for name, cache in _caches().items()}
+
+def _single_flight_stat(key: str) -> dict:
+    return {
+        (flight.name,): flight.stats()[key]
+        for flight in (ai_service.single_flight, async_vendor_service.single_flight)
+    }
+
+def _catalog_stat() -> dict:
+    if package_catalog is None or not package_catalog.ready:
+        return {}
+    return {
+        ("packages",): len(package_catalog),
+        ("age_seconds",): round(time.monotonic() - package_catalog.loaded_at, 3),
+    }
+
+gauge_callback("occacia_db_pool_checked_out", "Connections currently checked out of the SQLAlchemy pool.",
+               lambda: _pool_stat("checkedout"), ("engine",))
+gauge_callback("occacia_db_pool_overflow", "Connections opened beyond pool_size (negative = unused pool slots).",
+               lambda: _pool_stat("overflow"), ("engine",))
+gauge_callback("occacia_db_pool_size", "Configured SQLAlchemy pool size.",
+               lambda: _pool_stat("size"), ("engine",))
+
+counter_callback("occacia_cache_hits_total", "Cache hits since start.", lambda: _cache_stat("hits"), ("cache",))
+counter_callback("occacia_cache_misses_total", "Cache misses since start.", lambda: _cache_stat("misses"), ("cache",))
+gauge_callback("occacia_cache_hit_ratio", "hits / (hits + misses) since start.",
+               lambda: _cache_stat("hit_ratio"), ("cache",))
+gauge_callback("occacia_cache_entries", "Entries currently cached.", lambda: _cache_stat("size"), ("cache",))
+
+counter_callback("occacia_single_flight_calls_total", "Calls made through a single-flight group.",
+                 lambda: _single_flight_stat("calls"), ("group",))
+counter_callback("occacia_single_flight_collapsed_total", "Calls that joined an identical in-flight call.",
+                 lambda: _single_flight_stat("collapsed"), ("group",))
+
+gauge_callback("occacia_password_hash_pending", "bcrypt jobs running or queued on the hashing pool.",
+               lambda: {(): hash_pool_stats()["pending"]})
+
+gauge_callback("occacia_catalog", "In-memory package catalog snapshot.", _catalog_stat, ("stat",))
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def _breaker_stat(key: str) -> dict:
+    if ai_service.breaker is None:
+        return {}
+    value = ai_service.breaker.stats()[key]
+    return {(ai_service.breaker.name,): CIRCUIT_STATES.get(value, value)}
+
+gauge_callback("occacia_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open).",
+               lambda: _breaker_stat("state"), ("circuit",))
+counter_callback("occacia_circuit_rejected_total", "Calls refused by an open circuit breaker.",
+                 lambda: _breaker_stat("rejected"), ("circuit",))
+counter_callback("occacia_circuit_opened_total", "Times the circuit breaker opened.",
+                 lambda: _breaker_stat("opened"), ("circuit",))
+gauge_callback("occacia_langflow_timeout_seconds", "Current adaptive Langflow request timeout.",
+               lambda: {(): ai_service.timeout.current()})
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,74 @@
+import logging
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.routers.auth import get_current_vendor
+from app.schemas.vendor_schema import PackageCreate, PackageResponse, PackageUpdate
+from app.services import vendor_service
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+# 🔒 Every route acts on the logged-in vendor's own packages
+router = APIRouter(prefix="/vendors/me/packages", tags=["Vendor Packages"])
+
+def not_found() -> HTTPException:
+    # Someone else's package looks exactly like a missing one
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Package not found.")
+
+def write_failed(e: Exception) -> HTTPException:
+    """create/update errors -> HTTP: the vendor's own mistakes are 400s, the rest aren't blamed on them."""
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, vendor_service.VendorGone):
+        return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vendor not found.")
+    logger.warning(f"⚠️ Package write rejected by the database: {e}")
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail="The package conflicts with existing data.")
+
+@router.get("", response_model=List[PackageResponse])
+async def list_my_packages(vendor=Depends(get_current_vendor), db: Session = Depends(get_db)):
+    return await run_in_threadpool(vendor_service.list_vendor_packages, db, vendor.id)
+
+@router.post("", response_model=PackageResponse, status_code=status.HTTP_201_CREATED)
+async def create_my_package(data: PackageCreate, vendor=Depends(get_current_vendor), db: Session = Depends(get_db)):
+    try:
+        package = await run_in_threadpool(vendor_service.create_package, db, vendor.id, data.model_dump())
+    except (ValueError, vendor_service.VendorGone, IntegrityError) as e:
+        raise write_failed(e)
+    logger.info(f"📦 Vendor {vendor.id} created package {package.id}.")
+    return package
+
+@router.get("/{package_id}", response_model=PackageResponse)
+async def read_my_package(package_id: int, vendor=Depends(get_current_vendor), db: Session = Depends(get_db)):
+    package = await run_in_threadpool(vendor_service.get_vendor_package, db, vendor.id, package_id)
+    if package is None:
+        raise not_found()
+    return package
+
+@router.patch("/{package_id}", response_model=PackageResponse)
+async def update_my_package(package_id: int, data: PackageUpdate, vendor=Depends(get_current_vendor),
+                            db: Session = Depends(get_db)):
+    package = await run_in_threadpool(vendor_service.get_vendor_package, db, vendor.id, package_id)
+    if package is None:
+        raise not_found()
+    changes = data.model_dump(exclude_unset=True)
+    if changes.get("name", "") is None or ("tags" in changes and changes["tags"] is None):
+        raise HTTPException(status_code=400, detail="name and tags cannot be null.")
+    try:
+        package = await run_in_threadpool(vendor_service.update_package, db, package, changes)
+    except (ValueError, vendor_service.VendorGone, IntegrityError) as e:
+        raise write_failed(e)
+    logger.info(f"📦 Vendor {vendor.id} updated package {package_id}: {sorted(changes)}")
+    return package
+
+@router.delete("/{package_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_my_package(package_id: int, vendor=Depends(get_current_vendor), db: Session = Depends(get_db)):
+    package = await run_in_threadpool(vendor_service.get_vendor_package, db, vendor.id, package_id)
+    if package is None:
+        raise not_found()
+    await run_in_threadpool(vendor_service.delete_package, db, package)
+    logger.info(f"📦 Vendor {vendor.id} deleted package {package_id}.")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,51 +1,312 @@
+import asyncio
 import logging
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.schemas.plan_schema import PlanRequest, PlanResponse, VenueDisplay
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db, get_async_read_db, AsyncReadSessionLocal
+from app.core.config import settings
+from app.core.metrics import histogram
+from app.core.tracing import span
+from app.schemas.plan_schema import PlanRequest, PlanResponse, BatchPlanRequest, BatchPlanResponse, PlanSessionResponse
 from app.services.ai_service import ai_service
-from app.services.vendor_service import vendor_service
+from app.services.match_scoring import MATCH_LIMIT
+from app.services.planning_sessions import merge_analysis, planning_sessions
+from app.services.vendor_service import async_vendor_service
 
 # 1. SETUP LOGGING
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/planning", tags=["Planning"])
 
+# 📊 Metrics
+SERIALIZATION_SECONDS = histogram(
+    "occacia_serialization_seconds",
+    "Time spent turning an AI analysis + matched rows into the JSON response.",
+    ("route",),
+)
+
+AI_ERROR_ANALYSIS = {"intent": "chat", "reasoning": "AI error occurred. Using fallback."}
+
+def plan_fields(ai_analysis: dict) -> dict:
+    """Everything in a PlanResponse except the venues (the 'analysis' part)."""
+    return dict(
+        intent=ai_analysis.get("intent", "planning"),
+        reasoning=ai_analysis.get("reasoning", ""),
+        personality_profile=ai_analysis.get("personality_profile"),
+        chat_response=ai_analysis.get("chat_response"),
+        gift_suggestion=ai_analysis.get("gift_suggestion"),
+        event_type=ai_analysis.get("event_type"),
+        location=ai_analysis.get("location", "Any"),
+        budget_per_head=float(ai_analysis.get("budget_per_head") or 0),
+        guest_count=int(ai_analysis.get("guest_count") or 0),
+        venue_tags=ai_analysis.get("venue_tags") or [],
+        missing_info=ai_analysis.get("missing_info") or [],
+    )
+
+def venue_fields(venue) -> dict:
+    """A VenueDisplay as a plain dict, read off a match row or CatalogRecord (both already typed)."""
+    return {
+        "name": venue.name,
+        "description": venue.description,
+        "price_per_head": venue.price_per_head,
+        "tags": list(venue.tags or []),
+    }
+
+def build_plan_response(ai_analysis: dict, matches) -> dict:
+    """
+    PlanResponse as a dict, validated once: the AI part goes through the model (it is
+    untrusted JSON), the venues are copied straight from the rows.
+    """
+    plan = PlanResponse(**plan_fields(ai_analysis)).model_dump()
+    plan["matched_venues"] = [venue_fields(m) for m in matches]
+    return plan
+
+# Routes return an ORJSONResponse themselves, so FastAPI doesn't re-validate the payload
+# against `response_model` (which stays on the route for the OpenAPI docs)
 @router.post("/generate", response_model=PlanResponse)
-async def generate_plan(request: PlanRequest, db: Session = Depends(get_db)):
+async def generate_plan(request: PlanRequest, db: AsyncSession = Depends(get_async_read_db)):
     logger.info(f"📥 Processing Query: {request.user_query}")
 
     # PHASE 1: AI Understanding
     try:
-        ai_analysis = await ai_service.generate_date_plan(request.user_query)
+        with span("ai"):
+            ai_analysis = await ai_service.generate_date_plan(request.user_query)
         logger.info(f"🧠 AI Analysis complete. Intent: {ai_analysis.get('intent')}")
     except Exception as e:
         logger.error(f"⚠️ AI Critical Error: {e}")
-        ai_analysis = {"intent": "chat", "reasoning": "AI error occurred. Using fallback."}
+        ai_analysis = dict(AI_ERROR_ANALYSIS)
 
     # PHASE 2: Database Matching (Smart Filter)
     # Fixed logic: Only define matches ONCE
     matches = []
-    
+
     if ai_analysis.get("intent") == "planning":
          logger.info("🔎 Planning Intent detected. Searching Database...")
-         matches = vendor_service.find_perfect_matches(db, ai_analysis)
+         with span("match"):
+             matches = await async_vendor_service.find_perfect_matches(db, ai_analysis)
          logger.info(f"✅ Found {len(matches)} venues.")
     else:
          logger.info("💬 Chat Intent detected. Skipping Database search.")
 
     # PHASE 3: Response
-    return PlanResponse(
-        intent=ai_analysis.get("intent", "planning"),
-        reasoning=ai_analysis.get("reasoning", ""),
-        personality_profile=ai_analysis.get("personality_profile"),
-        chat_response=ai_analysis.get("chat_response"),
-        gift_suggestion=ai_analysis.get("gift_suggestion"),
-        event_type=ai_analysis.get("event_type"),
-        location=ai_analysis.get("location", "Any"),
-        budget_per_head=float(ai_analysis.get("budget_per_head") or 0),
-        guest_count=int(ai_analysis.get("guest_count") or 0),
-        venue_tags=ai_analysis.get("venue_tags") or [],
-        missing_info=ai_analysis.get("missing_info") or [],
-        matched_venues=[VenueDisplay.model_validate(m) for m in matches]
-    )
\ No newline at end of file
+    with SERIALIZATION_SECONDS.time("/planning/generate"), span("serialize"):
+        return ORJSONResponse(build_plan_response(ai_analysis, matches))
+
+# ==========================================
+# 📡 STREAMING (Server-Sent Events)
+# ==========================================
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+async def stream_plan_events(user_query: str):
+    """
+    event: token     {"text": ...}        chat_response pieces (when Langflow streams)
+    event: analysis  PlanResponse fields  as soon as the AI JSON is parsed
+    event: venue     VenueDisplay         one per match, as rows arrive
+    event: done      {"matched": n}
+    """
+    # PHASE 1: AI Understanding (stream tokens through as they come)
+    ai_analysis = None
+    try:
+        async for kind, value in ai_service.stream_date_plan(user_query):
+            if kind == "token":
+                yield sse("token", {"text": value})
+            else:
+                ai_analysis = value
+    except Exception as e:
+        logger.error(f"⚠️ AI Critical Error: {e}")
+    if ai_analysis is None:
+        ai_analysis = dict(AI_ERROR_ANALYSIS)
+
+    yield sse("analysis", plan_fields(ai_analysis))
+
+    # PHASE 2: Database Matching (each venue goes out the moment it is found)
+    matched = 0
+    if ai_analysis.get("intent") == "planning":
+        # Own session: the response outlives the request's dependency scope
+        async with AsyncReadSessionLocal() as db:
+            try:
+                async for package in async_vendor_service.iter_perfect_matches(db, ai_analysis):
+                    matched += 1
+                    yield sse("venue", venue_fields(package))
+            except Exception as e:
+                logger.error(f"⚠️ Venue search failed mid-stream: {e}")
+                yield sse("error", {"message": "Venue search failed."})
+
+    yield sse("done", {"matched": matched})
+
+@router.post("/generate/stream")
+async def generate_plan_stream(request: PlanRequest):
+    logger.info(f"📥 Streaming Query: {request.user_query}")
+    return StreamingResponse(
+        stream_plan_events(request.user_query),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Nginx: don't hold events back in its buffer
+        },
+    )
+
+# ==========================================
+# 📚 BATCH (Partner integrations / nightly jobs)
+# ==========================================
+async def analyse_batch_item(index: int, user_query: str, limiter: asyncio.Semaphore):
+    """Returns (index, analysis, error). Errors stay per item; they never fail the batch."""
+    async with limiter:
+        try:
+            return index, await ai_service.generate_date_plan(user_query), None
+        except Exception as e:
+            logger.error(f"⚠️ Batch item {index}: AI Critical Error: {e}")
+            return index, None, "AI analysis failed."
+
+async def stream_batch_lines(queries: list):
+    """NDJSON: one BatchPlanItem per line, in completion order (not request order)."""
+    limiter = asyncio.Semaphore(settings.PLANNING_BATCH_CONCURRENCY)
+    pending = [analyse_batch_item(i, q, limiter) for i, q in enumerate(queries)]
+
+    async with AsyncReadSessionLocal() as db:
+        for finished in asyncio.as_completed(pending):
+            index, ai_analysis, error = await finished
+            if error is None:
+                try:
+                    matches = []
+                    if ai_analysis.get("intent") == "planning":
+                        matches = await async_vendor_service.find_perfect_matches(db, ai_analysis)
+                    item = batch_item(index, result=build_plan_response(ai_analysis, matches))
+                except Exception as e:
+                    logger.error(f"⚠️ Batch item {index}: venue search failed: {e}")
+                    item = batch_item(index, error="Venue search failed.")
+            else:
+                item = batch_item(index, error=error)
+            yield orjson.dumps(item) + b"\n"
+
+@router.post("/generate/batch", response_model=BatchPlanResponse)
+async def generate_plan_batch(batch: BatchPlanRequest, stream: bool = False, db: AsyncSession = Depends(get_async_read_db)):
+    """
+    Plans many queries in one call. AI analysis runs with bounded concurrency
+    (PLANNING_BATCH_CONCURRENCY). Without `stream`, every venue lookup is resolved in a
+    single grouped DB round trip and results come back in request order. With
+    `?stream=true`, each item is sent as an NDJSON line as soon as it finishes.
+    """
+    queries = [r.user_query for r in batch.requests]
+    if len(queries) > settings.PLANNING_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can hold at most {settings.PLANNING_BATCH_MAX_ITEMS} requests."
+        )
+    logger.info(f"📥 Processing Batch: {len(queries)} queries (stream={stream})")
+
+    if stream:
+        return StreamingResponse(stream_batch_lines(queries), media_type="application/x-ndjson")
+
+    # PHASE 1: AI Understanding (bounded parallelism)
+    limiter = asyncio.Semaphore(settings.PLANNING_BATCH_CONCURRENCY)
+    analysed = await asyncio.gather(*(analyse_batch_item(i, q, limiter) for i, q in enumerate(queries)))
+
+    # PHASE 2: Database Matching (one grouped round trip for the whole batch)
+    planning = [(index, a) for index, a, error in analysed if error is None and a.get("intent") == "planning"]
+    matches = {}
+    search_error = None
+    try:
+        found = await async_vendor_service.find_matches_batch(db, [a for _, a in planning])
+        matches = {index: packages for (index, _), packages in zip(planning, found)}
+    except Exception as e:
+        logger.error(f"⚠️ Batch venue search failed: {e}")
+        search_error = "Venue search failed."
+
+    # PHASE 3: Response
+    with SERIALIZATION_SECONDS.time("/planning/generate/batch"):
+        return ORJSONResponse(build_batch_response(analysed, matches, search_error))
+
+def batch_item(index: int, result: dict = None, error: str = None) -> dict:
+    """A BatchPlanItem as a dict."""
+    return {"index": index, "status": "error" if error else "ok", "result": result, "error": error}
+
+def build_batch_response(analysed: list, matches: dict, search_error) -> dict:
+    results = []
+    for index, ai_analysis, error in analysed:
+        if error is None and search_error is not None and ai_analysis.get("intent") == "planning":
+            error = search_error
+        if error is not None:
+            results.append(batch_item(index, error=error))
+        else:
+            results.append(batch_item(index, result=build_plan_response(ai_analysis, matches.get(index, []))))
+    return {"results": results}
+
+# ==========================================
+# 💬 SESSIONS (multi-turn planning)
+# ==========================================
+async def analyse_turn(user_query: str) -> dict:
+    try:
+        with span("ai"):
+            return await ai_service.generate_date_plan(user_query)
+    except Exception as e:
+        logger.error(f"⚠️ AI Critical Error: {e}")
+        return dict(AI_ERROR_ANALYSIS)
+
+def build_session_response(session_id: str, turn: int, ai_analysis: dict, matches, narrowed: bool) -> dict:
+    plan = build_plan_response(ai_analysis, matches[:MATCH_LIMIT])
+    plan.update(session_id=session_id, turn=turn, narrowed=narrowed)
+    return plan
+
+@router.post("/sessions", response_model=PlanSessionResponse, status_code=201)
+async def start_session(request: PlanRequest, db: AsyncSession = Depends(get_async_db),
+                        read_db: AsyncSession = Depends(get_async_read_db)):
+    """Starts a planning conversation: the first turn of /planning/generate, plus a session_id."""
+    logger.info(f"📥 New planning session: {request.user_query}")
+    ai_analysis = await analyse_turn(request.user_query)
+
+    candidates = []
+    if ai_analysis.get("intent") == "planning":
+        with span("match"):
+            candidates, _ = await async_vendor_service.find_session_matches(
+                read_db, ai_analysis, limit=settings.PLANNING_SESSION_CANDIDATES
+            )
+
+    session = await planning_sessions.create(db, ai_analysis, [c.id for c in candidates])
+    with SERIALIZATION_SECONDS.time("/planning/sessions"), span("serialize"):
+        return ORJSONResponse(build_session_response(session.id, 1, ai_analysis, candidates, False), status_code=201)
+
+@router.post("/sessions/{session_id}/messages", response_model=PlanSessionResponse)
+async def continue_session(session_id: str, request: PlanRequest, db: AsyncSession = Depends(get_async_db),
+                           read_db: AsyncSession = Depends(get_async_read_db)):
+    """
+    A follow-up turn. Only the new message goes to the AI; its answer is merged into
+    what the session already knows, and the previous candidates are narrowed when the
+    new details only tighten the search.
+    """
+    session = await planning_sessions.get(db, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Planning session not found or expired.")
+    logger.info(f"📥 Session {session_id} turn {session.turns + 1}: {request.user_query}")
+
+    delta = await analyse_turn(request.user_query)
+    previous = session.analysis
+    merged, changed = merge_analysis(previous, delta)
+
+    candidates, narrowed = [], False
+    searched = merged.get("intent") == "planning" and (changed or delta.get("intent") == "planning")
+    if searched:
+        with span("match"):
+            candidates, narrowed = await async_vendor_service.find_session_matches(
+                read_db, merged, previous=previous if previous.get("intent") == "planning" else None,
+                candidate_ids=session.candidate_ids or (), limit=settings.PLANNING_SESSION_CANDIDATES,
+            )
+        candidate_ids = [c.id for c in candidates]
+    else:
+        # Nothing new to search on: answer the turn, keep the candidates for the next one
+        candidate_ids = list(session.candidate_ids or [])
+
+    await planning_sessions.save(db, session, merged, candidate_ids)
+    # A turn with nothing to search on answers as itself (e.g. small talk), not as the whole plan
+    shown = merged if searched else dict(merged, intent=delta.get("intent", "chat"),
+                                        missing_info=delta.get("missing_info") or merged.get("missing_info") or [])
+    with SERIALIZATION_SECONDS.time("/planning/sessions"), span("serialize"):
+        return ORJSONResponse(build_session_response(session_id, session.turns, shown, candidates, narrowed))
+
+@router.delete("/sessions/{session_id}", status_code=204)
+async def end_session(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    if not await planning_sessions.delete(db, session_id):
+        raise HTTPException(status_code=404, detail="Planning session not found or expired.")
+    return Response(status_code=204)
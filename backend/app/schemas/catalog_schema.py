@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+# 1. One package in a browse page
+class CatalogPackage(BaseModel):
+    id: int
+    vendor_id: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[float] = None
+    price_per_head: Optional[float] = None
+    min_guests: Optional[int] = None
+    max_guests: Optional[int] = None
+    tags: List[str] = []
+    location: Optional[str] = None   # the vendor's location_base
+
+# 2. A page (pass next_cursor back as ?cursor= for the next one; null on the last page)
+class CatalogPage(BaseModel):
+    items: List[CatalogPackage] = []
+    next_cursor: Optional[str] = None
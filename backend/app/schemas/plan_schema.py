@@ -30,4 +30,23 @@ class PlanResponse(BaseModel):
     missing_info: List[str] = []
     
     # ✅ FIX: Strictly typed list forces the conversion from SQL -> JSON
-    matched_venues: List[VenueDisplay] = []
\ No newline at end of file
+    matched_venues: List[VenueDisplay] = []
+
+# 4. Batch Planning (Partner integrations / nightly jobs)
+class BatchPlanRequest(BaseModel):
+    requests: List[PlanRequest]
+
+class BatchPlanItem(BaseModel):
+    index: int                         # position in BatchPlanRequest.requests
+    status: str                        # "ok" | "error"
+    result: Optional[PlanResponse] = None
+    error: Optional[str] = None
+
+class BatchPlanResponse(BaseModel):
+    results: List[BatchPlanItem] = []
+
+# 5. Planning Sessions (multi-turn)
+class PlanSessionResponse(PlanResponse):
+    session_id: str
+    turn: int
+    narrowed: bool = False  # True: this turn re-ranked the previous candidates instead of searching again
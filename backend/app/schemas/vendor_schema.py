@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 from typing import Optional, List
+from app.services.package_catalog import normalize_tags
 
 # 1. Registration Input
 class VendorRegisterRequest(BaseModel):
@@ -29,4 +30,52 @@ class VendorResponse(BaseModel):
 # 4. Token Output
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+# 5. Vendor Packages (a vendor's own catalog entries)
+class PackageCreate(BaseModel):
+    name: str = Field(min_length=1)
+    description: Optional[str] = None
+    price: Optional[float] = Field(default=None, ge=0)
+    price_per_head: Optional[float] = Field(default=None, ge=0)
+    min_guests: Optional[int] = Field(default=None, ge=0)
+    max_guests: Optional[int] = Field(default=None, ge=0)
+    tags: List[str] = []
+    location_coverage: Optional[str] = None
+
+    # Stored the way matching searches them ("Romantic " -> "romantic"): && is case-sensitive
+    @field_validator("tags")
+    @classmethod
+    def normalize(cls, tags):
+        return None if tags is None else normalize_tags(tags)
+
+    @model_validator(mode="after")
+    def check_guest_range(self):
+        if self.min_guests is not None and self.max_guests is not None and self.min_guests > self.max_guests:
+            raise ValueError("min_guests cannot be larger than max_guests")
+        return self
+
+# PATCH: only the fields sent are changed
+class PackageUpdate(PackageCreate):
+    name: Optional[str] = Field(default=None, min_length=1)
+    tags: Optional[List[str]] = None
+
+class PackageResponse(BaseModel):
+    id: int
+    vendor_id: int
+    name: str
+    description: Optional[str] = None
+    price: Optional[float] = None
+    price_per_head: Optional[float] = None
+    min_guests: Optional[int] = None
+    max_guests: Optional[int] = None
+    tags: List[str] = []
+    location_coverage: Optional[str] = None
+
+    @field_validator("tags", mode="before")
+    @classmethod
+    def no_null_tags(cls, tags):
+        return tags or []
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,305 @@
+"""
+🚚 BULK CATALOG IMPORT
+
+Streams vendor + package files into Postgres in fixed-size chunks, so memory stays
+flat no matter how big the files are.
+
+    python -m app.scripts.bulk_import --vendors vendors.csv --packages packages.jsonl
+    python -m app.scripts.bulk_import --packages packages.csv --method copy --chunk-size 20000
+
+Files are CSV (header row) or JSONL (one object per line), picked by extension.
+  vendors:  business_name, email, location_base, phone, is_verified
+  packages: vendor_email, name, description, price, price_per_head,
+            min_guests, max_guests, tags, location_coverage
+In CSV, `tags` is "a|b|c" or a JSON list.
+
+Vendors are upserted on `vendors.email`; their location_base is then linked to
+`locations` (the app's fuzzy name/alias match). Packages find their vendor by
+`vendor_email` (one lookup per chunk, never per row) and are upserted on
+(vendor_id, name), so re-running an import updates instead of duplicating.
+Rows that can't be written (vendors without an email, packages without a name
+or whose vendor doesn't exist) are skipped and counted. Within a chunk, the last row for a key wins.
+
+--method insert  batched multi-row INSERT ... ON CONFLICT through SQLAlchemy (default)
+--method copy    COPY into a temp table, then one INSERT ... SELECT ... ON CONFLICT per chunk
+"""
+import argparse
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import case, null, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.database import engine
+from app.models.marketplace import Vendor, Package
+from app.services.catalog_events import publish_catalog_change
+from app.services.location_index import link_vendor_locations
+from app.services.package_catalog import normalize_tags
+
+VENDOR_FIELDS = ("business_name", "email", "location_base", "phone", "is_verified")
+PACKAGE_FIELDS = (
+    "name", "description", "price", "price_per_head",
+    "min_guests", "max_guests", "tags", "location_coverage",
+)
+
+# ==========================================
+# 📖 READING (lazy: one row in memory at a time)
+# ==========================================
+def iter_records(path: str) -> Iterator[dict]:
+    suffix = Path(path).suffix.lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+        elif suffix in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unsupported file type '{suffix}' (use .csv or .jsonl)")
+
+def chunked(records: Iterator[dict], size: int) -> Iterator[list]:
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+def _number(value, cast):
+    return None if _blank(value) else cast(value)
+
+def _tags(value) -> list:
+    # Normalized like every other write, so the case-sensitive && filter finds them
+    if _blank(value):
+        return []
+    if isinstance(value, list):
+        return normalize_tags(value)
+    value = value.strip()
+    if value.startswith("["):
+        return _tags(json.loads(value))
+    return normalize_tags(value.split("|"))
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+def clean_vendor(raw: dict) -> dict:
+    return {
+        "business_name": raw.get("business_name"),
+        "email": (raw.get("email") or "").strip().lower(),
+        "location_base": raw.get("location_base"),
+        "phone": None if _blank(raw.get("phone")) else raw.get("phone"),
+        "is_verified": _bool(raw.get("is_verified", False)),
+    }
+
+def clean_package(raw: dict) -> dict:
+    return {
+        "vendor_email": (raw.get("vendor_email") or "").strip().lower(),
+        "name": raw.get("name"),
+        "description": raw.get("description"),
+        "price": _number(raw.get("price"), float),
+        "price_per_head": _number(raw.get("price_per_head"), float),
+        "min_guests": _number(raw.get("min_guests"), int),
+        "max_guests": _number(raw.get("max_guests"), int),
+        "tags": _tags(raw.get("tags")),
+        "location_coverage": None if _blank(raw.get("location_coverage")) else raw.get("location_coverage"),
+    }
+
+# ==========================================
+# 🧱 METHOD 1: BATCHED INSERTS
+# ==========================================
+def _by_email(rows: list) -> tuple:
+    """(rows to write, skipped): last row wins when the same email shows up twice in one chunk."""
+    keyed = {r["email"]: r for r in rows if r["email"]}
+    return list(keyed.values()), sum(1 for r in rows if not r["email"])
+
+def _named(rows: list) -> list:
+    # (vendor_id, name) is the upsert key: a nameless package can't be matched on re-import
+    return [r for r in rows if not _blank(r["name"])]
+
+def upsert_vendors_insert(conn, rows: list) -> tuple:
+    rows, skipped = _by_email(rows)
+    if not rows:
+        return 0, skipped
+    stmt = insert(Vendor).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Vendor.email],
+        set_={
+            **{field: stmt.excluded[field] for field in VENDOR_FIELDS if field != "email"},
+            # A moved vendor is re-linked to its new location after the import
+            "location_id": case(
+                (Vendor.location_base.is_distinct_from(stmt.excluded.location_base), null()),
+                else_=Vendor.location_id,
+            ),
+        },
+    )
+    conn.execute(stmt)
+    return len(rows), skipped
+
+def upsert_packages_insert(conn, rows: list) -> tuple:
+    total, rows = len(rows), _named(rows)
+    emails = {r["vendor_email"] for r in rows}
+    # 🔑 Resolve every foreign key of the chunk in one query
+    vendor_ids = dict(conn.execute(
+        select(Vendor.email, Vendor.id).where(Vendor.email.in_(emails))
+    ).all())
+
+    to_write, written = {}, 0
+    for r in rows:
+        vendor_id = vendor_ids.get(r["vendor_email"])
+        if vendor_id is not None:
+            # One row per (vendor, name): Postgres won't upsert the same row twice in a statement
+            to_write[(vendor_id, r["name"])] = {"vendor_id": vendor_id, **{f: r[f] for f in PACKAGE_FIELDS}}
+            written += 1
+    if to_write:
+        stmt = insert(Package)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Package.vendor_id, Package.name],
+            set_={field: stmt.excluded[field] for field in PACKAGE_FIELDS if field != "name"},
+        )
+        conn.execute(stmt, list(to_write.values()))  # executemany -> multi-row VALUES batches
+    return written, total - written
+
+# ==========================================
+# 🚀 METHOD 2: COPY (+ one set-based INSERT per chunk)
+# ==========================================
+def _pg_array(values: list) -> str:
+    escaped = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(escaped) + "}"
+
+def _copy(conn, table: str, columns: tuple, rows: list):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for r in rows:
+        writer.writerow([
+            _pg_array(r[c]) if isinstance(r[c], list) else ("" if r[c] is None else r[c])
+            for c in columns
+        ])
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def upsert_vendors_copy(conn, rows: list) -> tuple:
+    rows, skipped = _by_email(rows)
+    if not rows:
+        return 0, skipped
+    conn.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS import_vendors "
+        "(business_name text, email text, location_base text, phone text, is_verified boolean) "
+        "ON COMMIT DELETE ROWS"
+    ))
+    _copy(conn, "import_vendors", VENDOR_FIELDS, rows)
+    conn.execute(text(
+        "INSERT INTO vendors (business_name, email, location_base, phone, is_verified) "
+        "SELECT business_name, email, location_base, phone, is_verified FROM import_vendors "
+        "ON CONFLICT (email) DO UPDATE SET "
+        "business_name = EXCLUDED.business_name, location_base = EXCLUDED.location_base, "
+        "phone = EXCLUDED.phone, is_verified = EXCLUDED.is_verified, "
+        "location_id = CASE WHEN vendors.location_base IS DISTINCT FROM EXCLUDED.location_base "
+        "THEN NULL ELSE vendors.location_id END"
+    ))
+    return len(rows), skipped
+
+def upsert_packages_copy(conn, rows: list) -> tuple:
+    total, rows = len(rows), _named(rows)
+    if not rows:
+        return 0, total
+    # `line` numbers the rows in COPY order, so the last row for a (vendor, name) wins
+    conn.execute(text(
+        "CREATE TEMP TABLE IF NOT EXISTS import_packages "
+        "(line bigserial, vendor_email text, name text, description text, price double precision, "
+        "price_per_head double precision, min_guests integer, max_guests integer, "
+        "tags varchar[], location_coverage text) ON COMMIT DELETE ROWS"
+    ))
+    _copy(conn, "import_packages", ("vendor_email",) + PACKAGE_FIELDS, rows)
+    # 🔑 Foreign keys resolved by the join, inside Postgres
+    written = conn.execute(text(
+        "WITH matched AS ("
+        "  SELECT v.id AS vendor_id, p.* FROM import_packages p JOIN vendors v ON v.email = p.vendor_email"
+        "), upserted AS ("
+        "  INSERT INTO packages (vendor_id, name, description, price, price_per_head, "
+        "  min_guests, max_guests, tags, location_coverage) "
+        "  SELECT DISTINCT ON (vendor_id, name) vendor_id, name, description, price, price_per_head, "
+        "  min_guests, max_guests, tags, location_coverage "
+        "  FROM matched ORDER BY vendor_id, name, line DESC "
+        "  ON CONFLICT (vendor_id, name) DO UPDATE SET "
+        "  description = EXCLUDED.description, price = EXCLUDED.price, "
+        "  price_per_head = EXCLUDED.price_per_head, min_guests = EXCLUDED.min_guests, "
+        "  max_guests = EXCLUDED.max_guests, tags = EXCLUDED.tags, "
+        "  location_coverage = EXCLUDED.location_coverage"
+        ") SELECT count(*) FROM matched"
+    )).scalar_one()
+    return written, total - written
+
+METHODS = {
+    "insert": (upsert_vendors_insert, upsert_packages_insert),
+    "copy": (upsert_vendors_copy, upsert_packages_copy),
+}
+
+# ==========================================
+# 🏃 DRIVER
+# ==========================================
+def import_vendors(path: str, chunk_size: int = 5000, method: str = "insert", bind=engine) -> dict:
+    upsert, _ = METHODS[method]
+    started, total, skipped = time.perf_counter(), 0, 0
+    for chunk in chunked((clean_vendor(r) for r in iter_records(path)), chunk_size):
+        with bind.begin() as conn:  # one transaction per chunk
+            written, blank = upsert(conn, chunk)
+        total, skipped = total + written, skipped + blank
+        _progress("vendors", total, skipped, started)
+    with bind.begin() as conn:
+        link_vendor_locations(conn)
+        # Vendor locations are part of the catalog: running workers reload it
+        publish_catalog_change(conn, None)
+    return _summary("vendors", total, skipped, started)
+
+def import_packages(path: str, chunk_size: int = 5000, method: str = "insert", bind=engine) -> dict:
+    _, upsert = METHODS[method]
+    started, total, skipped = time.perf_counter(), 0, 0
+    for chunk in chunked((clean_package(r) for r in iter_records(path)), chunk_size):
+        with bind.begin() as conn:
+            written, missing = upsert(conn, chunk)
+        total, skipped = total + written, skipped + missing
+        _progress("packages", total, skipped, started)
+    with bind.begin() as conn:
+        publish_catalog_change(conn, None)
+    return _summary("packages", total, skipped, started)
+
+def _progress(kind: str, total: int, skipped: int, started: float):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f"   ... {kind}: {total} rows ({total / elapsed:,.0f} rows/sec), {skipped} skipped")
+
+def _summary(kind: str, total: int, skipped: int, started: float) -> dict:
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {kind}: {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec), {skipped} skipped")
+    return {"rows": total, "skipped": skipped, "seconds": elapsed, "rows_per_sec": rate}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import vendors and packages (CSV / JSONL).")
+    parser.add_argument("--vendors", help="vendors file (.csv or .jsonl)")
+    parser.add_argument("--packages", help="packages file (.csv or .jsonl)")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--method", choices=sorted(METHODS), default="insert")
+    args = parser.parse_args(argv)
+
+    if not args.vendors and not args.packages:
+        parser.error("give --vendors and/or --packages")
+
+    print(f"🚚 Bulk import (method={args.method}, chunk={args.chunk_size})")
+    # Vendors first: packages look their vendor up by email
+    if args.vendors:
+        import_vendors(args.vendors, args.chunk_size, args.method)
+    if args.packages:
+        import_packages(args.packages, args.chunk_size, args.method)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine
-from app.models.marketplace import Vendor, Package
+from app.models.marketplace import Location, Vendor, Package
+from app.services.location_index import KNOWN_LOCATIONS
+
+def seed_locations(db: Session) -> dict:
+    """Adds KNOWN_LOCATIONS to an empty locations table; returns {name: id}."""
+    if not db.query(Location).first():
+        db.add_all(
+            Location(name=name, aliases=aliases, latitude=lat, longitude=lon)
+            for name, aliases, lat, lon in KNOWN_LOCATIONS
+        )
+        db.commit()
+    return dict(db.query(Location.name, Location.id).all())
 
 def seed_data():
     db = SessionLocal()
-    
+    location_ids = seed_locations(db)
+
     # Check if data exists
     if db.query(Vendor).first():
         print("⚡ Database already initialized. Skipping seed.")
@@ -13,6 +25,10 @@ def seed_data():
 
     print("🌱 Database is empty. Planting seeds...")
 
+    # Packages hang off their vendor's relationship, so everything is
+    # written in ONE flush/commit (no commit per vendor just to get its id)
+    vendors = []
+
     # ==========================================
     # 1. THE INTROVERT (Kandy)
     # ==========================================
@@ -24,11 +40,9 @@ def seed_data():
         phone="+94771234567",
         is_verified=True
     )
-    db.add(v1)
-    db.commit()
+    vendors.append(v1)
     
-    db.add(Package(
-        vendor_id=v1.id,
+    v1.packages.append(Package(
         name="The Hermit's Dinner",
         description="A completely private dining experience in a secluded garden booth.",
         price=3500.0,
@@ -48,11 +62,9 @@ def seed_data():
         phone="+94112345678",
         is_verified=True
     )
-    db.add(v2)
-    db.commit()
+    vendors.append(v2)
 
-    db.add(Package(
-        vendor_id=v2.id,
+    v2.packages.append(Package(
         name="Executive Boardroom",
         description="Soundproof boardroom with 5G Wifi and 4K Projector.",
         price=5000.0, 
@@ -72,11 +84,9 @@ def seed_data():
         phone="+94779998888",
         is_verified=True
     )
-    db.add(v3)
-    db.commit()
+    vendors.append(v3)
 
-    db.add(Package(
-        vendor_id=v3.id,
+    v3.packages.append(Package(
         name="Sunset Proposal Package",
         description="Private rooftop corner with rose petals and candles.",
         price=15000.0,
@@ -96,11 +106,9 @@ def seed_data():
         phone="+94775554444",
         is_verified=True
     )
-    db.add(v4)
-    db.commit()
+    vendors.append(v4)
 
-    db.add(Package(
-        vendor_id=v4.id,
+    v4.packages.append(Package(
         name="Student Birthday Bash",
         description="Reserved large table, loud music, and budget platters.",
         price=1500.0,
@@ -120,11 +128,9 @@ def seed_data():
         phone="+94342223333",
         is_verified=True
     )
-    db.add(v5)
-    db.commit()
+    vendors.append(v5)
 
-    db.add(Package(
-        vendor_id=v5.id,
+    v5.packages.append(Package(
         name="Family Day Out",
         description="Access to kids' pool, buffet lunch, and garden.",
         price=4000.0,
@@ -144,11 +150,9 @@ def seed_data():
         phone="+94711112222",
         is_verified=True
     )
-    db.add(v6)
-    db.commit()
+    vendors.append(v6)
 
-    db.add(Package(
-        vendor_id=v6.id,
+    v6.packages.append(Package(
         name="Jungle BBQ Night",
         description="Camping under the stars with a bonfire BBQ.",
         price=2500.0,
@@ -158,6 +162,9 @@ def seed_data():
         tags=["nature", "adventure", "camping"]
     ))
 
+    for vendor in vendors:
+        vendor.location_id = location_ids.get(vendor.location_base)
+    db.add_all(vendors)
     db.commit()
     print("✅ Database Seeded Successfully!")
     db.close()
\ No newline at end of file
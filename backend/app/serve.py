@@ -0,0 +1,154 @@
+"""
+🚀 PRODUCTION SERVER
+
+    python -m app.serve                      # WEB_CONCURRENCY workers (default: one per core)
+    python -m app.serve --workers 4 --port 8000
+
+Runs N uvicorn workers under one supervisor. SIGTERM/SIGINT stop accepting new
+connections and give in-flight requests up to GRACEFUL_TIMEOUT seconds to finish
+(each worker runs its shutdown hooks), so rolling deploys don't cut requests off.
+
+The supervisor also owns the package catalog: it builds the snapshot once, writes it to
+a shared file (tmpfs when available) and rewrites it when the catalog changes. Workers
+memory-map that file read-only, so N workers share one copy and don't each poll Postgres.
+
+Connection budget: each worker opens a sync and an async engine (DB_POOL_SIZE +
+DB_MAX_OVERFLOW connections each, at most) plus one LISTEN connection. Unless the pool
+sizes are set explicitly, they're derived from DB_CONNECTION_BUDGET (default 90, under
+Postgres' default max_connections=100 with room for migrations and psql), split evenly
+across the workers.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import uvicorn
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("app.serve")
+
+# Per worker: 2 engines x (pool + overflow) + 1 LISTEN connection
+ENGINES_PER_WORKER = 2
+LISTEN_CONNECTIONS_PER_WORKER = 1
+# Never more than app.core.database's own defaults (10 + 20), never less than 1 + 1
+MAX_PER_ENGINE, MIN_PER_ENGINE = 30, 2
+
+def pool_sizes(workers: int, budget: int) -> tuple:
+    """(pool_size, max_overflow) per engine so `workers` processes stay within `budget` connections."""
+    per_worker = budget // max(1, workers) - LISTEN_CONNECTIONS_PER_WORKER
+    per_engine = max(MIN_PER_ENGINE, min(MAX_PER_ENGINE, per_worker // ENGINES_PER_WORKER))
+    # Keep the default 1:2 split between steady pool and burst overflow
+    pool_size = max(1, per_engine // 3)
+    return pool_size, per_engine - pool_size
+
+def default_snapshot_path() -> str:
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"occacia-catalog-{os.getpid()}.bin")
+
+class SnapshotPublisher:
+    """Keeps the shared catalog file in step with Postgres (a daemon thread in the supervisor)."""
+
+    def __init__(self, path: str, interval: float, max_age: float):
+        from app.core.database import ReadSessionLocal
+        from app.services.package_catalog import PackageCatalog
+
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.session_factory = ReadSessionLocal
+        self.catalog = PackageCatalog()
+        self.version = None
+        self.published_at = 0.0
+
+    def publish(self):
+        from app.services.shared_catalog import write_snapshot_file
+
+        snapshot = self.catalog.build(self.session_factory)
+        write_snapshot_file(snapshot, self.path)
+        self.version, self.published_at = snapshot.version, time.monotonic()
+        logger.info(f"🗺️ Catalog snapshot published: {len(snapshot)} packages -> {self.path}")
+
+    def check(self):
+        if self.version is not None and time.monotonic() - self.published_at < self.max_age:
+            with self.session_factory() as db:
+                if self.catalog.fetch_version(db) == self.version:
+                    return
+        self.publish()
+
+    def run_forever(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"⚠️ Catalog snapshot refresh failed, workers keep the old one: {e}")
+
+    def start(self):
+        try:
+            self.publish()
+        except Exception as e:
+            # Workers fall back to loading from Postgres until a publish succeeds
+            logger.error(f"⚠️ Initial catalog snapshot failed: {e}")
+        threading.Thread(target=self.run_forever, name="catalog-publisher", daemon=True).start()
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Occacia API with multiple workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1))))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    args = parser.parse_args(argv)
+
+    # bcrypt processes are per worker: split the cores instead of multiplying them
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+    # DB pools are per worker too: split the connection budget the same way
+    budget = int(os.getenv("DB_CONNECTION_BUDGET", "90"))
+    pool_size, max_overflow = pool_sizes(args.workers, budget)
+    os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+    os.environ.setdefault("DB_MAX_OVERFLOW", str(max_overflow))
+    worst_case = args.workers * (
+        ENGINES_PER_WORKER * (int(os.environ["DB_POOL_SIZE"]) + int(os.environ["DB_MAX_OVERFLOW"]))
+        + LISTEN_CONNECTIONS_PER_WORKER
+    )
+    if worst_case > budget:
+        logger.warning(f"⚠️ {args.workers} workers can open {worst_case} DB connections, over DB_CONNECTION_BUDGET.")
+
+    from app.core.config import settings
+
+    publisher = None
+    if settings.CATALOG_CACHE_ENABLED:
+        path = settings.CATALOG_SNAPSHOT_PATH or default_snapshot_path()
+        publisher = SnapshotPublisher(path, settings.CATALOG_VERSION_CHECK_SECONDS, settings.CATALOG_MAX_AGE_SECONDS)
+        publisher.start()
+        # Workers are separate processes: they read the path from the environment
+        os.environ["CATALOG_SNAPSHOT_PATH"] = path
+
+    logger.info(
+        f"🚀 Serving on {args.host}:{args.port} with {args.workers} workers "
+        f"(DB pool {os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']} per engine)."
+    )
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            proxy_headers=True,
+            forwarded_allow_ips="*",  # only Nginx can reach us
+        )
+    finally:
+        if publisher is not None and not settings.CATALOG_SNAPSHOT_PATH:
+            publisher.remove()
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,534 @@
 import httpx
+import asyncio
 import json
+import re
+import time
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from typing import AsyncIterator, Optional
+from rapidfuzz import fuzz, process
+from tenacity import retry, stop_after_attempt, stop_after_delay, wait_exponential
 from app.core.config import settings
+from app.common.cache import TTLCache
+from app.common.circuit_breaker import CLOSED, HALF_OPEN, AdaptiveTimeout, CircuitBreaker, CircuitOpen
+from app.common.singleflight import SingleFlight
+from app.core.metrics import counter, histogram
+from app.core.tracing import span
+from app.services.intent_extractor import LocalIntentExtractor
+from app.services.vendor_service import location_index, package_catalog
 
 # 1. SETUP LOGGING
 logger = logging.getLogger(__name__)
 
-class AIService:
+CACHEABLE_INTENTS = ("planning", "chat")
+
+# 📊 Metrics
+LANGFLOW_CALL_SECONDS = histogram(
+    "occacia_langflow_call_seconds",
+    "Langflow HTTP call latency per attempt (queueing for an in-flight slot included).",
+    ("mode", "outcome"),
+)
+LANGFLOW_RETRIES = counter("occacia_langflow_retries_total", "Langflow attempts retried by tenacity.")
+LOCAL_INTENT_ANSWERS = counter(
+    "occacia_local_intent_total",
+    "Planning answers from the local extractor (fast_path: Langflow skipped, fallback: Langflow down).",
+    ("outcome",),
+)
+
+def _count_retry(retry_state):
+    LANGFLOW_RETRIES.inc()
+    logger.warning(f"🔁 Langflow attempt {retry_state.attempt_number} failed, retrying...")
+
+def _should_retry(retry_state) -> bool:
+    # Retry 5xx/4xx answers, but never into an open breaker (the next attempt would be refused)
+    if not retry_state.outcome.failed or not isinstance(retry_state.outcome.exception(), httpx.HTTPStatusError):
+        return False
+    breaker = retry_state.args[0].breaker
+    return breaker is None or breaker.state == CLOSED
+
+# Safe failure mode: what callers get when Langflow answers with something that isn't our JSON
+PARSE_ERROR_RESPONSE = {
+    "intent": "chat",
+    "reasoning": "AI returned unstructured data.",
+    "chat_response": "I'm having trouble formatting my thoughts. Can you try again?"
+}
+
+# Fail-fast answer while the circuit breaker is open (never cached)
+SERVICE_UNAVAILABLE_RESPONSE = {
+    "intent": "chat",
+    "reasoning": "AI service is temporarily unavailable.",
+    "chat_response": "I'm a little overwhelmed right now. Please try again in a minute.",
+    "missing_info": ["SERVICE_UNAVAILABLE"],
+}
+
+def normalize_query(raw_query: str) -> str:
+    """'Romantic dinner in kandy!' -> 'romantic dinner in kandy'"""
+    cleaned = re.sub(r"[^\w\s]", " ", (raw_query or "").lower())
+    return " ".join(cleaned.split())
+
+class ResponseCache(TTLCache):
+    """
+    LRU + TTL cache of parsed Langflow answers, keyed on the normalized query.
+    With a fuzzy threshold set, a miss falls back to the closest live cached query
+    (RapidFuzz) so "romantic dinner in kandy" also serves "romantic dinner kandy".
+    Numbers must match exactly: "party for 2" never serves "party for 20".
+    """
+    _NUMBERS = re.compile(r"\d+")
+
+    def __init__(self, max_entries: int, ttl: float, fuzzy_threshold: float = 0.0):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.fuzzy_threshold = fuzzy_threshold
+        self.fuzzy_hits = 0
+
+    def lookup(self, raw_query: str) -> Optional[dict]:
+        key = normalize_query(raw_query)
+        value = self._take(key)
+        if value is None and self.fuzzy_threshold > 0 and len(self):
+            numbers = self._NUMBERS.findall(key)
+            # _peek drops expired entries, so only live ones are candidates
+            candidates = [k for k in self.keys() if self._NUMBERS.findall(k) == numbers and self._peek(k) is not None]
+            best = process.extractOne(key, candidates, scorer=fuzz.ratio, score_cutoff=self.fuzzy_threshold)
+            if best is not None:
+                value = self._take(best[0])
+                if value is not None:
+                    self.fuzzy_hits += 1
+
+        # Counted once per lookup, on what it actually returned
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _take(self, key) -> Optional[dict]:
+        """Like get(), without touching the hit/miss counters."""
+        entry = self._peek(key)
+        if entry is None:
+            return None
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def store(self, raw_query: str, result: dict):
+        # 🛡️ Only well-formed answers are worth remembering
+        if not isinstance(result, dict) or result.get("intent") not in CACHEABLE_INTENTS:
+            return
+        self.set(normalize_query(raw_query), result)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["fuzzy_hits"] = self.fuzzy_hits
+        return stats
+
+class ChatResponseTap:
+    """
+    Watches the raw JSON text as Langflow streams it and hands back, piece by piece,
+    the decoded characters of the "chat_response" string value.
+    Raises ValueError on an escape that isn't valid JSON.
+    """
+    _START = re.compile(r'"chat_response"\s*:\s*"')
+    _HEX4 = re.compile(r"[0-9a-fA-F]{4}")
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
     def __init__(self):
+        self.buffer = ""
+        self.pos = None    # index of the next undecoded char inside the string value
+        self.done = False
+        self.failed = False  # hit an invalid escape: what was handed back so far can't be trusted
+
+    def feed(self, chunk: str) -> str:
+        self.buffer += chunk
+        if self.done:
+            return ""
+        if self.pos is None:
+            match = self._START.search(self.buffer)
+            if match is None:
+                return ""
+            self.pos = match.end()
+
+        out = []
+        buf, i = self.buffer, self.pos
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                i += 1
+                break
+            if ch != "\\":
+                out.append(ch)
+                i += 1
+                continue
+            # Escape sequence: wait for the rest of it if it was split across chunks
+            if i + 1 >= len(buf):
+                break
+            if buf[i + 1] == "u":
+                decoded = self._unicode_escape(buf, i)
+                if decoded is None:
+                    break
+                char, i = decoded
+                out.append(char)
+            else:
+                out.append(self._ESCAPES.get(buf[i + 1], buf[i + 1]))
+                i += 2
+        self.pos = i
+        return "".join(out)
+
+    def _unicode_escape(self, buf: str, i: int) -> Optional[tuple]:
+        """(char, next index) for the \\uXXXX at `i`, or None until the rest of it arrives."""
+        code = self._hex(buf, i)
+        if code is None:
+            return None
+        if not 0xD800 <= code <= 0xDFFF:
+            return chr(code), i + 6
+        # Characters outside the BMP arrive as a surrogate pair: "\\ud83d\\ude00"
+        if code <= 0xDBFF:
+            if len(buf) < i + 8:
+                return None
+            if buf[i + 6:i + 8] == "\\u":
+                low = self._hex(buf, i + 6)
+                if low is None:
+                    return None
+                if 0xDC00 <= low <= 0xDFFF:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), i + 12
+        # A lone surrogate can't be encoded as UTF-8 (the SSE line would fail to serialize)
+        return "\ufffd", i + 6
+
+    def _hex(self, buf: str, i: int) -> Optional[int]:
+        if i + 6 > len(buf):
+            return None
+        digits = buf[i + 2:i + 6]
+        if not self._HEX4.fullmatch(digits):
+            self.failed = True
+            raise ValueError(f"Invalid \\u escape in chat_response: \\u{digits}")
+        return int(digits, 16)
+
+class AIService:
+    def __init__(self, local_intent: Optional[LocalIntentExtractor] = None):
         self.base_url = settings.LANGFLOW_URL
         self.token = settings.LANGFLOW_TOKEN
         self.org_id = settings.LANGFLOW_ORG_ID
 
+        self.cache = ResponseCache(
+            max_entries=settings.AI_CACHE_MAX_ENTRIES,
+            ttl=settings.AI_CACHE_TTL_SECONDS,
+            fuzzy_threshold=settings.AI_CACHE_FUZZY_THRESHOLD,
+        ) if settings.AI_CACHE_ENABLED else None
+
+        # 🔌 Shared HTTP client + in-flight cap (created in startup())
+        self._client: Optional[httpx.AsyncClient] = None
+        self._in_flight = asyncio.Semaphore(settings.LANGFLOW_MAX_IN_FLIGHT)
+
+        # 🔗 Identical queries asked at the same time share one Langflow call
+        self.single_flight = SingleFlight("langflow")
+
+        # 🔌 Stop calling a failing/slow Langflow for a while instead of queueing behind it
+        self.breaker = CircuitBreaker(
+            "langflow",
+            window=settings.LANGFLOW_BREAKER_WINDOW,
+            min_calls=settings.LANGFLOW_BREAKER_MIN_CALLS,
+            failure_rate=settings.LANGFLOW_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.LANGFLOW_BREAKER_SLOW_SECONDS,
+            slow_call_rate=settings.LANGFLOW_BREAKER_SLOW_RATE,
+            open_seconds=settings.LANGFLOW_BREAKER_OPEN_SECONDS,
+            half_open_probes=settings.LANGFLOW_BREAKER_HALF_OPEN_PROBES,
+        ) if settings.LANGFLOW_BREAKER_ENABLED else None
+        # ⏱️ Per-call timeout that follows Langflow's recent latency
+        self.timeout = AdaptiveTimeout(
+            minimum=settings.LANGFLOW_TIMEOUT_MIN_SECONDS,
+            maximum=settings.LANGFLOW_TIMEOUT_SECONDS,
+            percentile=settings.LANGFLOW_TIMEOUT_PERCENTILE,
+            multiplier=settings.LANGFLOW_TIMEOUT_MULTIPLIER,
+        )
+
+        # 🏃 Answers simple queries in-process, and stands in for Langflow when it is down
+        self.local_intent = local_intent
+
         # Initialization check
         if not self.token:
             logger.critical("🚨 CRITICAL: LANGFLOW_TOKEN is missing from Settings!")
         else:
             logger.info("🔧 AI Service initialized with secure credentials.")
 
+    async def startup(self):
+        """Opens the pooled Langflow client. Called once per worker on app startup."""
+        if self._client is not None:
+            return
+
+        http2 = settings.LANGFLOW_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("⚠️ LANGFLOW_HTTP2 is set but 'h2' is not installed. Falling back to HTTP/1.1.")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(settings.LANGFLOW_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.LANGFLOW_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LANGFLOW_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LANGFLOW_KEEPALIVE_EXPIRY,
+            ),
+            headers={
+                "Authorization": f"Bearer {self.token}",
+                "Content-Type": "application/json",
+                "X-DataStax-Current-Org": self.org_id
+            },
+        )
+        logger.info(f"🔌 Langflow client pool ready (http2={http2}, max_in_flight={settings.LANGFLOW_MAX_IN_FLIGHT}).")
+
+    async def shutdown(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("🔌 Langflow client pool closed.")
+
+    async def generate_date_plan(self, raw_query: str):
+        if self.cache is not None:
+            cached = self.cache.lookup(raw_query)
+            if cached is not None:
+                logger.info(f"⚡ AI cache hit: {raw_query}")
+                # Copy so callers can't mutate the cached answer
+                return dict(cached)
+
+        local = self._local_answer(raw_query, settings.LOCAL_INTENT_MIN_CONFIDENCE)
+        if local is not None:
+            LOCAL_INTENT_ANSWERS.inc("fast_path")
+            return local
+
+        shared = await self.single_flight.do(
+            normalize_query(raw_query), lambda: self._generate_uncached(raw_query)
+        )
+        # Every coalesced caller gets its own copy of the shared answer
+        return dict(shared)
+
+    async def _generate_uncached(self, raw_query: str) -> dict:
+        try:
+            parsed_data = await self._ask_langflow(raw_query)
+        except CircuitOpen:
+            logger.warning(f"🔌 Langflow circuit open, failing fast: {raw_query}")
+            return self._unavailable(raw_query)
+        except Exception:
+            # Retries used up: a local answer beats an error, otherwise let the caller handle it
+            fallback = self._local_answer(raw_query, settings.LOCAL_INTENT_FALLBACK_CONFIDENCE)
+            if fallback is None:
+                raise
+            LOCAL_INTENT_ANSWERS.inc("fallback")
+            logger.warning(f"🏃 Langflow failed, answered locally: {raw_query}")
+            return fallback
+        if parsed_data is None:
+            return dict(PARSE_ERROR_RESPONSE)
+
+        if self.cache is not None:
+            self.cache.store(raw_query, parsed_data)
+        return parsed_data
+
+    async def stream_date_plan(self, raw_query: str) -> AsyncIterator[tuple]:
+        """
+        Yields ("token", text) while the chat_response streams in, then ("analysis", dict).
+        Cache hits, LANGFLOW_STREAMING=False and stream failures all end up with a single
+        ("analysis", ...) event from the regular request path.
+        """
+        if not settings.LANGFLOW_STREAMING:
+            yield "analysis", await self.generate_date_plan(raw_query)
+            return
+
+        cached = self.cache.lookup(raw_query) if self.cache is not None else None
+        if cached is not None:
+            yield "analysis", dict(cached)
+            return
+
+        local = self._local_answer(raw_query, settings.LOCAL_INTENT_MIN_CONFIDENCE)
+        if local is not None:
+            LOCAL_INTENT_ANSWERS.inc("fast_path")
+            yield "analysis", local
+            return
+
+        if self._client is None:
+            await self.startup()
+
+        if not self._admit():
+            yield "analysis", self._unavailable(raw_query)
+            return
+
+        tap = ChatResponseTap()
+        final = None
+        streamed_any = False
+        started = time.perf_counter()
+        call_started, ok = None, None
+        try:
+            async with self._in_flight:
+                call_started = time.perf_counter()
+                logger.info(f"🧠 Streaming from Langflow: {raw_query}")
+                async with self._client.stream("POST", self.base_url, params={"stream": "true"}, json=self._payload(raw_query)) as response:
+                    response.raise_for_status()
+                    # Langflow streams one JSON event per line: {"event": "token"|"end"|..., "data": {...}}
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        event = json.loads(line)
+                        if event.get("event") == "token":
+                            text = tap.feed(event.get("data", {}).get("chunk", ""))
+                            if text:
+                                streamed_any = True
+                                yield "token", text
+                        elif event.get("event") == "end":
+                            final = event.get("data", {}).get("result")
+            ok = True
+            LANGFLOW_CALL_SECONDS.observe(time.perf_counter() - started, "stream", "ok")
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError: an event line that isn't JSON, or a bad escape inside chat_response
+            ok = False
+            LANGFLOW_CALL_SECONDS.observe(time.perf_counter() - started, "stream", "error")
+            logger.warning(f"⚠️ Langflow stream failed ({e}).")
+        finally:
+            # Streams run as long as the generation does: they feed the breaker, not the timeout
+            self._settle(ok, call_started, learn_timeout=False)
+
+        # The streamed text can't be trusted past a bad escape: ask again without streaming
+        if not ok and (tap.failed or not streamed_any):
+            yield "analysis", await self.generate_date_plan(raw_query)
+            return
+
+        # The "end" event carries the full result; the streamed text is the backup
+        parsed_data = self._parse_output(final) if final is not None else None
+        if parsed_data is None:
+            parsed_data = self._parse_text(tap.buffer)
+        if parsed_data is None:
+            yield "analysis", dict(PARSE_ERROR_RESPONSE)
+            return
+
+        if self.cache is not None:
+            self.cache.store(raw_query, parsed_data)
+        yield "analysis", parsed_data
+
+    # ==========================================
+    # 🏃 LOCAL EXTRACTION
+    # ==========================================
+    def _local_answer(self, raw_query: str, min_confidence: float) -> Optional[dict]:
+        """The local extractor's planning answer, if it is at least `min_confidence` sure."""
+        if self.local_intent is None:
+            return None
+        analysis, confidence = self.local_intent.extract(raw_query)
+        if analysis["intent"] != "planning" or confidence < min_confidence:
+            return None
+        return analysis
+
+    def _unavailable(self, raw_query: str) -> dict:
+        """Breaker open: the local answer when there is a usable one, else SERVICE_UNAVAILABLE."""
+        fallback = self._local_answer(raw_query, settings.LOCAL_INTENT_FALLBACK_CONFIDENCE)
+        if fallback is None:
+            return dict(SERVICE_UNAVAILABLE_RESPONSE)
+        LOCAL_INTENT_ANSWERS.inc("fallback")
+        return fallback
+
+    # ==========================================
+    # 🔌 CIRCUIT BREAKER / ADAPTIVE TIMEOUT
+    # ==========================================
+    def _admit(self) -> bool:
+        return self.breaker is None or self.breaker.allow()
+
+    def _call_timeout(self) -> float:
+        # Half-open probes get the full allowance: latency may have moved since the samples
+        if self.breaker is not None and self.breaker.state == HALF_OPEN:
+            return self.timeout.maximum
+        return self.timeout.current()
+
+    def _settle(self, ok: Optional[bool], call_started: Optional[float], learn_timeout: bool = True,
+                timed_out: bool = False):
+        """Reports an admitted call's outcome (ok=None: cancelled, no verdict on Langflow)."""
+        seconds = time.perf_counter() - call_started if call_started is not None else 0.0
+        # A timed-out call took at least `seconds`: sampling it lets the timeout grow again
+        if learn_timeout and (ok or timed_out):
+            self.timeout.observe(seconds)
+        if self.breaker is None:
+            return
+        if ok is None:
+            self.breaker.release()
+            return
+        was_probe = self.breaker.state == HALF_OPEN
+        self.breaker.record(ok, seconds)
+        if was_probe and self.breaker.state == CLOSED:
+            # Recovered: learn the latency Langflow has now, not the one before the outage
+            self.timeout.reset()
+
     @retry(
-        stop=stop_after_attempt(3),
+        stop=stop_after_attempt(3) | stop_after_delay(settings.LANGFLOW_RETRY_BUDGET_SECONDS),
         wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(httpx.HTTPStatusError)
+        retry=_should_retry,
+        before_sleep=_count_retry,
     )
-    async def generate_date_plan(self, raw_query: str):
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json",
-            "X-DataStax-Current-Org": self.org_id
-        }
-        
-        payload = {
+    async def _ask_langflow(self, raw_query: str) -> Optional[dict]:
+        """Returns the parsed JSON from Langflow, or None if it was not valid JSON."""
+        if self._client is None:
+            # Callers outside the app lifecycle (scripts, tests) open the pool lazily
+            await self.startup()
+
+        if not self._admit():
+            raise CircuitOpen()
+
+        started = time.perf_counter()
+        outcome = "error"
+        call_started, ok, timed_out = None, None, False
+        try:
+            # 🚦 Bursts queue here instead of piling onto Langflow
+            with span("langflow"):  # one span per attempt, so retries show up
+                async with self._in_flight:
+                    # Time spent queueing above is ours, not Langflow's: measure from here
+                    call_started = time.perf_counter()
+                    logger.info(f"🧠 Sending to Langflow: {raw_query}")
+                    response = await self._client.post(
+                        self.base_url, json=self._payload(raw_query), timeout=self._call_timeout()
+                    )
+            outcome = "ok" if response.is_success else f"http_{response.status_code // 100}xx"
+            # 4xx is about our request, not Langflow's health (429 = it is shedding load)
+            ok = response.status_code < 500 and response.status_code != 429
+        except httpx.TimeoutException:
+            ok, timed_out = False, True
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            LANGFLOW_CALL_SECONDS.observe(time.perf_counter() - started, "request", outcome)
+            self._settle(ok, call_started, timed_out=timed_out)
+
+        response.raise_for_status()
+        return self._parse_output(response.json())
+
+    @staticmethod
+    def _payload(raw_query: str) -> dict:
+        return {
             "input_value": raw_query,
             "inputType": "chat",
             "outputType": "chat",
             "tweaks": {}
         }
 
-        async with httpx.AsyncClient() as client:
-            logger.info(f"🧠 Sending to Langflow: {raw_query}")
-            
-            response = await client.post(self.base_url, json=payload, headers=headers, timeout=45.0)
-            response.raise_for_status()
-            
-            data = response.json()
-            try:
-                # Extracting text from Langflow nested structure
-                outputs = data["outputs"][0]["outputs"][0]["results"]["message"]["text"]
-                
-                # Clean up markdown
-                clean_json = outputs.replace("```json", "").replace("```", "").strip()
-                parsed_data = json.loads(clean_json)
-                
-                logger.info("✅ Received Valid JSON from Langflow")
-                return parsed_data
-                
-            except Exception as e:
-                # Safe failure mode
-                error_snippet = str(outputs)[:100] if 'outputs' in locals() else "No output"
-                logger.error(f"⚠️ JSON Parse Error: {e}. Raw Output Start: {error_snippet}...")
-                
-                return {
-                    "intent": "chat",
-                    "reasoning": "AI returned unstructured data.",
-                    "chat_response": "I'm having trouble formatting my thoughts. Can you try again?"
-                }
-
-ai_service = AIService()
\ No newline at end of file
+    def _parse_output(self, data) -> Optional[dict]:
+        try:
+            # Extracting text from Langflow nested structure
+            outputs = data["outputs"][0]["outputs"][0]["results"]["message"]["text"]
+        except Exception as e:
+            logger.error(f"⚠️ JSON Parse Error: {e}. Raw Output Start: No output...")
+            return None
+        return self._parse_text(outputs)
+
+    def _parse_text(self, outputs: str) -> Optional[dict]:
+        try:
+            # Clean up markdown
+            clean_json = outputs.replace("```json", "").replace("```", "").strip()
+            parsed_data = json.loads(clean_json)
+            if not isinstance(parsed_data, dict):
+                raise ValueError("Top-level JSON is not an object")
+
+            logger.info("✅ Received Valid JSON from Langflow")
+            return parsed_data
+
+        except Exception as e:
+            # Safe failure mode
+            logger.error(f"⚠️ JSON Parse Error: {e}. Raw Output Start: {str(outputs)[:100]}...")
+            return None
+
+ai_service = AIService(
+    local_intent=LocalIntentExtractor(location_index, package_catalog) if settings.LOCAL_INTENT_ENABLED else None
+)
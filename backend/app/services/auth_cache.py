@@ -0,0 +1,62 @@
+import threading
+import time
+from typing import Optional
+from app.common.cache import TTLCache
+from app.schemas.vendor_schema import VendorResponse
+
+class VendorAuthCache:
+    """
+    Two small caches in front of `get_current_vendor`:
+      - token -> email   (skips the JWT decode; never outlives the token's own `exp`)
+      - email -> vendor  (a detached VendorResponse; skips the Postgres lookup)
+
+    Vendor entries are dropped as soon as this worker writes to that vendor
+    (see the SQLAlchemy events in vendor_service). Other workers catch up within `ttl`.
+    A lock guards both caches because invalidation runs wherever the flush runs
+    (threadpool); lookups never wait on I/O while holding it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.ttl = ttl
+        self.tokens = TTLCache(max_entries=max_entries, ttl=ttl)
+        self.vendors = TTLCache(max_entries=max_entries, ttl=ttl)
+        self._lock = threading.Lock()
+        # Bumped on every invalidation: a DB read that raced with a write is not cached
+        self.generation = 0
+
+    def email_for_token(self, token: str) -> Optional[str]:
+        with self._lock:
+            return self.tokens.get(token)
+
+    def remember_token(self, token: str, email: str, expires_at: Optional[float] = None):
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+            if ttl <= 0:
+                return
+        with self._lock:
+            self.tokens.set(token, email, ttl=ttl)
+
+    def vendor(self, email: str) -> Optional[VendorResponse]:
+        with self._lock:
+            return self.vendors.get(email)
+
+    def remember_vendor(self, vendor, generation: int):
+        snapshot = VendorResponse.model_validate(vendor)
+        with self._lock:
+            if generation == self.generation:
+                self.vendors.set(snapshot.email, snapshot)
+        return snapshot
+
+    def invalidate(self, *emails: str):
+        with self._lock:
+            self.generation += 1
+            for email in emails:
+                if email:
+                    self.vendors.pop(email)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.tokens.clear()
+            self.vendors.clear()
@@ -0,0 +1,98 @@
+"""
+📣 CATALOG CHANGE EVENTS
+
+Every package write bumps `catalog_version` and queues a NOTIFY in the same
+transaction: Postgres delivers it on COMMIT (never on rollback), and the row lock
+on catalog_version makes versions arrive in commit order.
+
+Each worker holds one LISTEN connection (`listen_for_catalog_changes`) and patches
+its own catalog snapshot from the payload, so matching keeps serving from memory
+without waiting for the next version poll. The poll (run_refresh_loop) stays on as
+the safety net for anything a dropped connection missed.
+
+    payload: {"version": 42, "package_ids": [7]}      one or more packages written
+             {"version": 43, "package_ids": null}     bulk change: reload everything
+"""
+import asyncio
+import json
+import logging
+from typing import Optional, Union
+from sqlalchemy import Connection, text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.package_catalog import PackageCatalog
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+BUMP_VERSION_SQL = text(
+    "INSERT INTO catalog_version (id, version) VALUES (1, 1) "
+    "ON CONFLICT (id) DO UPDATE SET version = catalog_version.version + 1 "
+    "RETURNING version"
+)
+
+# ==========================================
+# 📤 PUBLISH (inside the writing transaction)
+# ==========================================
+def publish_catalog_change(db: Union[Session, Connection], package_ids: Optional[list]) -> int:
+    """
+    Bumps the catalog version and queues the NOTIFY; the caller commits. Returns the
+    new version. package_ids=None tells workers to reload everything (bulk changes).
+    """
+    version = db.execute(BUMP_VERSION_SQL).scalar_one()
+    payload = json.dumps({"version": version, "package_ids": package_ids})
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": settings.CATALOG_NOTIFY_CHANNEL, "payload": payload})
+    return version
+
+def parse_change(payload: str) -> Optional[tuple]:
+    """(version, package ids or None), or None for a payload we don't understand."""
+    try:
+        change = json.loads(payload)
+        ids = change.get("package_ids")
+        return int(change["version"]), None if ids is None else [int(i) for i in ids]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        logger.warning(f"⚠️ Ignoring malformed catalog notification: {payload[:100]}")
+        return None
+
+# ==========================================
+# 📥 LISTEN (one connection per worker)
+# ==========================================
+async def listen_for_catalog_changes(catalog: PackageCatalog, session_factory, dsn: str,
+                                     channel: str, reconnect_seconds: float = 5.0):
+    """Background task: applies NOTIFY'd package writes to `catalog` until cancelled."""
+    import asyncpg
+
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(dsn)
+            queue: asyncio.Queue = asyncio.Queue()
+            await conn.add_listener(channel, lambda _conn, _pid, _channel, payload: queue.put_nowait(payload))
+            # A None in the queue means the connection died: reconnect and catch up
+            conn.add_termination_listener(lambda _conn: queue.put_nowait(None))
+            logger.info(f"📣 Listening for catalog changes on '{channel}'.")
+            # Writes committed before LISTEN took effect were never sent to us
+            await asyncio.to_thread(catalog.catch_up, session_factory)
+
+            while True:
+                payloads = [await queue.get()]
+                # Coalesce a burst of writes into one snapshot rebuild
+                while not queue.empty():
+                    payloads.append(queue.get_nowait())
+                if None in payloads:
+                    raise ConnectionError("LISTEN connection closed")
+                changes = [c for c in map(parse_change, payloads) if c is not None]
+                if changes:
+                    await asyncio.to_thread(catalog.apply_changes, session_factory, changes)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Catalog listener: {e}. Reconnecting in {reconnect_seconds:.0f}s.")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(reconnect_seconds)
+
+def listener_dsn(url) -> str:
+    """asyncpg DSN for a SQLAlchemy URL (postgresql+asyncpg://... -> postgresql://...)."""
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
@@ -0,0 +1,121 @@
+import base64
+import binascii
+from typing import Optional
+from sqlalchemy import and_, func, literal_column, or_, select, tuple_
+from app.models.marketplace import Location, Vendor, Package
+from app.services.location_index import Place, within_km_sql
+from app.services.match_scoring import score_expression
+from app.services.package_catalog import normalize_tags
+
+# =========================================================
+# 📚 CATALOG BROWSE (keyset pagination)
+# Pages are "rows after the last one you saw", never OFFSET: page 500 reads
+# the same handful of index entries as page 1.
+# =========================================================
+
+# Effective price, unknown prices last. Must stay identical to the expression
+# of ix_packages_browse_price (migration 0004) or Postgres won't use the index.
+BROWSE_PRICE = func.coalesce(
+    Package.price_per_head, Package.price, literal_column("'Infinity'::double precision")
+)
+
+BROWSE_COLUMNS = (
+    Package.id, Package.vendor_id, Package.name, Package.description, Package.price,
+    Package.price_per_head, Package.min_guests, Package.max_guests, Package.tags,
+    Vendor.location_base.label("location"),
+)
+
+class InvalidCursor(ValueError):
+    """The cursor wasn't issued by this endpoint (or was issued for another sort)."""
+
+def encode_cursor(sort: str, key: float, package_id: int) -> str:
+    # repr() round-trips floats exactly (and spells Infinity "inf"), so equal keys stay equal
+    raw = f"{sort}:{key!r}:{package_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        cursor_sort, key, package_id = raw.split(":")
+        key, package_id = float(key), int(package_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Malformed cursor.")
+    if cursor_sort != sort:
+        raise InvalidCursor(f"Cursor belongs to sort={cursor_sort}, not sort={sort}.")
+    return key, package_id
+
+def browse_filters(location: Optional[str], tags: list, min_price: Optional[float],
+                   max_price: Optional[float], guests: Optional[int],
+                   place: Optional[Place] = None, radius_km: Optional[float] = None) -> dict:
+    """`place` is `location` resolved by the location index (None: fall back to ILIKE)."""
+    return {
+        "location": location or None,
+        "place": place,
+        "radius_km": radius_km or 0,
+        "tags": normalize_tags(tags),
+        "min_price": min_price,
+        "max_price": max_price,
+        "guests": guests or 0,
+    }
+
+def build_browse_query(filters: dict, sort: str = "price", cursor: Optional[str] = None, limit: int = 20):
+    """
+    One page of packages. Fetches `limit + 1` rows: the extra one only says whether
+    there is a next page. Raises InvalidCursor for a bad cursor.
+    """
+    query = select(*BROWSE_COLUMNS).join(Vendor)
+
+    place = filters.get("place")
+    if place is not None and filters["radius_km"]:
+        # Places within the radius: bounding-box range scan on locations, then haversine
+        nearby = select(Location.id).where(within_km_sql(place.latitude, place.longitude, filters["radius_km"]))
+        query = query.where(Vendor.location_id.in_(nearby))
+    elif place is not None:
+        query = query.where(Vendor.location_id == place.id)
+    elif filters["location"]:
+        query = query.where(Vendor.location_base.ilike(f"%{filters['location']}%"))
+    if filters["tags"]:
+        query = query.where(Package.tags.overlap(filters["tags"]))
+    if filters["min_price"] is not None:
+        query = query.where(BROWSE_PRICE >= filters["min_price"])
+    if filters["max_price"] is not None:
+        query = query.where(BROWSE_PRICE <= filters["max_price"])
+    if filters["guests"]:
+        guests = filters["guests"]
+        query = query.where(
+            func.coalesce(Package.min_guests, 0) <= guests,
+            func.coalesce(Package.max_guests, guests) >= guests,
+        )
+
+    if sort == "price":
+        key = BROWSE_PRICE.label("sort_key")
+        if cursor:
+            # Row comparison (price, id) > (:price, :id): one range scan on the composite index
+            query = query.where(tuple_(BROWSE_PRICE, Package.id) > tuple_(*decode_cursor(cursor, sort)))
+        query = query.order_by(BROWSE_PRICE, Package.id)
+    else:
+        # Same scoring as /planning/generate; max_price doubles as the per-head budget
+        score = score_expression({
+            "tags": filters["tags"], "budget_per_head": filters["max_price"] or 0, "guest_count": filters["guests"],
+        }).element
+        key = score.label("sort_key")
+        if cursor:
+            last_score, last_id = decode_cursor(cursor, sort)
+            query = query.where(or_(score < last_score, and_(score == last_score, Package.id > last_id)))
+        query = query.order_by(score.desc(), Package.id)
+
+    return query.add_columns(key).limit(limit + 1)
+
+def page_of(rows: list, sort: str, limit: int) -> dict:
+    """{"items": [...], "next_cursor": str | None} from the rows of `build_browse_query`."""
+    items = []
+    for row in rows[:limit]:
+        item = row._asdict()
+        del item["sort_key"]
+        item["tags"] = list(item["tags"] or [])
+        items.append(item)
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(sort, last.sort_key, last.id)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,286 @@
+"""
+🏃 LOCAL INTENT EXTRACTION
+
+Most planning queries are a handful of facts: "cheap birthday party in Colombo
+for 20". `LocalIntentExtractor` pulls those out in-process (keyword/regex rules,
+RapidFuzz against the location index and the catalog's tags) and says how sure
+it is. The dict it builds has the shape Langflow answers with, so everything
+downstream (matching, PlanResponse) takes it as is.
+
+    analysis, confidence = extractor.extract("cheap birthday party in Colombo for 20")
+
+Confidence is the share of the usual planning facts found (place, event/tags,
+guests, budget) scaled by how much of the query those facts explain, so free-form
+wishes ("somewhere she'd love, she reads a lot") stay low and go to Langflow.
+"""
+import logging
+import re
+from typing import Optional
+from rapidfuzz import fuzz, process
+from app.services.location_index import LocationIndex
+from app.services.package_catalog import PackageCatalog, normalize_key
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+# Word -> event_type (and the tags that event implies, kept only if the catalog has them)
+EVENT_WORDS = {
+    "birthday": ("birthday", ["party"]), "bday": ("birthday", ["party"]),
+    "wedding": ("wedding", ["luxury"]), "anniversary": ("anniversary", ["romantic"]),
+    "proposal": ("proposal", ["romantic"]), "propose": ("proposal", ["romantic"]),
+    "date": ("date", ["romantic"]), "dinner": ("dinner", []), "lunch": ("lunch", []),
+    "party": ("party", ["party"]), "reunion": ("reunion", ["party"]),
+    "graduation": ("graduation", ["party"]), "picnic": ("picnic", ["outdoor"]),
+    "meeting": ("corporate", ["wifi"]), "conference": ("corporate", ["wifi"]),
+    "corporate": ("corporate", ["wifi"]), "office": ("corporate", []),
+}
+
+# Budget words -> BUDGET_BUCKETS label (vendor_service)
+BUDGET_WORDS = {
+    "cheap": "Cheap", "affordable": "Cheap", "inexpensive": "Cheap", "budget": "Cheap", "low cost": "Cheap",
+    "moderate": "Moderate", "mid range": "Moderate", "midrange": "Moderate", "reasonable": "Moderate",
+    "luxury": "Luxury", "luxurious": "Luxury", "premium": "Luxury", "fancy": "Luxury", "upscale": "Luxury",
+}
+
+# "not cheap", "no fancy places", "don't want anything premium": the next words are ruled out
+NEGATIONS = frozenset(("not", "no", "dont", "never", "without", "nothing", "isnt", "arent"))
+NEGATION_REACH = 3  # words after a negation it can apply to (never past a comma or full stop)
+CLAUSE_BREAK = re.compile(r"[.,](?!\d)")  # not the comma in "3,000"
+# Rules can't tell what a negation rules out everywhere, so a query with one never
+# clears LOCAL_INTENT_MIN_CONFIDENCE: Langflow reads it (the local answer stays a fallback)
+NEGATED_CONFIDENCE_CAP = 0.5
+
+# Used when no catalog snapshot is loaded (same vocabulary as the seeded packages)
+DEFAULT_TAGS = ("romantic", "quiet", "outdoor", "party", "family", "luxury", "budget", "wifi", "garden", "rooftop")
+
+# Spelled-out synonyms the tag matcher can't reach by edit distance
+TAG_SYNONYMS = {
+    "romance": "romantic", "intimate": "romantic", "peaceful": "quiet", "calm": "quiet",
+    "outside": "outdoor", "open air": "outdoor", "kids": "family", "children": "family",
+    "terrace": "rooftop", "internet": "wifi",
+}
+
+NUMBER_WORDS = {
+    "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9,
+    "ten": 10, "twelve": 12, "fifteen": 15, "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "hundred": 100,
+}
+COUPLE_WORDS = ("couple", "two of us", "just us", "me and my")
+
+# Words that carry no planning meaning: they neither count for nor against coverage
+STOPWORDS = frozenset(
+    "a an the in at on near around for to of with and or my our me we us i im id "
+    "want need looking find book plan organize organise arrange some somewhere place places "
+    "venue venues spot please can you good nice best great this next weekend tonight "
+    "under below less than max maximum upto up about per head each person pp rs lkr rupees".split()
+)
+
+# "5k", "5 lakhs", "2.5 mn", "rs 2.5 million": the word after the number scales it
+MULTIPLIERS = {
+    "k": 1_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+    "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000,
+}
+_MULTIPLIER = "|".join(sorted(MULTIPLIERS, key=len, reverse=True))
+_AMOUNT = rf"(\d[\d,]*(?:\.\d+)?)\s*(?:({_MULTIPLIER})\b)?"
+NUMBER_TOKEN = re.compile(rf"\d[\d,]*(?:\.\d+)?(?:{_MULTIPLIER})?")
+# "for 2 nights" is how long, not how many
+DURATION_UNITS = ("night", "nights", "day", "days", "hour", "hours", "hrs", "week", "weeks", "month", "months")
+_CURRENCY = r"(?:rs\.?|lkr|rupees)"
+AMOUNT_PATTERNS = (
+    # "rs 3000", "lkr 5k", "3000 rs", "under 5000", "budget of 4k"
+    re.compile(rf"{_CURRENCY}\s*{_AMOUNT}"),
+    re.compile(rf"{_AMOUNT}\s*{_CURRENCY}\b"),
+    re.compile(rf"(?:under|below|less than|max(?:imum)?|up ?to|budget of|budget)\s*{_CURRENCY}?\s*{_AMOUNT}"),
+)
+PER_HEAD = re.compile(r"^\s*(?:per head|per person|a head|each|pp|/\s*head|per pax)\b")
+GUEST_PATTERNS = (
+    re.compile(r"\b(\d{1,4})\s*(?:people|persons|guests|pax|ppl|adults|friends|of us|heads)\b"),
+    re.compile(r"\b(?:for|party of|group of|table for|team of)\s+(\d{1,4})\b"),
+)
+# What may follow a GUEST_PATTERNS number that makes it something else
+NOT_A_CROWD = re.compile(rf"\s*(?:(?:{_MULTIPLIER}|{'|'.join(DURATION_UNITS)})\b|{_CURRENCY}(?!\s*\d))")
+GREETING = re.compile(r"^(?:hi|hello|hey|thanks|thank you|who are you|what can you do)\b")
+
+# How much each fact counts towards confidence
+WEIGHTS = {"location": 0.3, "what": 0.35, "guests": 0.2, "budget": 0.15}
+
+class LocalIntentExtractor:
+    def __init__(self, locations: LocationIndex = None, catalog: PackageCatalog = None, tag_threshold: float = 85.0):
+        self.locations = locations
+        self.catalog = catalog
+        self.tag_threshold = tag_threshold
+        self._vocabulary_source = object()
+        self._vocabulary = ()
+
+    def tag_vocabulary(self) -> tuple:
+        """The catalog's tags (rebuilt when the snapshot changes), or DEFAULT_TAGS without one."""
+        snapshot = self.catalog.snapshot if self.catalog is not None else None
+        if snapshot is not self._vocabulary_source:
+            tags = tuple(snapshot.tag_index.keys()) if snapshot is not None else ()
+            self._vocabulary, self._vocabulary_source = tags or DEFAULT_TAGS, snapshot
+        return self._vocabulary
+
+    def extract(self, raw_query: str) -> tuple:
+        """(analysis dict in Langflow's shape, confidence 0-1)."""
+        text = " ".join(re.sub(r"[^\w\s.,/]", " ", (raw_query or "").lower()).split())
+        if not text or GREETING.match(text):
+            return self._analysis(), 0.0
+        explained = set()  # word positions some rule accounted for
+
+        budget_per_head, per_head = self._amount(text)
+        words = re.sub(r"[.,/]", " ", text).split()
+        guest_count = self._guests(text, words)
+        # Numbers belong to amounts/guest counts, never to places or tags
+        for i, word in enumerate(words):
+            if NUMBER_TOKEN.fullmatch(word) or word in MULTIPLIERS or word in NUMBER_WORDS:
+                explained.add(i)
+        if budget_per_head and guest_count and not per_head:
+            budget_per_head = round(budget_per_head / guest_count, 2)
+
+        location = None
+        if self.locations is not None and self.locations.ready:
+            found = self.locations.find_in(words)
+            if found is not None:
+                place, _, (start, end) = found
+                location = place.name
+                explained.update(range(start, end))
+
+        negated = self._negated(text)
+        budget = None
+        for i, word in enumerate(words):
+            for phrase in (" ".join(words[i:i + 2]), word):
+                if phrase in BUDGET_WORDS:
+                    # "budget 200k" states an amount, not a price bracket; "not cheap" rules one out.
+                    # The last bracket stated wins ("cheap, no wait, luxury")
+                    if not (phrase == "budget" and budget_per_head) and i not in negated:
+                        budget = BUDGET_WORDS[phrase]
+                    explained.update(range(i, i + len(phrase.split())))
+                    break
+
+        event_type, implied = None, []
+        for i, word in enumerate(words):
+            if word in EVENT_WORDS:
+                event, tags = EVENT_WORDS[word]
+                # "birthday party": the more specific word names the event
+                if event_type is None or event_type == "party":
+                    event_type = event
+                implied.extend(tags)
+                explained.add(i)
+
+        tags = self._tags(words, explained, negated)
+        vocabulary = set(self.tag_vocabulary())
+        tags.extend(t for t in implied if t in vocabulary)
+        venue_tags = list(dict.fromkeys(tags))
+        if guest_count is None and (any(p in text for p in COUPLE_WORDS) or event_type in ("date", "proposal")):
+            guest_count = 2
+
+        content = [i for i, w in enumerate(words) if w not in STOPWORDS]
+        coverage = sum(1 for i in content if i in explained) / len(content) if content else 0.0
+        found = {
+            "location": location is not None,
+            "what": bool(event_type or venue_tags),
+            "guests": guest_count is not None,
+            "budget": bool(budget or budget_per_head),
+        }
+        facts = sum(WEIGHTS[name] for name, ok in found.items() if ok)
+        confidence = round(facts * (0.5 + 0.5 * coverage), 4) if found["what"] else 0.0
+        if negated:
+            confidence = min(confidence, NEGATED_CONFIDENCE_CAP)
+
+        analysis = self._analysis(
+            intent="planning" if found["what"] or location else "chat",
+            event_type=event_type, location=location, budget=budget,
+            budget_per_head=budget_per_head or 0, guest_count=guest_count or 0,
+            venue_tags=venue_tags,
+            missing_info=[name for name in ("location", "guest_count", "budget_per_head")
+                          if not {"location": location, "guest_count": guest_count,
+                                  "budget_per_head": budget_per_head or budget}[name]],
+            confidence=confidence,
+        )
+        return analysis, confidence
+
+    def _amount(self, text: str) -> tuple:
+        """(amount or None, is it per head?)"""
+        for pattern in AMOUNT_PATTERNS:
+            match = pattern.search(text)
+            if match is None:
+                continue
+            value = float(match.group(1).replace(",", ""))
+            if match.group(2):
+                value *= MULTIPLIERS[match.group(2)]
+            return value, bool(PER_HEAD.match(text[match.end():]))
+        return None, False
+
+    @staticmethod
+    def _negated(text: str) -> set:
+        """
+        Positions (in extract's `words`) a negation applies to, clause by clause:
+        "not cheap, luxury please" rules out cheap only. "don't" arrives as "don", "t".
+        """
+        negated, offset = set(), 0
+        for clause in CLAUSE_BREAK.split(text):
+            words = re.sub(r"[.,/]", " ", clause).split()
+            for i, word in enumerate(words):
+                if word in NEGATIONS or (word == "t" and i and words[i - 1] in ("don", "isn", "aren")):
+                    negated.update(range(offset + i + 1, offset + min(i + 1 + NEGATION_REACH, len(words))))
+            offset += len(words)
+        return negated
+
+    @staticmethod
+    def _guests(text: str, words: list) -> Optional[int]:
+        for pattern in GUEST_PATTERNS:
+            for match in pattern.finditer(text):
+                # "for 5000 rs" is an amount and "for 2 nights" a stay, not a crowd
+                if not NOT_A_CROWD.match(text, match.end()):
+                    return int(match.group(1)) or None
+        for i, word in enumerate(words[:-1]):
+            if word in NUMBER_WORDS and words[i + 1] in ("people", "persons", "guests", "pax", "friends", "of"):
+                return NUMBER_WORDS[word]
+            if word == "for" and words[i + 1] in NUMBER_WORDS and " ".join(words[i + 2:i + 3]) not in DURATION_UNITS:
+                return NUMBER_WORDS[words[i + 1]]
+        return None
+
+    def _tags(self, words: list, explained: set, negated: set = frozenset()) -> list:
+        vocabulary = self.tag_vocabulary()
+        joined = {tag.replace("-", " "): tag for tag in vocabulary}
+        found = []
+        for i, word in enumerate(words):
+            if i in explained or i in negated or word in STOPWORDS:
+                continue
+            pair = " ".join(words[i:i + 2])
+            if pair in joined or pair in TAG_SYNONYMS:
+                found.append(joined.get(pair) or TAG_SYNONYMS[pair])
+                explained.update((i, i + 1))
+                continue
+            if word in TAG_SYNONYMS:
+                found.append(TAG_SYNONYMS[word])
+                explained.add(i)
+                continue
+            if len(word) < 4:
+                continue
+            hit = process.extractOne(word, vocabulary, scorer=fuzz.ratio, score_cutoff=self.tag_threshold)
+            if hit is not None:
+                found.append(normalize_key(hit[0]))
+                explained.add(i)
+        return found
+
+    @staticmethod
+    def _analysis(intent: str = "chat", confidence: float = 0.0, **fields) -> dict:
+        analysis = {
+            "intent": intent,
+            "reasoning": f"Matched locally (confidence {confidence:.2f}).",
+            "event_type": None,
+            "location": None,
+            "budget_per_head": 0,
+            "guest_count": 0,
+            "venue_tags": [],
+            "missing_info": [],
+            "chat_response": None,
+            "source": "local",
+        }
+        analysis.update(fields)
+        analysis["confidence"] = confidence
+        if intent == "planning":
+            what = (analysis["event_type"] or "venue").replace("_", " ")
+            where = f" in {analysis['location']}" if analysis["location"] else ""
+            analysis["chat_response"] = f"Here are some {what} options{where} that fit what you asked for."
+        return analysis
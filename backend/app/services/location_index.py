@@ -0,0 +1,240 @@
+"""
+📍 LOCATIONS
+
+`LocationIndex` holds the (small) locations table in memory and turns free text
+from the AI or a vendor form ("Kandy City", "Nuwara Elia", "colombo 7") into a
+location id. Each comma-separated part of the text is looked up whole (house
+numbers and postal districts dropped, then a trailing "city"/"town"): exact
+name/alias first, then fuzz.ratio against every alias, so misspellings resolve
+but "Wellawatte" never matches the "ella" inside it. Matching then filters on the indexed `vendors.location_id` instead of
+running ILIKE '%...%' over vendors.
+
+"Within N km" searches use a lat/lon bounding box as the prefilter (a range
+scan on ix_locations_lat_lon in SQL, a cheap comparison in memory) and
+haversine for the exact distance.
+"""
+import logging
+import math
+import re
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+from rapidfuzz import fuzz, process
+from sqlalchemy import and_, func, select, update
+from app.core.config import settings
+from app.models.marketplace import Location, Vendor
+from app.services.package_catalog import normalize_key
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+WORD = re.compile(r"[^\W\d_]+")
+# Dropped from the end of a part that didn't match as written ("Kandy Town" -> "kandy")
+LOCALITY_SUFFIXES = ("city", "town")
+# Shorter phrases aren't fuzzy-matched: one typo in four letters is another word
+MIN_FUZZY_LENGTH = 4
+
+# Seeded by app.scripts.seed into databases Alembic never touched (migration 0006 seeds the rest)
+KNOWN_LOCATIONS = [
+    ("Colombo", ["colombo city", "cmb", "kolamba"], 6.9271, 79.8612),
+    ("Kandy", ["kandy city", "maha nuwara", "senkadagala"], 7.2906, 80.6337),
+    ("Galle", ["galle fort", "galla"], 6.0535, 80.2210),
+    ("Bentota", ["bentara"], 6.4258, 79.9958),
+    ("Ella", ["ella town"], 6.8667, 81.0466),
+    ("Negombo", ["meegamuwa", "migamuwa"], 7.2083, 79.8358),
+    ("Nuwara Eliya", ["nuwaraeliya", "little england"], 6.9497, 80.7891),
+    ("Jaffna", ["yalpanam", "yapanaya"], 9.6615, 80.0255),
+]
+
+class Place(NamedTuple):
+    id: int
+    name: str
+    latitude: float
+    longitude: float
+
+# ==========================================
+# 📐 DISTANCE
+# ==========================================
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi, dlambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+def bounding_box(lat: float, lon: float, km: float) -> tuple:
+    """(min_lat, max_lat, min_lon, max_lon) containing every point within `km` (a bit more, never less)."""
+    dlat = math.degrees(km / EARTH_RADIUS_KM)
+    # Longitude degrees shrink towards the poles; near them, take every longitude
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(math.degrees(km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+def within_km_sql(lat: float, lon: float, km: float):
+    """WHERE clause on `locations`: the BETWEENs use ix_locations_lat_lon, haversine trims the corners."""
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, km)
+    dphi = func.radians(Location.latitude - lat)
+    dlambda = func.radians(Location.longitude - lon)
+    a = (
+        func.power(func.sin(dphi / 2), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(Location.latitude)) * func.power(func.sin(dlambda / 2), 2)
+    )
+    distance = 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+    return and_(
+        Location.latitude.between(min_lat, max_lat),
+        Location.longitude.between(min_lon, max_lon),
+        distance <= km,
+    )
+
+# ==========================================
+# 🗂️ IN-MEMORY INDEX
+# ==========================================
+class LocationIndex:
+    # Resolved free text is memoized; past this many distinct inputs the memo starts over
+    MAX_MEMO = 4096
+
+    def __init__(self, threshold: float = 85.0):
+        self.threshold = threshold
+        self.places = {}    # id -> Place
+        self.aliases = {}   # normalized name/alias -> id
+        self._memo = {}     # normalized input -> id (or None)
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.places)
+
+    def __len__(self):
+        return len(self.places)
+
+    def build(self, rows: Iterable[tuple]):
+        """rows: (id, name, aliases, latitude, longitude). Swaps the whole index at once."""
+        places, aliases = {}, {}
+        for loc_id, name, alias_list, lat, lon in rows:
+            places[loc_id] = Place(loc_id, name, lat, lon)
+            for alias in [name, *(alias_list or ())]:
+                aliases.setdefault(normalize_key(alias), loc_id)
+        self.places, self.aliases, self._memo = places, aliases, {}
+
+    def load(self, session_factory):
+        with session_factory() as db:
+            rows = db.execute(select(
+                Location.id, Location.name, Location.aliases, Location.latitude, Location.longitude
+            )).all()
+        self.build(rows)
+        logger.info(f"📍 Location index loaded: {len(self.places)} places, {len(self.aliases)} aliases.")
+
+    def resolve(self, text) -> Optional[Place]:
+        key = normalize_key(text)
+        if not key:
+            return None
+        try:
+            loc_id = self._memo[key]
+        except KeyError:
+            loc_id = self.aliases.get(key)
+            if loc_id is None and self.aliases:
+                # Part by part: "Kandy, Sri Lanka" -> Kandy, while parts naming different
+                # places ("Kandy, Colombo") leave the text unresolved rather than guessed
+                found = {self._lookup_part(part) for part in key.split(",")} - {None}
+                loc_id = found.pop() if len(found) == 1 else None
+            if len(self._memo) >= self.MAX_MEMO:
+                self._memo = {}
+            self._memo[key] = loc_id
+        return self.places.get(loc_id)
+
+    def _lookup_part(self, part: str) -> Optional[int]:
+        """One address part, matched whole: "colombo 07" -> colombo, "kandy road" -> nothing."""
+        words = WORD.findall(part)
+        phrases = [" ".join(words)]
+        if len(words) > 1 and words[-1] in LOCALITY_SUFFIXES:
+            phrases.append(" ".join(words[:-1]))
+        for phrase in phrases:
+            if phrase in self.aliases:
+                return self.aliases[phrase]
+        for phrase in phrases:
+            if len(phrase) < MIN_FUZZY_LENGTH:
+                continue
+            # fuzz.ratio compares the whole phrase: "nuwara elia" ~ "nuwara eliya", "bellanwila" !~ "ella"
+            hit = process.extractOne(phrase, self.aliases.keys(), scorer=fuzz.ratio, score_cutoff=self.threshold)
+            if hit is not None:
+                return self.aliases[hit[0]]
+        return None
+
+    def find_in(self, words: list) -> Optional[tuple]:
+        """
+        Scans tokenized text for a place: (Place, score 0-100, (start, end) word span) or None.
+        Exact aliases win (longest phrase first); otherwise the closest 1-2 word phrase
+        (fuzz.ratio, so "colmbo" matches but "party in colombo" isn't needed whole).
+        """
+        for n in (3, 2, 1):
+            for i in range(len(words) - n + 1):
+                loc_id = self.aliases.get(" ".join(words[i:i + n]))
+                if loc_id is not None:
+                    return self.places[loc_id], 100.0, (i, i + n)
+        best = None
+        for n in (2, 1):
+            for i in range(len(words) - n + 1):
+                phrase = " ".join(words[i:i + n])
+                if len(phrase) < 4:
+                    continue
+                hit = process.extractOne(phrase, self.aliases.keys(), scorer=fuzz.ratio, score_cutoff=self.threshold)
+                if hit is not None and (best is None or hit[1] > best[1]):
+                    best = (self.places[self.aliases[hit[0]]], hit[1], (i, i + n))
+        return best
+
+    def within(self, place: Place, km: float) -> list:
+        """[(Place, distance_km)] within `km` of `place` (itself included), nearest first."""
+        min_lat, max_lat, min_lon, max_lon = bounding_box(place.latitude, place.longitude, km)
+        found = []
+        for other in self.places.values():
+            if min_lat <= other.latitude <= max_lat and min_lon <= other.longitude <= max_lon:
+                distance = haversine_km(place.latitude, place.longitude, other.latitude, other.longitude)
+                if distance <= km:
+                    found.append((other, distance))
+        return sorted(found, key=lambda pair: pair[1])
+
+    def ids_near(self, text, km: float = 0.0) -> Optional[tuple]:
+        """Location ids for `text` (+ everything within `km`), or None when it doesn't resolve."""
+        place = self.resolve(text)
+        if place is None:
+            return None
+        if km <= 0:
+            return (place.id,)
+        return tuple(sorted(other.id for other, _ in self.within(place, km)))
+
+    def keys_in(self, keys: Iterable[str], ids: Iterable[int]) -> list:
+        """The free-text location keys (e.g. a catalog snapshot's) that resolve into `ids`."""
+        wanted = set(ids)
+        return [key for key in keys if (place := self.resolve(key)) is not None and place.id in wanted]
+
+# ==========================================
+# 🔗 VENDOR BACKFILL
+# ==========================================
+def link_vendor_locations(conn, index: LocationIndex = None) -> int:
+    """
+    Sets location_id on vendors that have none (written by raw SQL: migrations, bulk
+    import), resolving location_base the way the app does, so "Kandy, Sri Lanka" and
+    "Colombo 07" link like "Kandy" and "Colombo". One UPDATE per place; returns rows linked.
+    """
+    if index is None:
+        index = LocationIndex(settings.LOCATION_MATCH_THRESHOLD)
+        index.build(conn.execute(select(
+            Location.id, Location.name, Location.aliases, Location.latitude, Location.longitude
+        )).all())
+    bases = conn.execute(
+        select(Vendor.location_base)
+        .where(Vendor.location_id.is_(None), Vendor.location_base.is_not(None))
+        .distinct()
+    ).scalars()
+    by_place = defaultdict(list)
+    for base in bases:
+        place = index.resolve(base)
+        if place is not None:
+            by_place[place.id].append(base)
+
+    linked = 0
+    for loc_id, names in by_place.items():
+        linked += conn.execute(
+            update(Vendor)
+            .where(Vendor.location_id.is_(None), Vendor.location_base.in_(names))
+            .values(location_id=loc_id)
+        ).rowcount
+    return linked
@@ -0,0 +1,97 @@
+import re
+from sqlalchemy import Float, case, cast, func, literal
+from app.core.config import settings
+from app.models.marketplace import Package
+
+# =========================================================
+# 🏆 MATCH SCORING
+# One formula, two implementations: SQL (Postgres path) and
+# Python (in-memory catalog path). Keep them in step.
+# =========================================================
+MATCH_LIMIT = 5
+
+TAG_WEIGHT = 3.0    # share of the requested tags the package has (0..1)
+PRICE_WEIGHT = 2.0  # 1 when within budget_per_head, else budget / price
+GUEST_WEIGHT = 1.0  # 1 when guest_count fits min_guests..max_guests
+# ts_rank of the free-text terms against name + description (SQL only, see text_terms)
+TEXT_WEIGHT = settings.MATCH_TEXT_WEIGHT
+TEXT_CONFIG = "english"  # must match the config in Package.search_vector
+
+def effective_price_sql():
+    # Per-head price when the vendor gave one, otherwise the standard price
+    return func.coalesce(Package.price_per_head, Package.price)
+
+def text_terms(*values) -> list:
+    """
+    Words to full-text match, from AI fields ("secluded garden", ["rooftop", "sunset"]).
+    Empty when TEXT_WEIGHT is 0: text relevance only exists in Postgres, so searches
+    carrying terms skip the in-memory catalog.
+    """
+    if not TEXT_WEIGHT:
+        return []
+    words = []
+    for value in values:
+        for item in [value] if isinstance(value, str) else (value or []):
+            if item:
+                words.extend(re.findall(r"[^\W_]+", str(item).lower()))
+    return list(dict.fromkeys(words))
+
+def text_query_sql(terms: list):
+    # Any of the words (OR), stemmed the same way as the indexed column
+    return func.to_tsquery(TEXT_CONFIG, " | ".join(terms))
+
+def text_match_sql(terms: list):
+    """`search_vector @@ query`: served by the GIN index."""
+    return Package.search_vector.op("@@")(text_query_sql(terms))
+
+def score_expression(criteria: dict):
+    tags = criteria["tags"]
+    budget = criteria["budget_per_head"]
+    guests = criteria["guest_count"]
+
+    # An expression, not a bare constant: Postgres rejects ORDER BY <constant>
+    score = cast(literal(0.0), Float)
+
+    if tags:
+        per_tag = TAG_WEIGHT / len(tags)
+        for t in tags:
+            score = score + case((Package.tags.contains([t]), per_tag), else_=0.0)
+
+    if budget:
+        price = effective_price_sql()
+        price_fit = case((price <= budget, 1.0), else_=budget / func.nullif(price, 0))
+        score = score + PRICE_WEIGHT * func.coalesce(price_fit, 0.0)
+
+    if guests:
+        fits = (func.coalesce(Package.min_guests, 0) <= guests) & (func.coalesce(Package.max_guests, guests) >= guests)
+        score = score + GUEST_WEIGHT * case((fits, 1.0), else_=0.0)
+
+    terms = criteria.get("text")
+    if terms:
+        score = score + TEXT_WEIGHT * func.ts_rank(Package.search_vector, text_query_sql(terms))
+
+    return score.label("match_score")
+
+def score_values(criteria: dict, tags, price, min_guests, max_guests) -> float:
+    """
+    Python twin of `score_expression` (minus text relevance, which needs the tsvector).
+    `tags` must already be normalized; `price` is the effective price (None/NaN if unknown).
+    """
+    score = 0.0
+
+    wanted = criteria["tags"]
+    if wanted:
+        score += TAG_WEIGHT * sum(1 for t in wanted if t in tags) / len(wanted)
+
+    budget = criteria["budget_per_head"]
+    if budget and price is not None and price == price:
+        score += PRICE_WEIGHT * (1.0 if price <= budget else budget / price)
+
+    guests = criteria["guest_count"]
+    if guests:
+        low = min_guests if min_guests is not None and min_guests >= 0 else 0
+        high = max_guests if max_guests is not None and max_guests >= 0 else guests
+        if low <= guests <= high:
+            score += GUEST_WEIGHT
+
+    return score
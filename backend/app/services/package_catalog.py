@@ -0,0 +1,409 @@
+import asyncio
+import heapq
+import logging
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Optional
+from sqlalchemy import func, select
+from app.models.marketplace import CatalogVersion, Vendor, Package
+from app.services.match_scoring import score_values
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+def normalize_key(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+def normalize_tags(tags) -> list:
+    """Tags as stored and searched: normalized keys, blanks and repeats dropped, order kept."""
+    return list(dict.fromkeys(key for key in map(normalize_key, tags or ()) if key))
+
+class CatalogRecord:
+    """
+    A read-only package row served from memory.
+    Has the same attribute names as `Package`, so `VenueDisplay.model_validate` accepts it.
+    """
+    __slots__ = (
+        "id", "vendor_id", "name", "description", "price", "price_per_head",
+        "min_guests", "max_guests", "tags", "location_coverage", "location_base",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"CatalogRecord(id={self.id}, name={self.name!r})"
+
+class CatalogSnapshot:
+    """
+    Column-oriented, immutable copy of every package (+ its vendor's location).
+
+    Row `i` lives at position `i` of every column. Numbers sit in typed `array`s
+    (8 bytes each instead of a boxed float/int), and the lookups that
+    `find_perfect_matches` needs are precomputed:
+      - location_index: normalized vendor location -> sorted positions
+      - tag_index:      normalized tag -> sorted positions
+      - price_sorted / price_order: prices ascending (+ their positions) for
+        bisect-based budget range lookups
+    """
+
+    def __init__(self, rows: Iterable[tuple] = (), version=None):
+        """
+        rows: (id, vendor_id, name, description, price, price_per_head,
+               min_guests, max_guests, tags, location_coverage, location_base)
+        """
+        self.version = version
+        self.ids = array("q")
+        self.vendor_ids = array("q")
+        self.prices = array("d")
+        self.prices_per_head = array("d")  # NaN == no per-head price
+        self.min_guests = array("q")       # -1 == unknown
+        self.max_guests = array("q")
+        self.names = []
+        self.descriptions = []
+        self.tags = []
+        self.location_coverages = []
+        self.locations = []
+        self.location_index = {}
+        self.tag_index = {}
+
+        for pos, row in enumerate(rows):
+            (pkg_id, vendor_id, name, description, price, price_per_head,
+             min_guests, max_guests, tags, coverage, location_base) = row
+
+            self.ids.append(pkg_id)
+            self.vendor_ids.append(vendor_id or 0)
+            self.prices.append(price if price is not None else NAN)
+            self.prices_per_head.append(price_per_head if price_per_head is not None else NAN)
+            self.min_guests.append(min_guests if min_guests is not None else -1)
+            self.max_guests.append(max_guests if max_guests is not None else -1)
+            self.names.append(name)
+            self.descriptions.append(description)
+            self.tags.append(tuple(tags or ()))
+            self.location_coverages.append(coverage)
+            self.locations.append(location_base)
+
+            self.location_index.setdefault(normalize_key(location_base), array("q")).append(pos)
+            for tag in set(normalize_key(t) for t in (tags or ())):
+                self.tag_index.setdefault(tag, array("q")).append(pos)
+
+        # Sorted price column (rows without a price never match a budget filter)
+        priced = sorted((p, pos) for pos, p in enumerate(self.prices) if p == p)
+        self.price_sorted = array("d", (p for p, _ in priced))
+        self.price_order = array("q", (pos for _, pos in priced))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, pos: int) -> tuple:
+        """Position `pos` as a constructor row (see __init__)."""
+        record = self.record(pos)
+        return (
+            record.id, record.vendor_id, record.name, record.description, record.price,
+            record.price_per_head, record.min_guests, record.max_guests, record.tags,
+            record.location_coverage, record.location_base,
+        )
+
+    def with_changes(self, rows: Iterable[tuple], package_ids: Iterable[int], version=None) -> "CatalogSnapshot":
+        """
+        A new snapshot where `package_ids` are replaced by `rows` (ids without a row are
+        deleted). Only the changed rows come from Postgres; the rest are copied from this
+        snapshot in id order, and the indexes are rebuilt over the result.
+        """
+        changed = sorted(rows, key=lambda row: row[0])
+        dropped = set(package_ids) | {row[0] for row in changed}
+        kept = (self.row(pos) for pos in range(len(self)) if self.ids[pos] not in dropped)
+        return CatalogSnapshot(heapq.merge(kept, changed, key=lambda row: row[0]), version=version)
+
+    def record(self, pos: int) -> CatalogRecord:
+        price = self.prices[pos]
+        per_head = self.prices_per_head[pos]
+        return CatalogRecord(
+            id=self.ids[pos],
+            vendor_id=self.vendor_ids[pos],
+            name=self.names[pos],
+            description=self.descriptions[pos],
+            price=price if price == price else None,
+            price_per_head=per_head if per_head == per_head else None,
+            min_guests=self.min_guests[pos] if self.min_guests[pos] >= 0 else None,
+            max_guests=self.max_guests[pos] if self.max_guests[pos] >= 0 else None,
+            tags=list(self.tags[pos]),
+            location_coverage=self.location_coverages[pos],
+            location_base=self.locations[pos],
+        )
+
+    # ==========================================
+    # 🔎 LOOKUPS (all return sets of positions)
+    # ==========================================
+    def positions_for_location(self, location: str) -> set:
+        # Same semantics as ILIKE '%loc%': any indexed location containing the text.
+        # Distinct locations are few, so this scans keys, never rows.
+        needle = normalize_key(location)
+        found = set()
+        for key, positions in self.location_index.items():
+            if needle in key:
+                found.update(positions)
+        return found
+
+    def positions_for_location_keys(self, keys: Iterable[str]) -> set:
+        # Exact keys (already resolved against the location index by the caller)
+        found = set()
+        for key in keys:
+            found.update(self.location_index.get(key, ()))
+        return found
+
+    def positions_for_tags(self, tags: Iterable[str]) -> set:
+        found = set()
+        for tag in tags:
+            found.update(self.tag_index.get(normalize_key(tag), ()))
+        return found
+
+    def positions_for_ids(self, ids: Iterable[int]) -> set:
+        # Rows are stored in id order (fetch_rows), so each id is one bisect away
+        found = set()
+        for pkg_id in ids:
+            pos = bisect_left(self.ids, pkg_id)
+            if pos < len(self.ids) and self.ids[pos] == pkg_id:
+                found.add(pos)
+        return found
+
+    def positions_in_price_range(self, low=None, high=None, low_inclusive=True, high_inclusive=True) -> set:
+        start = 0
+        if low is not None:
+            start = (bisect_left if low_inclusive else bisect_right)(self.price_sorted, low)
+        end = len(self.price_sorted)
+        if high is not None:
+            end = (bisect_right if high_inclusive else bisect_left)(self.price_sorted, high)
+        return set(self.price_order[start:end])
+
+    def effective_price(self, pos: int) -> float:
+        per_head = self.prices_per_head[pos]
+        return per_head if per_head == per_head else self.prices[pos]
+
+    def search(self, criteria: dict, limit: int = 5) -> list:
+        """
+        Hard filters are AND-ed (location, budget bucket, any-of tags, and the
+        package_ids a planning session narrows to), then the survivors are ranked with the same score as the SQL path (ties -> lowest id).
+        """
+        location, price_range, tags = criteria["location"], criteria["price_range"], criteria["tags"]
+        # location_keys: the vendor locations that resolved to the wanted place(s)
+        location_keys = criteria.get("location_keys")
+        if location_keys is not None:
+            by_location = self.positions_for_location_keys(location_keys)
+        else:
+            by_location = self.positions_for_location(location) if location else None
+
+        candidates = None
+        for positions in (
+            by_location,
+            self.positions_in_price_range(*price_range) if price_range else None,
+            self.positions_for_tags(tags) if tags else None,
+            self.positions_for_ids(criteria["package_ids"]) if criteria.get("package_ids") is not None else None,
+        ):
+            if positions is None:
+                continue
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+        if candidates is None:
+            candidates = range(len(self))
+
+        def rank(pos):
+            score = score_values(
+                criteria,
+                {normalize_key(t) for t in self.tags[pos]},
+                self.effective_price(pos),
+                self.min_guests[pos],
+                self.max_guests[pos],
+            )
+            return (score, -self.ids[pos])
+
+        return [self.record(pos) for pos in heapq.nlargest(limit, candidates, key=rank)]
+
+class PackageCatalog:
+    """
+    Holds the current `CatalogSnapshot` for this worker and knows how to refresh it.
+    A refresh builds a whole new snapshot and swaps one reference, so readers
+    never see half-built indexes.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.loaded_at = 0.0
+        self.last_checked_at = 0.0
+        # 🗺️ Multi-worker mode: the serving supervisor keeps this file fresh and
+        # every worker maps it instead of building its own copy from Postgres
+        self.snapshot_path = snapshot_path
+        self._file_id = None
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None
+
+    @property
+    def version(self):
+        return self.snapshot.version if self.snapshot is not None else None
+
+    def __len__(self):
+        return len(self.snapshot) if self.snapshot is not None else 0
+
+    def location_keys(self):
+        """Distinct normalized vendor locations in the current snapshot."""
+        return self.snapshot.location_index.keys() if self.snapshot is not None else ()
+
+    def search(self, criteria: dict, limit: int = 5) -> list:
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise RuntimeError("Package catalog is not loaded")
+        return snapshot.search(criteria, limit=limit)
+
+    # ==========================================
+    # 🔄 LOAD / REFRESH
+    # ==========================================
+    @staticmethod
+    def fetch_version(db):
+        """
+        Cheap fingerprint of the packages table: (catalog version, count, max id). The
+        version moves on every API write; count/max id catch raw SQL (bulk imports).
+        """
+        version = select(CatalogVersion.version).where(CatalogVersion.id == 1).scalar_subquery()
+        catalog_version, count, max_id = db.execute(
+            select(func.coalesce(version, 0), func.count(Package.id), func.max(Package.id))
+        ).one()
+        return (catalog_version, count, max_id)
+
+    @staticmethod
+    def fetch_rows(db, package_ids: Optional[Iterable[int]] = None):
+        query = (
+            select(
+                Package.id, Package.vendor_id, Package.name, Package.description,
+                Package.price, Package.price_per_head, Package.min_guests, Package.max_guests,
+                Package.tags, Package.location_coverage, Vendor.location_base,
+            )
+            .outerjoin(Vendor, Vendor.id == Package.vendor_id)
+            .order_by(Package.id)
+        )
+        if package_ids is not None:
+            query = query.where(Package.id.in_(list(package_ids)))
+        return db.execute(query)
+
+    def build(self, session_factory) -> CatalogSnapshot:
+        with session_factory() as db:
+            version = self.fetch_version(db)
+            return CatalogSnapshot(self.fetch_rows(db), version=version)
+
+    def load_file(self) -> bool:
+        """Maps the shared snapshot file if it exists; False means fall back to Postgres."""
+        from app.services.shared_catalog import MappedCatalogSnapshot, snapshot_file_id
+
+        file_id = snapshot_file_id(self.snapshot_path)
+        if file_id is None:
+            return False
+        if file_id != self._file_id:
+            mapped = MappedCatalogSnapshot(self.snapshot_path)
+            self._file_id = file_id
+            if self._newer_than(mapped):
+                # Already applied a NOTIFY'd change this file doesn't have yet; wait for the next one
+                self.last_checked_at = time.monotonic()
+                return True
+            self.snapshot = mapped
+            self.loaded_at = time.monotonic()
+            logger.info(f"🗺️ Package catalog mapped from {self.snapshot_path}: {len(self.snapshot)} packages.")
+        self.last_checked_at = time.monotonic()
+        return True
+
+    def _newer_than(self, other: CatalogSnapshot) -> bool:
+        mine, theirs = self.version, other.version
+        return isinstance(mine, tuple) and isinstance(theirs, tuple) and mine[0] > theirs[0]
+
+    def load(self, session_factory):
+        if self.snapshot_path and self.load_file():
+            return
+        snapshot = self.build(session_factory)
+        self.snapshot = snapshot
+        self.loaded_at = self.last_checked_at = time.monotonic()
+        logger.info(f"📦 Package catalog loaded: {len(snapshot)} packages, {len(snapshot.tag_index)} tags.")
+
+    def apply_changes(self, session_factory, changes: Iterable[tuple]) -> bool:
+        """
+        Applies NOTIFY'd package writes, `changes` = [(catalog version, package ids)], by
+        re-reading only those packages. Versions we already have are skipped; a gap (a
+        missed notification) or package ids None (a bulk change) reloads everything.
+        Returns True if the snapshot changed.
+        """
+        snapshot = self.snapshot
+        if snapshot is None:
+            self.load(session_factory)
+            return True
+        current = snapshot.version[0] if isinstance(snapshot.version, tuple) else None
+        pending = sorted((v, ids) for v, ids in changes if current is None or v > current)
+        if not pending:
+            return False
+        versions = [v for v, _ in pending]
+        contiguous = current is not None and versions == list(range(current + 1, current + 1 + len(versions)))
+        if not contiguous or any(ids is None for _, ids in pending):
+            logger.info(f"🔄 Catalog version {current} -> {versions[-1]}: reloading.")
+            self.load_fresh(session_factory)
+            return True
+
+        package_ids = sorted({pkg_id for _, ids in pending for pkg_id in ids})
+        with session_factory() as db:
+            rows = [tuple(row) for row in self.fetch_rows(db, package_ids)]
+        updated = snapshot.with_changes(rows, package_ids)
+        # Same fingerprint fetch_version() reports once Postgres is at this version
+        updated.version = (versions[-1], len(updated), max(updated.ids) if len(updated) else None)
+        self.snapshot = updated
+        logger.info(f"📦 Catalog v{versions[-1]}: applied {len(package_ids)} changed package(s) in place.")
+        return True
+
+    def catch_up(self, session_factory) -> bool:
+        """Reloads if Postgres moved on while nobody was listening (startup / reconnect)."""
+        with session_factory() as db:
+            version = self.fetch_version(db)
+        if version == self.version:
+            return False
+        self.load_fresh(session_factory)
+        return True
+
+    def load_fresh(self, session_factory):
+        """Builds from Postgres even in multi-worker mode (the shared file may lag behind)."""
+        snapshot = self.build(session_factory)
+        self.snapshot = snapshot
+        self.loaded_at = self.last_checked_at = time.monotonic()
+
+    def refresh_if_stale(self, session_factory, max_age: float) -> bool:
+        """Reloads when the version changed or the snapshot is older than `max_age`."""
+        if self.snapshot_path:
+            # The supervisor owns freshness; just pick up a replaced file
+            previous = self._file_id
+            if self.load_file():
+                return self._file_id != previous
+
+        if not self.ready or time.monotonic() - self.loaded_at > max_age:
+            self.load(session_factory)
+            return True
+
+        with session_factory() as db:
+            version = self.fetch_version(db)
+        self.last_checked_at = time.monotonic()
+        if isinstance(self.version, tuple) and version[0] < self.version[0]:
+            return False  # a replica that hasn't caught up with changes the listener applied
+        if version != self.version:
+            self.load(session_factory)
+            return True
+        return False
+
+async def run_refresh_loop(catalog: PackageCatalog, session_factory, interval: float, max_age: float):
+    """Background task (one per worker): keeps the snapshot fresh off the event loop."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(catalog.refresh_if_stale, session_factory, max_age)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Catalog refresh failed, keeping the old snapshot: {e}")
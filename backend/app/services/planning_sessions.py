@@ -0,0 +1,122 @@
+"""
+💬 PLANNING SESSIONS
+
+A session keeps what the AI has understood so far (the merged analysis) and the
+ranked candidate package ids of the last turn in `planning_sessions`, so a
+follow-up ("make it 30 people", "somewhere quieter") sends only the new message
+to the AI and narrows the previous candidates instead of searching from scratch.
+The row lives in Postgres, not worker memory: the next turn may land on any worker.
+"""
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.planning import PlanningSession
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+# Facts a later turn overrides when it states them
+FACT_FIELDS = ("event_type", "location", "budget", "budget_per_head", "guest_count", "radius_km")
+# Lists a later turn adds to
+LIST_FIELDS = ("venue_tags", "keywords")
+# Free text that describes the latest turn only
+TURN_FIELDS = ("reasoning", "chat_response", "personality_profile", "gift_suggestion")
+
+def has_value(value) -> bool:
+    return value not in (None, "", "Any", 0, 0.0, [], {})
+
+def merge_analysis(previous: dict, delta: dict) -> tuple:
+    """
+    Folds one turn's analysis into the session's: (merged, changed field names).
+    A turn that states nothing new (small talk, SERVICE_UNAVAILABLE) changes nothing.
+    """
+    if "SERVICE_UNAVAILABLE" in (delta.get("missing_info") or []):
+        return dict(previous), set()
+
+    merged, changed = dict(previous), set()
+    for field in FACT_FIELDS:
+        value = delta.get(field)
+        if has_value(value) and value != previous.get(field):
+            merged[field] = value
+            changed.add(field)
+    for field in LIST_FIELDS:
+        added = delta.get(field) or []
+        if isinstance(added, str):
+            added = [added]
+        old = previous.get(field) or []
+        if isinstance(old, str):
+            old = [old]
+        combined = list(dict.fromkeys([*old, *added]))
+        if combined != list(old):
+            merged[field] = combined
+            changed.add(field)
+    for field in TURN_FIELDS:
+        if delta.get(field) is not None:
+            merged[field] = delta[field]
+
+    if delta.get("intent") == "planning" or (changed and previous.get("intent") == "planning"):
+        merged["intent"] = "planning"
+    else:
+        merged["intent"] = delta.get("intent") or previous.get("intent", "chat")
+    # Still-missing details: whatever the AI asks for now, minus what earlier turns answered
+    merged["missing_info"] = [
+        item for item in (delta.get("missing_info") or previous.get("missing_info") or [])
+        if not has_value(merged.get(item))
+    ]
+    return merged, changed
+
+class PlanningSessionStore:
+    # Expired rows are deleted on session creation, at most this often per worker
+    PURGE_INTERVAL_SECONDS = 300.0
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self._purged_at = 0.0
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - self.ttl
+
+    async def create(self, db: AsyncSession, analysis: dict, candidate_ids: list) -> PlanningSession:
+        await self._purge_expired(db)
+        session = PlanningSession(
+            id=secrets.token_urlsafe(16), analysis=analysis, candidate_ids=candidate_ids,
+            turns=1, updated_at=datetime.now(timezone.utc),
+        )
+        db.add(session)
+        await db.commit()
+        return session
+
+    async def get(self, db: AsyncSession, session_id: str) -> Optional[PlanningSession]:
+        """The live session, or None when it doesn't exist or has been idle past the TTL."""
+        return (await db.execute(
+            select(PlanningSession)
+            .where(PlanningSession.id == session_id, PlanningSession.updated_at >= self._cutoff())
+        )).scalar_one_or_none()
+
+    async def save(self, db: AsyncSession, session: PlanningSession, analysis: dict, candidate_ids: list):
+        session.analysis = analysis
+        session.candidate_ids = candidate_ids
+        session.turns += 1
+        session.updated_at = datetime.now(timezone.utc)
+        await db.commit()
+
+    async def delete(self, db: AsyncSession, session_id: str) -> bool:
+        result = await db.execute(delete(PlanningSession).where(PlanningSession.id == session_id))
+        await db.commit()
+        return result.rowcount > 0
+
+    async def _purge_expired(self, db: AsyncSession):
+        now = time.monotonic()
+        if now - self._purged_at < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._purged_at = now
+        result = await db.execute(delete(PlanningSession).where(PlanningSession.updated_at < self._cutoff()))
+        if result.rowcount:
+            logger.info(f"🧹 Purged {result.rowcount} expired planning sessions.")
+
+planning_sessions = PlanningSessionStore(settings.PLANNING_SESSION_TTL_SECONDS)
@@ -0,0 +1,183 @@
+"""
+🗺️ SHARED CATALOG SNAPSHOT (one file, memory-mapped by every worker)
+
+`write_snapshot_file` dumps a `CatalogSnapshot` into a single flat file;
+`MappedCatalogSnapshot` maps it read-only and serves the same columns straight from
+the page cache. N workers share one physical copy, so memory stays flat as workers
+are added, and a worker boots without querying Postgres.
+
+Layout: b"OCCCAT01" | u64 manifest length | JSON manifest | 8-byte aligned sections.
+Numbers are native-endian int64/float64 (the file never leaves the host that built it).
+Strings are a UTF-8 blob plus an int64 offsets column (n + 1 entries).
+"""
+import json
+import mmap
+import os
+import struct
+from array import array
+from typing import Optional
+from app.services.package_catalog import CatalogSnapshot
+
+MAGIC = b"OCCCAT01"
+_HEADER = struct.Struct("<8sQ")
+
+NUMERIC_COLUMNS = {
+    "ids": "q", "vendor_ids": "q", "prices": "d", "prices_per_head": "d",
+    "min_guests": "q", "max_guests": "q", "price_sorted": "d", "price_order": "q",
+}
+STRING_COLUMNS = ("names", "descriptions", "location_coverages", "locations")
+
+# ==========================================
+# ✍️ WRITER (runs once, in the serving supervisor)
+# ==========================================
+def _string_sections(values) -> tuple:
+    offsets, blob = array("q", [0]), bytearray()
+    nulls = array("q")
+    for pos, value in enumerate(values):
+        if value is None:
+            nulls.append(pos)
+        else:
+            blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes(), bytes(blob), nulls.tobytes()
+
+def _index_sections(index: dict) -> tuple:
+    """{key: positions} -> (keys, starts, postings): key i owns postings[starts[i]:starts[i + 1]]."""
+    keys, starts, postings = [], array("q", [0]), array("q")
+    for key, positions in index.items():
+        keys.append(key)
+        postings.extend(positions)
+        starts.append(len(postings))
+    return keys, starts.tobytes(), postings.tobytes()
+
+def write_snapshot_file(snapshot: CatalogSnapshot, path: str):
+    sections, manifest = [], {"version": snapshot.version, "rows": len(snapshot), "sections": {}}
+
+    def add(name: str, data: bytes):
+        sections.append((name, data))
+
+    for name in NUMERIC_COLUMNS:
+        add(name, getattr(snapshot, name).tobytes())
+    for name in STRING_COLUMNS:
+        offsets, blob, nulls = _string_sections(getattr(snapshot, name))
+        add(f"{name}.offsets", offsets)
+        add(f"{name}.blob", blob)
+        add(f"{name}.nulls", nulls)
+
+    # Tags: a vocabulary + per-row tag ids, so rows share one copy of each tag string
+    vocabulary, tag_ids, tag_offsets = {}, array("q"), array("q", [0])
+    for tags in snapshot.tags:
+        tag_ids.extend(vocabulary.setdefault(t, len(vocabulary)) for t in tags)
+        tag_offsets.append(len(tag_ids))
+    manifest["tag_vocabulary"] = list(vocabulary)
+    add("tags.ids", tag_ids.tobytes())
+    add("tags.offsets", tag_offsets.tobytes())
+
+    for name in ("location_index", "tag_index"):
+        keys, starts, postings = _index_sections(getattr(snapshot, name))
+        manifest[f"{name}.keys"] = keys
+        add(f"{name}.starts", starts)
+        add(f"{name}.postings", postings)
+
+    # Offsets are relative to the first section, which starts 8-byte aligned after the manifest
+    offset = 0
+    for name, data in sections:
+        manifest["sections"][name] = [offset, len(data)]
+        offset += len(data) + (-len(data) % 8)
+    manifest_bytes = json.dumps(manifest).encode("utf-8")
+    manifest_bytes += b" " * (-(_HEADER.size + len(manifest_bytes)) % 8)
+
+    # Write next to the target, then rename: workers only ever see a complete file
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for _, data in sections:
+            f.write(data)
+            f.write(b"\0" * (-len(data) % 8))
+    os.replace(tmp_path, path)
+
+# ==========================================
+# 📖 READER (every worker)
+# ==========================================
+class StringColumn:
+    """Sequence of str/None decoded on access from a mapped blob."""
+    __slots__ = ("offsets", "blob", "nulls")
+
+    def __init__(self, offsets: memoryview, blob: memoryview, nulls: memoryview):
+        self.offsets, self.blob, self.nulls = offsets, blob, frozenset(nulls)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, pos: int) -> Optional[str]:
+        if pos in self.nulls:
+            return None
+        return bytes(self.blob[self.offsets[pos]:self.offsets[pos + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[pos] for pos in range(len(self)))
+
+class TagColumn:
+    __slots__ = ("ids", "offsets", "vocabulary")
+
+    def __init__(self, ids: memoryview, offsets: memoryview, vocabulary: list):
+        self.ids, self.offsets, self.vocabulary = ids, offsets, vocabulary
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, pos: int) -> tuple:
+        return tuple(self.vocabulary[i] for i in self.ids[self.offsets[pos]:self.offsets[pos + 1]])
+
+    def __iter__(self):
+        return (self[pos] for pos in range(len(self)))
+
+class MappedCatalogSnapshot(CatalogSnapshot):
+    """
+    A `CatalogSnapshot` whose columns live in a read-only mmap. Search, record() and
+    the bisect price lookups run unchanged on top of these views.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+
+        magic, manifest_len = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot file")
+        manifest = json.loads(bytes(self._map[_HEADER.size:_HEADER.size + manifest_len]))
+        base = _HEADER.size + manifest_len
+        view = memoryview(self._map)
+
+        def section(name: str, fmt: str = None) -> memoryview:
+            offset, length = manifest["sections"][name]
+            part = view[base + offset:base + offset + length]
+            return part.cast(fmt) if fmt else part
+
+        version = manifest["version"]
+        self.version = tuple(version) if isinstance(version, list) else version
+
+        for name, fmt in NUMERIC_COLUMNS.items():
+            setattr(self, name, section(name, fmt))
+        for name in STRING_COLUMNS:
+            setattr(self, name, StringColumn(
+                section(f"{name}.offsets", "q"), section(f"{name}.blob"), section(f"{name}.nulls", "q")
+            ))
+        self.tags = TagColumn(section("tags.ids", "q"), section("tags.offsets", "q"), manifest["tag_vocabulary"])
+
+        # Only the (few) distinct keys become Python objects; postings stay mapped
+        for name in ("location_index", "tag_index"):
+            starts, postings = section(f"{name}.starts", "q"), section(f"{name}.postings", "q")
+            setattr(self, name, {
+                key: postings[starts[i]:starts[i + 1]] for i, key in enumerate(manifest[f"{name}.keys"])
+            })
+
+def snapshot_file_id(path: str) -> Optional[tuple]:
+    """Changes whenever the file is replaced (new inode / mtime); None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
@@ -1,63 +1,463 @@
+import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, inspect, literal, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.core.database import AsyncReadSessionLocal
+from app.core.metrics import histogram
+from app.core.tracing import span
+from app.common.singleflight import SingleFlight
 from app.models.marketplace import Vendor, Package
+from app.services.auth_cache import VendorAuthCache
+from app.services.catalog_events import publish_catalog_change
+from app.services.location_index import LocationIndex
+from app.services.package_catalog import PackageCatalog, normalize_tags
+from app.services.match_scoring import MATCH_LIMIT, score_expression, text_match_sql, text_terms
+
+# 1. SETUP LOGGING
+logger = logging.getLogger(__name__)
+
+# 📊 Metrics
+MATCH_SECONDS = histogram(
+    "occacia_match_seconds",
+    "Venue match latency by source (catalog = in-memory snapshot, db / db_batch = Postgres).",
+    ("source",),
+)
+
+# Columns a matched venue is served from (VenueDisplay + id): rows, not ORM objects,
+# so matching never loads full Package instances or their vendor relationship
+VENUE_COLUMNS = (Package.id, Package.name, Package.description, Package.price_per_head, Package.tags)
+
+# Budget label -> (low, high, low_inclusive, high_inclusive) on Package.price
+BUDGET_BUCKETS = {
+    "Cheap": (None, 3000, True, False),
+    "Moderate": (3000, 10000, True, True),
+    "Luxury": (10000, None, False, True),
+}
 
 class VendorService:
-    def find_perfect_matches(self, db: Session, analysis: dict):
+    def __init__(self, catalog: PackageCatalog = None, locations: LocationIndex = None):
+        # 📦 Optional in-memory snapshot; when loaded, matching never touches Postgres
+        self.catalog = catalog
+        # 📍 Optional location index; when loaded, "Kandy City" filters on vendors.location_id
+        self.locations = locations
+
+    def extract_criteria(self, analysis: dict):
         """
-        Takes the AI dictionary and queries the database.
+        Takes the AI dictionary and pulls out the search criteria (or None if nothing to search).
         ✅ FIXED: Uses .get() to safely handle dictionaries (No more AttributeErrors)
         """
-        
-        print(f"🕵️ Vendor Service analyzing: {analysis}")
+
+        logger.debug(f"🕵️ Vendor Service analyzing: {analysis}")
 
         # 1. SAFETY CHECK: Ensure analysis is a dictionary
         if not analysis or not isinstance(analysis, dict):
-            print("⚠️ Analysis is empty or invalid. Returning empty list.")
-            return []
+            logger.warning("⚠️ Analysis is empty or invalid. Returning empty list.")
+            return None
 
         # 2. CHECK FOR FAILURE FLAGS
         # We use .get("key", default) to prevent crashes if the key is missing
         missing_info = analysis.get("missing_info", [])
         if "SERVICE_UNAVAILABLE" in missing_info:
-            return []
+            return None
 
         # 3. EXTRACT CRITERIA (Safely)
         # Handles both "location" (from AI) and "Any" (from fallback)
         loc = analysis.get("location")
         if loc == "Any": loc = None
+        location_ids = self.resolve_location(loc, analysis.get("radius_km")) if loc else None
         
         budget = analysis.get("budget")
         if budget == "Any": budget = None
 
-        tags = analysis.get("tags", [])
+        # The AI sends "venue_tags"; older callers send "tags"
+        tags = analysis.get("venue_tags") or analysis.get("tags") or []
         if isinstance(tags, str): tags = [tags] # Handle single string case
+        tags = normalize_tags(tags)
 
-        # 4. BUILD QUERY
-        query = db.query(Package).join(Vendor)
+        return {
+            "location": None if location_ids else loc,  # free text only when it didn't resolve
+            "location_ids": location_ids,
+            "price_range": BUDGET_BUCKETS.get(budget),
+            "tags": tags,
+            "budget_per_head": self._as_number(analysis.get("budget_per_head"), float),
+            "guest_count": self._as_number(analysis.get("guest_count"), int),
+            # Free-form intent for full-text relevance (empty unless MATCH_TEXT_WEIGHT is set)
+            "text": text_terms(analysis.get("keywords"), analysis.get("event_type"), tags),
+        }
 
-        # -- Filter by Location --
-        if loc:
-            query = query.filter(Vendor.location_base.ilike(f"%{loc}%"))
+    def resolve_location(self, location: str, radius_km=None):
+        """Location ids for the AI's location (+ nearby places), or None to fall back to ILIKE."""
+        if self.locations is None or not self.locations.ready:
+            return None
+        km = self._as_number(radius_km, float) or settings.LOCATION_NEARBY_KM
+        return self.locations.ids_near(location, km)
+
+    @staticmethod
+    def criteria_key(criteria: dict) -> tuple:
+        """Hashable identity of a search: same key == same SQL, same rows."""
+        return tuple(
+            tuple(value) if isinstance(value, (list, tuple)) else value
+            for _, value in sorted(criteria.items())
+        )
+
+    @staticmethod
+    def _as_number(value, cast):
+        try:
+            return max(cast(value or 0), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def apply_filters(self, query, criteria: dict):
+        """Hard filters shared by every match query (each one index-backed)."""
+        # -- Filter by Location (b-tree on vendors.location_id, else pg_trgm index) --
+        if criteria.get("location_ids"):
+            query = query.where(Vendor.location_id.in_(criteria["location_ids"]))
+        elif criteria["location"]:
+            query = query.where(Vendor.location_base.ilike(f"%{criteria['location']}%"))
 
         # -- Filter by Budget --
-        if budget == "Cheap":
-            query = query.filter(Package.price < 3000)
-        elif budget == "Moderate":
-            query = query.filter(Package.price.between(3000, 10000))
-        elif budget == "Luxury":
-            query = query.filter(Package.price > 10000)
-
-        # -- Filter by Vibe/Tags (Simple Keyword Search) --
-        # If we have tags, try to find packages that match at least one
-        if tags:
-            # This creates a dynamic OR filter for tags
-            tag_filters = [Package.tags.contains([t]) for t in tags]
-            if tag_filters:
-                query = query.filter(or_(*tag_filters))
-
-        results = query.limit(5).all()
-        print(f"✅ Found {len(results)} matches in DB.")
+        if criteria["price_range"]:
+            low, high, low_inclusive, high_inclusive = criteria["price_range"]
+            if low is not None:
+                query = query.where(Package.price >= low if low_inclusive else Package.price > low)
+            if high is not None:
+                query = query.where(Package.price <= high if high_inclusive else Package.price < high)
+
+        # -- Filter by Vibe/Tags (GIN indexes) --
+        # Only packages sharing at least one tag (tags && ARRAY[...]) or, with full-text
+        # matching on, whose name/description mentions the intent (search_vector @@ ...)
+        vibe = []
+        if criteria["tags"]:
+            vibe.append(Package.tags.overlap(criteria["tags"]))
+        if criteria.get("text"):
+            vibe.append(text_match_sql(criteria["text"]))
+        if vibe:
+            query = query.where(or_(*vibe))
+
+        # -- Planning session follow-ups: only the previous turn's candidates (primary key) --
+        if criteria.get("package_ids") is not None:
+            query = query.where(Package.id.in_(criteria["package_ids"]))
+
+        return query
+
+    def build_match_query(self, criteria: dict, limit: int = MATCH_LIMIT):
+        """
+        Builds the ranked matching SELECT. Shared by the sync and async services so both run the same SQL.
+        Hard filters narrow the rows, then rows are ordered by match score.
+        Returns light VENUE_COLUMNS rows (attribute access works like on a Package).
+        """
+        query = self.apply_filters(select(*VENUE_COLUMNS).join(Vendor), criteria)
+
+        # -- Rank: tag overlap + price-per-head fit + guest-count fit --
+        score = score_expression(criteria)
+        return query.order_by(score.desc(), Package.id).limit(limit)
+
+    def build_batch_match_query(self, criteria_list: list, limit: int = MATCH_LIMIT):
+        """
+        One statement for many searches: a UNION ALL of each search's ranked top-N ids
+        (tagged with its slot number), joined back to packages.
+        Rows come back as VENUE_COLUMNS + slot, best match first within each slot.
+        """
+        ranked = []
+        for slot, criteria in enumerate(criteria_list):
+            score = score_expression(criteria)
+            ranked.append(
+                self.apply_filters(
+                    select(literal(slot).label("slot"), Package.id.label("package_id"), score).join(Vendor),
+                    criteria,
+                )
+                .order_by(score.desc(), Package.id)
+                .limit(limit)
+            )
+        top = union_all(*ranked).subquery("top_matches")
+        return (
+            select(*VENUE_COLUMNS, top.c.slot)
+            .join(top, top.c.package_id == Package.id)
+            .order_by(top.c.slot, top.c.match_score.desc(), Package.id)
+        )
+
+    @staticmethod
+    def narrows(before: dict, after: dict) -> bool:
+        """
+        True when `after` can only match rows `before` could: same place, same or tighter
+        budget bucket, no new tags or free text. Both are any-of filters, so a new tag or
+        word lets in rows the last turn never saw.
+        """
+        return (
+            before["location"] == after["location"]
+            and before.get("location_ids") == after.get("location_ids")
+            and before["price_range"] in (None, after["price_range"])
+            and set(after["tags"]) <= set(before["tags"])
+            and set(after.get("text") or ()) <= set(before.get("text") or ())
+        )
+
+    @staticmethod
+    def same_scores(before: dict, after: dict) -> bool:
+        """True when every row scores as it did for `before` (the ranking inputs are unchanged)."""
+        return (
+            before["guest_count"] == after["guest_count"]
+            and before["budget_per_head"] == after["budget_per_head"]
+            and set(before["tags"]) == set(after["tags"])
+            and set(before.get("text") or ()) == set(after.get("text") or ())
+        )
+
+    def search_catalog(self, criteria: dict, limit: int = MATCH_LIMIT):
+        """Serves the match from memory, or returns None when no snapshot is loaded."""
+        if self.catalog is None or not self.catalog.ready:
+            return None
+        if criteria.get("text"):
+            return None  # text relevance is ranked by Postgres (the snapshot has no tsvector)
+        if criteria.get("location_ids"):
+            # The snapshot indexes vendors' free-text locations: keep those that resolve to the ids
+            keys = self.locations.keys_in(self.catalog.location_keys(), criteria["location_ids"])
+            criteria = dict(criteria, location_keys=keys)
+        with MATCH_SECONDS.time("catalog"), span("catalog"):
+            results = self.catalog.search(criteria, limit=limit)
+        logger.info(f"✅ Found {len(results)} matches in catalog snapshot.")
         return results
 
-vendor_service = VendorService()
\ No newline at end of file
+    def find_perfect_matches(self, db: Session, analysis: dict):
+        criteria = self.extract_criteria(analysis)
+        if criteria is None:
+            return []
+
+        results = self.search_catalog(criteria)
+        if results is not None:
+            return results
+
+        with MATCH_SECONDS.time("db"), span("db"):
+            results = db.execute(self.build_match_query(criteria)).all()
+        logger.info(f"✅ Found {len(results)} matches in DB.")
+        return results
+
+class AsyncVendorService(VendorService):
+    """
+    Same matching rules, but on an AsyncSession: the route awaits the DB instead of
+    blocking the event loop (other requests' Langflow awaits keep moving meanwhile).
+    Concurrent identical searches share one DB query (single-flight).
+    """
+
+    def __init__(self, catalog: PackageCatalog = None, locations: LocationIndex = None,
+                 session_factory=AsyncReadSessionLocal):
+        super().__init__(catalog, locations)
+        self.single_flight = SingleFlight("match_query")
+        # Coalesced queries run on their own session, never on one caller's request session
+        self.session_factory = session_factory
+
+    async def find_perfect_matches(self, db: AsyncSession, analysis: dict):
+        criteria = self.extract_criteria(analysis)
+        if criteria is None:
+            return []
+
+        results = self.search_catalog(criteria)
+        if results is not None:
+            return results
+
+        # One query serves every identical concurrent search. It opens its own session: the
+        # first caller's request (and its session) can end while the others still wait
+        results = await self.single_flight.do(self.criteria_key(criteria), lambda: self._shared_query(criteria))
+        return list(results)
+
+    async def _shared_query(self, criteria: dict) -> list:
+        async with self.session_factory() as db:
+            # Rows are plain column tuples: nothing in them refers back to the session
+            return await self._query_matches(db, criteria)
+
+    async def find_matches_batch(self, db: AsyncSession, analyses: list) -> list:
+        """
+        Resolves many analyses at once: catalog hits are served from memory and every
+        remaining (distinct) search goes to Postgres in ONE round trip.
+        Returns one list of packages per analysis, in the same order.
+        """
+        results = [[] for _ in analyses]
+        pending = {}  # criteria key -> (criteria, [positions in `analyses`])
+
+        for i, analysis in enumerate(analyses):
+            criteria = self.extract_criteria(analysis)
+            if criteria is None:
+                continue
+            from_catalog = self.search_catalog(criteria)
+            if from_catalog is not None:
+                results[i] = from_catalog
+                continue
+            pending.setdefault(self.criteria_key(criteria), (criteria, []))[1].append(i)
+
+        if pending:
+            searches = list(pending.values())
+            with MATCH_SECONDS.time("db_batch"), span("db"):
+                rows = (await db.execute(self.build_batch_match_query([criteria for criteria, _ in searches]))).all()
+            found = [[] for _ in searches]
+            for row in rows:
+                found[row.slot].append(row)
+            for (_, positions), packages in zip(searches, found):
+                for i in positions:
+                    results[i] = list(packages)
+            logger.info(f"✅ Batch matched {len(searches)} distinct searches in one DB round trip.")
+
+        return results
+
+    async def find_session_matches(self, db: AsyncSession, analysis: dict, previous: dict = None,
+                                   candidate_ids=(), limit: int = MATCH_LIMIT) -> tuple:
+        """
+        One planning-session turn: (up to `limit` ranked rows, narrowed?).
+        When the new analysis only tightens `previous`, the last turn's `candidate_ids`
+        are re-filtered and re-ranked (a primary-key lookup, or a bisect per id in the
+        catalog) instead of searching everything again. An empty narrowed result, or a
+        change that widens the search (new place, other budget, new tags), falls back to a full search.
+
+        A candidate list that filled `limit` was cut off: with new scores ("make it 300
+        people") the best rows may be past the cut, and with the same scores the rows
+        after it are only missing when the narrowed list comes back short. Both search again.
+        """
+        criteria = self.extract_criteria(analysis)
+        if criteria is None:
+            return [], False
+
+        before = self.extract_criteria(previous) if previous else None
+        if candidate_ids and before is not None and self.narrows(before, criteria):
+            complete = len(candidate_ids) < limit
+            if complete or self.same_scores(before, criteria):
+                narrowed = await self._search(db, dict(criteria, package_ids=tuple(candidate_ids)), limit)
+                if narrowed and (complete or len(narrowed) >= limit):
+                    return narrowed, True
+        return await self._search(db, criteria, limit), False
+
+    async def _search(self, db: AsyncSession, criteria: dict, limit: int) -> list:
+        results = self.search_catalog(criteria, limit=limit)
+        if results is not None:
+            return results
+        return list(await self._query_matches(db, criteria, limit))
+
+    async def _query_matches(self, db: AsyncSession, criteria: dict, limit: int = MATCH_LIMIT):
+        with MATCH_SECONDS.time("db"), span("db"):
+            results = (await db.execute(self.build_match_query(criteria, limit))).all()
+        logger.info(f"✅ Found {len(results)} matches in DB.")
+        return results
+
+    async def iter_perfect_matches(self, db: AsyncSession, analysis: dict):
+        """Like find_perfect_matches, but yields each venue as soon as its row arrives (for streaming)."""
+        criteria = self.extract_criteria(analysis)
+        if criteria is None:
+            return
+
+        results = self.search_catalog(criteria)
+        if results is not None:
+            for package in results:
+                yield package
+            return
+
+        # Server-side cursor: rows are handed over as Postgres produces them
+        async for row in await db.stream(self.build_match_query(criteria)):
+            yield row
+
+# ==========================================
+# 👤 VENDOR ACCOUNTS (used by the auth router)
+# ==========================================
+def get_vendor_by_email(db: Session, email: str):
+    return db.execute(select(Vendor).where(Vendor.email == email)).scalar_one_or_none()
+
+def get_vendor_by_display_name(db: Session, name: str):
+    return db.execute(select(Vendor).where(Vendor.business_name == name)).scalar_one_or_none()
+
+def create_vendor(db: Session, vendor_data, hashed_password: str):
+    place = location_index.resolve(vendor_data.location_base)
+    vendor = Vendor(
+        business_name=vendor_data.business_name,
+        email=vendor_data.email,
+        location_base=vendor_data.location_base,
+        location_id=place.id if place is not None else None,
+        phone=vendor_data.phone,
+        hashed_password=hashed_password,
+    )
+    db.add(vendor)
+    db.commit()
+    db.refresh(vendor)
+    return vendor
+
+def update_password_hash(db: Session, vendor, hashed_password: str):
+    vendor.hashed_password = hashed_password
+    db.commit()
+
+# ==========================================
+# 📦 VENDOR PACKAGES (used by the packages router)
+# Every write bumps the catalog version + NOTIFYs in the same transaction
+# ==========================================
+def list_vendor_packages(db: Session, vendor_id: int) -> list:
+    return db.execute(select(Package).where(Package.vendor_id == vendor_id).order_by(Package.id)).scalars().all()
+
+def get_vendor_package(db: Session, vendor_id: int, package_id: int):
+    """The package, or None when it doesn't exist or belongs to another vendor."""
+    return db.execute(
+        select(Package).where(Package.id == package_id, Package.vendor_id == vendor_id)
+    ).scalar_one_or_none()
+
+DUPLICATE_PACKAGE_NAME = "You already have a package with this name."
+PACKAGE_NAME_CONSTRAINT = "uq_packages_vendor_name"
+FOREIGN_KEY_VIOLATION = "23503"
+
+class VendorGone(Exception):
+    """The vendor was deleted (e.g. on another worker, whose auth cache still knew it) mid-request."""
+
+def _raise_write_error(db: Session, error: IntegrityError):
+    """Only the name constraint is the vendor's mistake (400); anything else isn't reported as one."""
+    db.rollback()
+    diag = getattr(error.orig, "diag", None)
+    if getattr(diag, "constraint_name", None) == PACKAGE_NAME_CONSTRAINT:
+        raise ValueError(DUPLICATE_PACKAGE_NAME) from error
+    if getattr(error.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+        raise VendorGone() from error
+    raise error
+
+def create_package(db: Session, vendor_id: int, fields: dict):
+    package = Package(vendor_id=vendor_id, **fields)
+    db.add(package)
+    try:
+        db.flush()  # assigns the id the notification carries
+    except IntegrityError as e:
+        _raise_write_error(db, e)
+    publish_catalog_change(db, [package.id])
+    db.commit()
+    db.refresh(package)
+    return package
+
+def update_package(db: Session, package, changes: dict):
+    for field, value in changes.items():
+        setattr(package, field, value)
+    if package.min_guests is not None and package.max_guests is not None and package.min_guests > package.max_guests:
+        db.rollback()
+        raise ValueError("min_guests cannot be larger than max_guests")
+    try:
+        db.flush()
+    except IntegrityError as e:  # e.g. renamed onto another of the vendor's packages
+        _raise_write_error(db, e)
+    publish_catalog_change(db, [package.id])
+    db.commit()
+    db.refresh(package)
+    return package
+
+def delete_package(db: Session, package):
+    package_id = package.id
+    db.delete(package)
+    publish_catalog_change(db, [package_id])
+    db.commit()
+
+auth_cache = VendorAuthCache(
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+) if settings.AUTH_CACHE_ENABLED else None
+
+@event.listens_for(Vendor, "after_update")
+@event.listens_for(Vendor, "after_delete")
+def _invalidate_cached_vendor(mapper, connection, target):
+    """Any flush that changes a vendor drops its cached record (old and new email)."""
+    if auth_cache is None:
+        return
+    old_emails = inspect(target).attrs.email.history.deleted or ()
+    auth_cache.invalidate(target.email, *old_emails)
+
+package_catalog = PackageCatalog(settings.CATALOG_SNAPSHOT_PATH or None) if settings.CATALOG_CACHE_ENABLED else None
+location_index = LocationIndex(settings.LOCATION_MATCH_THRESHOLD)
+vendor_service = VendorService(package_catalog, location_index)
+async_vendor_service = AsyncVendorService(package_catalog, location_index)
@@ -0,0 +1,132 @@
+"""
+📈 LOAD DRIVER
+
+Fires requests at a running API with a fixed number of concurrent clients and
+summarizes latency (p50/p95/p99) and throughput per phase. Each phase also
+collects the API's Server-Timing spans (ai, langflow, db, catalog, match,
+serialize, ...), so a slow phase shows which path the time went to.
+"""
+import asyncio
+import math
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import httpx
+
+_TIMING_ENTRY = re.compile(r"\s*([\w-]+)\s*;.*?dur=([\d.]+)")
+
+def nearest_rank(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct * len(ordered) / 100)))
+    return ordered[rank - 1]
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'ai;dur=812.3, db;dur=4.1;desc="x2", total;dur=830.0' -> {"ai": 812.3, "db": 4.1, "total": 830.0}"""
+    timings = {}
+    for entry in (header or "").split(","):
+        match = _TIMING_ENTRY.match(entry)
+        if match is not None:
+            timings[match.group(1)] = float(match.group(2))
+    return timings
+
+@dataclass
+class PhaseResult:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    wall_seconds: float = 0.0
+    # span name -> its duration on each response that reported it
+    spans_ms: Dict[str, List[float]] = field(default_factory=dict)
+
+    def add_timings(self, header: str):
+        for name, duration in parse_server_timing(header).items():
+            self.spans_ms.setdefault(name, []).append(duration)
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies_ms) + self.errors
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank percentile in ms (0 when nothing succeeded)."""
+        return nearest_rank(self.latencies_ms, pct)
+
+    def summary(self) -> dict:
+        return {
+            "phase": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rps": round(self.rps, 1),
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "p99_ms": round(self.percentile(99), 1),
+            "spans": {
+                name: {
+                    "seen": len(values),
+                    "p50_ms": round(nearest_rank(values, 50), 1),
+                    "p95_ms": round(nearest_rank(values, 95), 1),
+                }
+                for name, values in self.spans_ms.items()
+            },
+        }
+
+async def run_phase(client: httpx.AsyncClient, name: str, make_request: Callable[[int], dict],
+                    total: int, concurrency: int) -> PhaseResult:
+    """
+    make_request(i) -> {"method": ..., "url": ..., "json": ...} for request number i.
+    `concurrency` workers pull request numbers until `total` have been sent.
+    """
+    result = PhaseResult(name)
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            spec = make_request(i)
+            started = time.perf_counter()
+            try:
+                response = await client.request(spec.pop("method", "POST"), spec.pop("url"), **spec)
+                await response.aread()
+                ok = response.status_code < 400
+                result.add_timings(response.headers.get("server-timing"))
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                result.latencies_ms.append((time.perf_counter() - started) * 1000)
+            else:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+def format_table(results: List[PhaseResult]) -> str:
+    header = f"{'phase':<18}{'reqs':>7}{'errs':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        s = r.summary()
+        lines.append(
+            f"{s['phase']:<18}{s['requests']:>7}{s['errors']:>6}{s['rps']:>9}"
+            f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}"
+        )
+    return "\n".join(lines)
+
+def format_breakdown(results: List[PhaseResult]) -> str:
+    """Per-phase Server-Timing spans: where each phase spends its time (AI vs DB vs serialization)."""
+    header = f"{'phase':<18}{'span':<15}{'seen':>7}{'p50 ms':>10}{'p95 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        spans = r.summary()["spans"]
+        # Biggest first; "total" (the whole request) last
+        for name in sorted(spans, key=lambda n: (n == "total", -spans[n]["p50_ms"])):
+            s = spans[name]
+            lines.append(f"{r.name:<18}{name:<15}{s['seen']:>7}{s['p50_ms']:>10}{s['p95_ms']:>10}")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+"""
+🏁 END-TO-END LOAD BENCHMARK
+
+Starts the Langflow stub and the API as separate processes, optionally loads a
+synthetic catalog, then drives concurrent load through these phases:
+
+  chat             unique small-talk queries      -> AI path only
+  planning         unique planning queries        -> AI + match query + serialization
+  planning-cached  a few repeated planning queries -> AI cache hit, match + serialization
+  stream-ttfb      /planning/generate/stream      -> time to the first SSE event
+
+Every phase also reads the API's Server-Timing header, and a second table splits
+each phase's time into its spans (ai/langflow, db/catalog, match, serialize), so
+the AI, DB and serialization paths can be watched separately.
+
+    python -m benchmarks.run --requests 400 --concurrency 32 --catalog-size 20000 --reset-catalog
+
+DATABASE_URL must point at a database you don't mind filling (--reset-catalog truncates it).
+Use --app-url to benchmark an API that is already running instead of spawning one.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.load import PhaseResult, format_breakdown, format_table, run_phase
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def spawn(module_app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", module_app, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+
+def wait_until_up(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+async def measure_ttfb(client: httpx.AsyncClient, total: int, concurrency: int) -> PhaseResult:
+    """Latency here is time-to-first-event, not time-to-last-byte."""
+    result = PhaseResult("stream-ttfb")
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                async with client.stream("POST", "/planning/generate/stream",
+                                         json={"user_query": f"romantic dinner for two #{i}-ttfb"}) as response:
+                    first = True
+                    async for _ in response.aiter_bytes():
+                        if first:
+                            result.latencies_ms.append((time.perf_counter() - started) * 1000)
+                            first = False
+            except httpx.HTTPError:
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.wall_seconds = time.perf_counter() - started
+    return result
+
+async def drive(app_url: str, total: int, concurrency: int) -> list:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=120, limits=limits) as client:
+        plan = lambda q: {"method": "POST", "url": "/planning/generate", "json": {"user_query": q}}
+        phases = [
+            await run_phase(client, "chat", lambda i: plan(f"hello there #{i}"), total, concurrency),
+            await run_phase(client, "planning", lambda i: plan(f"a night out with friends #{i}"), total, concurrency),
+            await run_phase(client, "planning-cached", lambda i: plan(f"a night out with friends #{i % 5}"), total, concurrency),
+            await measure_ttfb(client, max(1, total // 4), concurrency),
+        ]
+    return phases
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end load benchmark for /planning/generate.")
+    parser.add_argument("--requests", type=int, default=200, help="requests per phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--catalog-size", type=int, default=0, help="synthetic packages to load (0 = keep current data)")
+    parser.add_argument("--reset-catalog", action="store_true")
+    parser.add_argument("--stub-latency-ms", type=float, default=800)
+    parser.add_argument("--stub-jitter-ms", type=float, default=200)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-port", type=int, default=7861)
+    parser.add_argument("--app-port", type=int, default=8001)
+    parser.add_argument("--app-url", help="benchmark an already running API instead of spawning one")
+    parser.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra env for the spawned API, e.g. CATALOG_CACHE_ENABLED=false")
+    parser.add_argument("--json", dest="json_path", help="also write the summary as JSON here")
+    args = parser.parse_args(argv)
+
+    if args.catalog_size:
+        from benchmarks.synthetic_catalog import build
+        print(f"🏭 Loading {args.catalog_size} synthetic packages...")
+        build(args.catalog_size, reset=args.reset_catalog)
+
+    processes = []
+    try:
+        app_url = args.app_url
+        if not app_url:
+            stub = spawn("benchmarks.stub_langflow:app", args.stub_port, {
+                "STUB_LATENCY_MS": str(args.stub_latency_ms),
+                "STUB_JITTER_MS": str(args.stub_jitter_ms),
+                "STUB_ERROR_RATE": str(args.stub_error_rate),
+            })
+            processes.append(stub)
+            app_env = {"LANGFLOW_URL": f"http://127.0.0.1:{args.stub_port}/api/v1/run/bench"}
+            app_env.update(kv.split("=", 1) for kv in args.app_env)
+            processes.append(spawn("app.main:app", args.app_port, app_env))
+            app_url = f"http://127.0.0.1:{args.app_port}"
+        wait_until_up(f"{app_url}/health")
+
+        print(f"🏁 {args.requests} requests/phase, concurrency {args.concurrency}, "
+              f"stub latency {args.stub_latency_ms}±{args.stub_jitter_ms}ms, errors {args.stub_error_rate:.0%}")
+        results = asyncio.run(drive(app_url, args.requests, args.concurrency))
+        print(format_table(results))
+        print()
+        print(format_breakdown(results))
+
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump([r.summary() for r in results], f, indent=2)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=15)
+
+if __name__ == "__main__":
+    main()
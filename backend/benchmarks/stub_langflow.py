@@ -0,0 +1,86 @@
+"""
+🎭 LOCAL LANGFLOW STAND-IN
+
+A tiny FastAPI app that answers like our Langflow flow does
+(outputs[0].outputs[0].results.message.text holding the JSON plan), with
+configurable latency, jitter and error rate. Used by the load benchmark.
+
+    STUB_LATENCY_MS=800 STUB_JITTER_MS=300 STUB_ERROR_RATE=0.02 \\
+        uvicorn benchmarks.stub_langflow:app --port 7860
+
+Answers are derived from the query text, so the same query always gets the
+same plan (the app's response cache behaves like it would in production).
+Queries that look like small talk get a "chat" answer.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "800"))
+JITTER_MS = float(os.getenv("STUB_JITTER_MS", "200"))
+ERROR_RATE = float(os.getenv("STUB_ERROR_RATE", "0"))
+
+LOCATIONS = ["Kandy", "Colombo", "Galle", "Bentota", "Ella", "Negombo", "Nuwara Eliya", "Jaffna"]
+TAGS = ["romantic", "quiet", "outdoor", "party", "family", "luxury", "budget", "wifi", "garden", "rooftop"]
+CHAT_WORDS = ("hi", "hello", "thanks", "who are you")
+
+app = FastAPI(title="Langflow Stub")
+
+def fake_plan(query: str) -> dict:
+    lowered = query.lower()
+    if any(lowered.startswith(word) for word in CHAT_WORDS):
+        return {
+            "intent": "chat",
+            "reasoning": "Small talk.",
+            "chat_response": "Hello! Tell me about the event you have in mind and I'll find a place.",
+            "venue_tags": [],
+        }
+
+    # Stable per query: same text -> same plan
+    rng = random.Random(hashlib.sha1(query.encode()).hexdigest())
+    return {
+        "intent": "planning",
+        "reasoning": "Stub analysis.",
+        "event_type": rng.choice(["date", "birthday", "meeting", "family day"]),
+        "location": rng.choice(LOCATIONS),
+        "budget_per_head": rng.choice([1500, 3000, 5000, 12000]),
+        "guest_count": rng.randint(2, 40),
+        "venue_tags": rng.sample(TAGS, 2),
+        "missing_info": [],
+        "chat_response": "Here are some places that fit what you described.",
+    }
+
+def langflow_envelope(text: str) -> dict:
+    return {"outputs": [{"outputs": [{"results": {"message": {"text": text}}}]}]}
+
+async def simulated_latency():
+    delay = max(0.0, LATENCY_MS + random.uniform(-JITTER_MS, JITTER_MS)) / 1000
+    await asyncio.sleep(delay)
+
+@app.post("/{path:path}")
+async def run_flow(path: str, request: Request):
+    body = await request.json()
+    query = body.get("input_value", "")
+
+    if random.random() < ERROR_RATE:
+        await simulated_latency()
+        return JSONResponse(status_code=503, content={"detail": "stub: simulated upstream failure"})
+
+    text = "```json\n" + json.dumps(fake_plan(query)) + "\n```"
+
+    if request.query_params.get("stream") == "true":
+        async def events():
+            await simulated_latency()
+            for i in range(0, len(text), 12):
+                yield json.dumps({"event": "token", "data": {"chunk": text[i:i + 12]}}) + "\n"
+                await asyncio.sleep(0.005)
+            yield json.dumps({"event": "end", "data": {"result": langflow_envelope(text)}}) + "\n"
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    await simulated_latency()
+    return langflow_envelope(text)
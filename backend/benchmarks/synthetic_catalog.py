@@ -0,0 +1,73 @@
+"""
+🏭 SYNTHETIC CATALOG
+
+Writes N vendors / M packages as JSONL (deterministic for a given seed) and
+loads them with the bulk importer.
+
+    python -m benchmarks.synthetic_catalog --packages 100000 --reset
+
+--reset TRUNCATEs vendors and packages first. Only point it at a throwaway database.
+"""
+import argparse
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.scripts.bulk_import import import_packages, import_vendors
+from benchmarks.stub_langflow import LOCATIONS, TAGS
+
+def write_catalog(directory: Path, packages: int, packages_per_vendor: int = 5, seed: int = 7):
+    rng = random.Random(seed)
+    vendors = max(1, packages // packages_per_vendor)
+    vendors_path = directory / "vendors.jsonl"
+    packages_path = directory / "packages.jsonl"
+
+    with open(vendors_path, "w") as f:
+        for v in range(vendors):
+            f.write(json.dumps({
+                "business_name": f"Bench Vendor {v}",
+                "email": f"vendor{v}@bench.occacia.lk",
+                "location_base": rng.choice(LOCATIONS),
+                "is_verified": True,
+            }) + "\n")
+
+    with open(packages_path, "w") as f:
+        for p in range(packages):
+            price = rng.choice([800, 1500, 2500, 4000, 6500, 9000, 15000, 25000])
+            low = rng.randint(1, 20)
+            f.write(json.dumps({
+                "vendor_email": f"vendor{p % vendors}@bench.occacia.lk",
+                "name": f"Bench Package {p}",
+                "description": "Synthetic package used by the load benchmark. " * rng.randint(1, 6),
+                "price": price,
+                "price_per_head": price if rng.random() < 0.5 else None,
+                "min_guests": low,
+                "max_guests": low + rng.randint(0, 60),
+                "tags": rng.sample(TAGS, rng.randint(1, 4)),
+            }) + "\n")
+
+    return vendors_path, packages_path
+
+def build(packages: int, reset: bool = False, seed: int = 7):
+    if reset:
+        with engine.begin() as conn:
+            conn.execute(text("TRUNCATE packages, vendors RESTART IDENTITY CASCADE"))
+    with tempfile.TemporaryDirectory() as tmp:
+        vendors_path, packages_path = write_catalog(Path(tmp), packages, seed=seed)
+        import_vendors(str(vendors_path), method="copy")
+        import_packages(str(packages_path), method="copy")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and load a synthetic catalog.")
+    parser.add_argument("--packages", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reset", action="store_true", help="TRUNCATE vendors/packages first")
+    args = parser.parse_args(argv)
+    build(args.packages, reset=args.reset, seed=args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""baseline schema (vendors + packages)
+
+Revision ID: 0001_baseline_schema
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Existing databases already have these tables (created by Base.metadata.create_all
+at startup), so everything here is IF NOT EXISTS.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline_schema"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "vendors",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("business_name", sa.String()),
+        sa.Column("location_base", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("is_verified", sa.Boolean()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_vendors_id", "vendors", ["id"], if_not_exists=True)
+    op.create_index("ix_vendors_business_name", "vendors", ["business_name"], if_not_exists=True)
+    op.create_index("ix_vendors_email", "vendors", ["email"], unique=True, if_not_exists=True)
+
+    op.create_table(
+        "packages",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("vendor_id", sa.Integer(), sa.ForeignKey("vendors.id")),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("price", sa.Float()),
+        sa.Column("price_per_head", sa.Float(), nullable=True),
+        sa.Column("min_guests", sa.Integer()),
+        sa.Column("max_guests", sa.Integer()),
+        sa.Column("tags", postgresql.ARRAY(sa.String())),
+        sa.Column("location_coverage", sa.String(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_packages_id", "packages", ["id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("packages")
+    op.drop_table("vendors")
@@ -0,0 +1,41 @@
+"""indexes for ranked package matching
+
+Revision ID: 0002_match_indexes
+Revises: 0001_baseline_schema
+Create Date: 2026-10-18 09:30:00.000000
+
+- GIN on packages.tags: serves the `tags && ARRAY[...]` overlap prefilter.
+- pg_trgm GIN on vendors.location_base: serves `ILIKE '%loc%'`, which a b-tree can't.
+Built CONCURRENTLY so a large catalog keeps serving reads during the upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_match_indexes"
+down_revision: Union[str, Sequence[str], None] = "0001_baseline_schema"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_packages_tags_gin "
+            "ON packages USING gin (tags)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vendors_location_base_trgm "
+            "ON vendors USING gin (location_base gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_vendors_location_base_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_packages_tags_gin")
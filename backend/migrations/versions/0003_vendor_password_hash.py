@@ -0,0 +1,29 @@
+"""vendor password hashes
+
+Revision ID: 0003_vendor_password_hash
+Revises: 0002_match_indexes
+Create Date: 2026-10-18 14:00:00.000000
+
+Adds vendors.hashed_password (bcrypt) for /auth/vendors/login.
+Nullable: seeded and bulk-imported vendors have no password until they set one.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_vendor_password_hash"
+down_revision: Union[str, Sequence[str], None] = "0002_match_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE vendors ADD COLUMN IF NOT EXISTS hashed_password VARCHAR")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE vendors DROP COLUMN IF EXISTS hashed_password")
@@ -0,0 +1,42 @@
+"""indexes for keyset catalog browsing
+
+Revision ID: 0004_catalog_browse_indexes
+Revises: 0003_vendor_password_hash
+Create Date: 2026-10-18 16:00:00.000000
+
+- (effective price, id) on packages: GET /catalog/packages?sort=price reads each page
+  as one range scan from the cursor, in order, so page N costs the same as page 1.
+  The expression must match `BROWSE_PRICE` in app/services/catalog_service.py.
+- packages.vendor_id: the browse (and match) join to vendors for location.
+Built CONCURRENTLY so a large catalog keeps serving reads during the upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_catalog_browse_indexes"
+down_revision: Union[str, Sequence[str], None] = "0003_vendor_password_hash"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_packages_browse_price "
+            "ON packages ((COALESCE(price_per_head, price, 'Infinity'::double precision)), id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_packages_vendor_id "
+            "ON packages (vendor_id, id)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_packages_vendor_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_packages_browse_price")
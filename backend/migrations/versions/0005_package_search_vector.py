@@ -0,0 +1,45 @@
+"""full-text search over package names and descriptions
+
+Revision ID: 0005_package_search_vector
+Revises: 0004_catalog_browse_indexes
+Create Date: 2026-10-18 17:30:00.000000
+
+- packages.search_vector: generated (STORED) tsvector, name weighted A, description B.
+  Postgres recomputes it on every insert/update, so no trigger and no app code.
+  Adding it rewrites the table once (an ACCESS EXCLUSIVE lock for the duration).
+- GIN on search_vector: serves `search_vector @@ to_tsquery(...)` in venue matching.
+The expression must match `Package.search_vector` in app/models/marketplace.py.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_package_search_vector"
+down_revision: Union[str, Sequence[str], None] = "0004_catalog_browse_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "ALTER TABLE packages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_packages_search_vector_gin "
+            "ON packages USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_packages_search_vector_gin")
+    op.execute("ALTER TABLE packages DROP COLUMN IF EXISTS search_vector")
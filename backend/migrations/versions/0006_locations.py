@@ -0,0 +1,74 @@
+"""normalized locations referenced by vendors
+
+Revision ID: 0006_locations
+Revises: 0005_package_search_vector
+Create Date: 2026-10-18 19:00:00.000000
+
+- locations: canonical name, lowercase aliases, lat/lon (+ a (latitude, longitude)
+  b-tree for bounding-box range scans), seeded with the places vendors use today.
+- vendors.location_id: the vendor's location_base resolved to a location (indexed),
+  so location filters become equality lookups instead of ILIKE '%...%' scans.
+  Backfilled here by exact name/alias match; the app resolves new vendors fuzzily.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_locations"
+down_revision: Union[str, Sequence[str], None] = "0005_package_search_vector"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.services.location_index.KNOWN_LOCATIONS at this revision
+LOCATIONS = [
+    ("Colombo", ["colombo city", "cmb", "kolamba"], 6.9271, 79.8612),
+    ("Kandy", ["kandy city", "maha nuwara", "senkadagala"], 7.2906, 80.6337),
+    ("Galle", ["galle fort", "galla"], 6.0535, 80.2210),
+    ("Bentota", ["bentara"], 6.4258, 79.9958),
+    ("Ella", ["ella town"], 6.8667, 81.0466),
+    ("Negombo", ["meegamuwa", "migamuwa"], 7.2083, 79.8358),
+    ("Nuwara Eliya", ["nuwaraeliya", "little england"], 6.9497, 80.7891),
+    ("Jaffna", ["yalpanam", "yapanaya"], 9.6615, 80.0255),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    locations = op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+        sa.Column("aliases", postgresql.ARRAY(sa.String())),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_locations_id", "locations", ["id"], if_not_exists=True)
+    op.create_index("ix_locations_lat_lon", "locations", ["latitude", "longitude"], if_not_exists=True)
+    op.execute(
+        postgresql.insert(locations)
+        .values([
+            {"name": name, "aliases": aliases, "latitude": lat, "longitude": lon}
+            for name, aliases, lat, lon in LOCATIONS
+        ])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+
+    op.execute("ALTER TABLE vendors ADD COLUMN IF NOT EXISTS location_id INTEGER REFERENCES locations (id)")
+    op.create_index("ix_vendors_location_id", "vendors", ["location_id"], if_not_exists=True)
+    op.execute(
+        "UPDATE vendors v SET location_id = l.id FROM locations l "
+        "WHERE v.location_id IS NULL AND ("
+        "lower(trim(v.location_base)) = lower(l.name) OR lower(trim(v.location_base)) = ANY(l.aliases))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_vendors_location_id", table_name="vendors", if_exists=True)
+    op.execute("ALTER TABLE vendors DROP COLUMN IF EXISTS location_id")
+    op.drop_table("locations")
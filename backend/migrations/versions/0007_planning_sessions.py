@@ -0,0 +1,42 @@
+"""multi-turn planning sessions
+
+Revision ID: 0007_planning_sessions
+Revises: 0006_locations
+Create Date: 2026-10-18 21:00:00.000000
+
+- planning_sessions: one row per /planning/sessions conversation (accumulated AI
+  analysis as JSONB + the last turn's candidate package ids), so a follow-up can
+  land on any worker.
+- b-tree on updated_at: expiry checks and the periodic purge are range scans.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_planning_sessions"
+down_revision: Union[str, Sequence[str], None] = "0006_locations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "planning_sessions",
+        sa.Column("id", sa.String(length=32), primary_key=True),
+        sa.Column("analysis", postgresql.JSONB(), nullable=False),
+        sa.Column("candidate_ids", postgresql.ARRAY(sa.Integer())),
+        sa.Column("turns", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_planning_sessions_updated_at", "planning_sessions", ["updated_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("planning_sessions")
@@ -0,0 +1,37 @@
+"""catalog version bumped by every package write
+
+Revision ID: 0008_catalog_version
+Revises: 0007_planning_sessions
+Create Date: 2026-10-18 22:00:00.000000
+
+- catalog_version: one row (id=1). The vendor package API increments it in the
+  same transaction as the write and sends NOTIFY catalog_changes, so workers can
+  apply the change (and tell a missed notification from an old one).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_catalog_version"
+down_revision: Union[str, Sequence[str], None] = "0007_planning_sessions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "catalog_version",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        if_not_exists=True,
+    )
+    op.execute("INSERT INTO catalog_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("catalog_version")
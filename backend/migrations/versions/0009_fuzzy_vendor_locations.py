@@ -0,0 +1,92 @@
+"""link vendors whose location only resolves fuzzily
+
+Revision ID: 0009_fuzzy_vendor_locations
+Revises: 0008_catalog_version
+Create Date: 2026-10-19 09:00:00.000000
+
+- vendors.location_id: 0006 only backfilled exact name/alias matches, so vendors
+  stored as "Kandy, Sri Lanka" or "Colombo 07" kept a NULL location_id and dropped
+  out of location-filtered matches. Links them with a frozen copy of the app's
+  resolver at this revision (app.services.location_index): every comma-separated
+  part matched whole, so "Wellawatte" or "Kandy Road, Kadawatha" stay unlinked.
+"""
+import re
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from rapidfuzz import fuzz, process
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_fuzzy_vendor_locations"
+down_revision: Union[str, Sequence[str], None] = "0008_catalog_version"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.services.location_index's matching at this revision
+THRESHOLD = 85.0
+WORD = re.compile(r"[^\W\d_]+")
+LOCALITY_SUFFIXES = ("city", "town")
+MIN_FUZZY_LENGTH = 4
+
+
+def _lookup_part(aliases: dict, part: str):
+    words = WORD.findall(part)
+    phrases = [" ".join(words)]
+    if len(words) > 1 and words[-1] in LOCALITY_SUFFIXES:
+        phrases.append(" ".join(words[:-1]))
+    for phrase in phrases:
+        if phrase in aliases:
+            return aliases[phrase]
+    for phrase in phrases:
+        if len(phrase) < MIN_FUZZY_LENGTH:
+            continue
+        hit = process.extractOne(phrase, aliases.keys(), scorer=fuzz.ratio, score_cutoff=THRESHOLD)
+        if hit is not None:
+            return aliases[hit[0]]
+    return None
+
+
+def _resolve(aliases: dict, text: str):
+    key = " ".join(text.lower().split())
+    if key in aliases:
+        return aliases[key]
+    found = {_lookup_part(aliases, part) for part in key.split(",")} - {None}
+    return found.pop() if len(found) == 1 else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    aliases = {}
+    for loc_id, name, alias_list in conn.execute(sa.text("SELECT id, name, aliases FROM locations ORDER BY id")):
+        for alias in [name, *(alias_list or ())]:
+            aliases.setdefault(" ".join(alias.lower().split()), loc_id)
+    if not aliases:
+        return
+
+    by_place = defaultdict(list)
+    bases = conn.execute(sa.text(
+        "SELECT DISTINCT location_base FROM vendors WHERE location_id IS NULL AND location_base IS NOT NULL"
+    )).scalars()
+    for base in bases:
+        loc_id = _resolve(aliases, base)
+        if loc_id is not None:
+            by_place[loc_id].append(base)
+
+    for loc_id, names in by_place.items():
+        conn.execute(
+            sa.text(
+                "UPDATE vendors SET location_id = :loc_id "
+                "WHERE location_id IS NULL AND location_base IN :names"
+            ).bindparams(sa.bindparam("names", expanding=True)),
+            {"loc_id": loc_id, "names": names},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data only: the links stay valid under 0008
+    pass
@@ -0,0 +1,41 @@
+"""normalize packages.tags to the form matching searches
+
+Revision ID: 0010_normalize_package_tags
+Revises: 0009_fuzzy_vendor_locations
+Create Date: 2026-10-19 10:00:00.000000
+
+- packages.tags: matching lowercases the requested tags and filters with the
+  case-sensitive && operator, so stored "Romantic" never matched "romantic".
+  Rewrites every tag as package_catalog.normalize_tags does (lowercase, trimmed,
+  single spaces, blanks and repeats dropped, first-seen order kept). The API and
+  bulk import normalize on write from here on.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_normalize_package_tags"
+down_revision: Union[str, Sequence[str], None] = "0009_fuzzy_vendor_locations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NORMALIZED = r"regexp_replace(lower(btrim(t.tag)), '\s+', ' ', 'g')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        f"UPDATE packages SET tags = ARRAY("
+        f"  SELECT {NORMALIZED} FROM unnest(packages.tags) WITH ORDINALITY AS t(tag, n)"
+        f"  WHERE {NORMALIZED} <> '' GROUP BY {NORMALIZED} ORDER BY min(t.n)"
+        f")::varchar[] "
+        f"WHERE EXISTS (SELECT 1 FROM unnest(packages.tags) AS t(tag) WHERE t.tag IS DISTINCT FROM {NORMALIZED})"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The original spelling of each tag isn't kept
+    pass
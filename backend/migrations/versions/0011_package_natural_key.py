@@ -0,0 +1,42 @@
+"""unique (vendor_id, name) on packages: the bulk import's upsert key
+
+Revision ID: 0011_package_natural_key
+Revises: 0010_normalize_package_tags
+Create Date: 2026-10-19 11:00:00.000000
+
+- uq_packages_vendor_name: a vendor's package names are unique, so re-running a
+  bulk import updates its packages (ON CONFLICT (vendor_id, name)) instead of
+  inserting them all again. Existing duplicates are kept, not deleted: all but the
+  oldest get " (#<id>)" appended to their name first.
+Built CONCURRENTLY so a large catalog keeps serving reads during the upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_package_natural_key"
+down_revision: Union[str, Sequence[str], None] = "0010_normalize_package_tags"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "UPDATE packages p SET name = p.name || ' (#' || p.id || ')' "
+        "FROM packages older "
+        "WHERE older.vendor_id = p.vendor_id AND older.name = p.name AND older.id < p.id"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_packages_vendor_name "
+            "ON packages (vendor_id, name)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_packages_vendor_name")
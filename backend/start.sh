@@ -8,5 +8,6 @@ echo "🏗️  STAGING: Running Database Migrations..."
 alembic upgrade head
 
 echo "🚀 IGNITION: Starting FastAPI Engine..."
-# Bind to 0.0.0.0 so Nginx can reach the container
-uvicorn main:app --host 0.0.0.0 --port 8000
\ No newline at end of file
+# Multi-worker server (WEB_CONCURRENCY workers, graceful shutdown, shared catalog snapshot).
+# Bind to 0.0.0.0 so Nginx can reach the container; exec so SIGTERM reaches the supervisor.
+exec python -m app.serve --host 0.0.0.0 --port 8000
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.services.ai_service import AIService, ResponseCache, normalize_query
+
+PLAN = {"intent": "planning", "location": "Kandy", "venue_tags": ["romantic"]}
+
+def test_normalize_query_ignores_case_and_punctuation():
+    assert normalize_query("  Romantic dinner in kandy! ") == normalize_query("romantic dinner in Kandy")
+
+def test_cache_hit_miss_and_eviction_counters():
+    cache = ResponseCache(max_entries=2, ttl=60)
+    assert cache.lookup("a") is None
+    cache.store("a", PLAN)
+    cache.store("b", PLAN)
+    cache.store("c", PLAN)  # pushes "a" out
+
+    assert cache.lookup("A!") is None
+    assert cache.lookup("c") == PLAN
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+def test_cache_expires_entries():
+    cache = ResponseCache(max_entries=4, ttl=-1)
+    cache.store("romantic dinner", PLAN)
+    assert cache.lookup("romantic dinner") is None
+
+def test_fuzzy_lookup_is_opt_in():
+    strict = ResponseCache(max_entries=4, ttl=60)
+    strict.store("romantic dinner in kandy", PLAN)
+    assert strict.lookup("romantic dinners in kandy") is None
+
+    fuzzy = ResponseCache(max_entries=4, ttl=60, fuzzy_threshold=90)
+    fuzzy.store("romantic dinner in kandy", PLAN)
+    assert fuzzy.lookup("romantic dinners in kandy") == PLAN
+    assert fuzzy.stats()["fuzzy_hits"] == 1
+
+def test_fuzzy_lookup_needs_the_same_numbers_and_a_live_entry():
+    cache = ResponseCache(max_entries=4, ttl=60, fuzzy_threshold=90)
+    cache.store("birthday party in colombo for 20", PLAN)
+    assert cache.lookup("birthday party in colombo for 2") is None
+    assert cache.lookup("birthday party at colombo for 20") == PLAN
+
+    cache.set("birthday party in colombo for 30", PLAN, ttl=-1)  # already expired
+    assert cache.lookup("birthday party at colombo for 30") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["fuzzy_hits"], stats["misses"]) == (1, 1, 2)
+
+def test_only_well_formed_answers_are_cached():
+    cache = ResponseCache(max_entries=4, ttl=60)
+    cache.store("broken", {"reasoning": "no intent"})
+    cache.store("weird", {"intent": "unknown"})
+    assert len(cache) == 0
+
+def test_parse_error_fallback_is_not_cached():
+    service = AIService()
+    with patch.object(service, "_ask_langflow", AsyncMock(return_value=None)) as ask:
+        first = asyncio.run(service.generate_date_plan("hello"))
+        second = asyncio.run(service.generate_date_plan("hello"))
+
+    assert first["intent"] == "chat"
+    assert second == first
+    assert ask.await_count == 2
+    assert len(service.cache) == 0
+
+def test_repeat_query_skips_langflow():
+    service = AIService()
+    with patch.object(service, "_ask_langflow", AsyncMock(return_value=dict(PLAN))) as ask:
+        asyncio.run(service.generate_date_plan("Romantic dinner in Kandy"))
+        again = asyncio.run(service.generate_date_plan("romantic dinner in kandy!"))
+
+    assert again == PLAN
+    assert ask.await_count == 1
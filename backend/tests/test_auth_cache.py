@@ -0,0 +1,32 @@
+import time
+from types import SimpleNamespace
+
+from app.services.auth_cache import VendorAuthCache
+
+def vendor(**overrides):
+    fields = dict(id=1, business_name="Cinnamon Grand", email="events@cinnamon.lk",
+                  location_base="Colombo", is_verified=True, phone=None)
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+def test_vendor_is_served_until_invalidated():
+    cache = VendorAuthCache(ttl=60)
+    stored = cache.remember_vendor(vendor(), cache.generation)
+    assert cache.vendor("events@cinnamon.lk") == stored
+
+    cache.invalidate("events@cinnamon.lk")
+    assert cache.vendor("events@cinnamon.lk") is None
+
+def test_read_that_raced_with_a_write_is_not_cached():
+    cache = VendorAuthCache(ttl=60)
+    generation = cache.generation        # lookup starts
+    cache.invalidate("someone@else.lk")  # a vendor is updated meanwhile
+    cache.remember_vendor(vendor(), generation)
+    assert cache.vendor("events@cinnamon.lk") is None
+
+def test_token_entries_never_outlive_the_token():
+    cache = VendorAuthCache(ttl=60)
+    cache.remember_token("expired", "a@b.test", expires_at=time.time() - 1)
+    cache.remember_token("valid", "a@b.test", expires_at=time.time() + 600)
+    assert cache.email_for_token("expired") is None
+    assert cache.email_for_token("valid") == "a@b.test"
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI, Response
+
+from benchmarks import stub_langflow
+from benchmarks.load import PhaseResult, format_breakdown, nearest_rank, parse_server_timing, run_phase
+from app.services.ai_service import AIService
+
+def test_percentiles_and_summary_math():
+    assert [nearest_rank(list(range(10, 0, -1)), pct) for pct in (1, 50, 95, 99, 100)] == [1, 5, 10, 10, 10]
+    assert nearest_rank([7.0], 50) == 7.0 and nearest_rank([], 99) == 0.0
+
+    result = PhaseResult("planning", latencies_ms=[float(ms) for ms in range(1, 21)], errors=5, wall_seconds=5.0)
+    result.add_timings('ai;dur=812.5, db;dur=4.1;desc="x2", total;dur=830')
+    summary = result.summary()
+    assert (summary["requests"], summary["rps"], summary["p50_ms"], summary["p95_ms"]) == (25, 5.0, 10.0, 19.0)
+    assert summary["spans"]["db"] == {"seen": 1, "p50_ms": 4.1, "p95_ms": 4.1}
+    assert parse_server_timing("") == {} and parse_server_timing(None) == {}
+
+def test_run_phase_counts_errors_and_collects_server_timing():
+    app = FastAPI()
+
+    @app.post("/plan/{i}")
+    async def plan(i: int):
+        if i % 4 == 3:
+            return Response(status_code=503)
+        return Response("{}", headers={"server-timing": f"ai;dur={100 + i}, serialize;dur=0.5, total;dur={101 + i}"})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await run_phase(client, "planning", lambda i: {"url": f"/plan/{i}"}, total=8, concurrency=3)
+
+    result = asyncio.run(run())
+    assert (result.requests, result.errors, len(result.latencies_ms)) == (8, 2, 6)
+    assert sorted(result.spans_ms["ai"]) == [100, 101, 102, 104, 105, 106]
+    assert format_breakdown([result]).splitlines()[2].split()[:2] == ["planning", "ai"]  # biggest span first
+
+def test_stub_answers_in_the_shape_the_app_parses(monkeypatch):
+    monkeypatch.setattr(stub_langflow, "LATENCY_MS", 0)
+    monkeypatch.setattr(stub_langflow, "JITTER_MS", 0)
+    monkeypatch.setattr(stub_langflow, "ERROR_RATE", 0)
+    query = "a night out with friends #3"
+
+    async def run():
+        transport = httpx.ASGITransport(app=stub_langflow.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://stub") as client:
+            body = {"input_value": query}
+            plain = await client.post("/api/v1/run/bench", json=body)
+            streamed = await client.post("/api/v1/run/bench", params={"stream": "true"}, json=body)
+            return plain.json(), [json.loads(line) for line in streamed.text.splitlines()]
+
+    plain, events = asyncio.run(run())
+    plan = stub_langflow.fake_plan(query)
+    assert plan["intent"] == "planning" and AIService()._parse_output(plain) == plan
+    assert events[-1]["event"] == "end" and AIService()._parse_output(events[-1]["data"]["result"]) == plan
+    tokens = "".join(e["data"]["chunk"] for e in events if e["event"] == "token")
+    assert AIService()._parse_text(tokens) == plan
+    assert stub_langflow.fake_plan("hello there #1")["intent"] == "chat"
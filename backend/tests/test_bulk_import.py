@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from app.scripts.bulk_import import (
+    _pg_array, chunked, clean_package, clean_vendor, iter_records,
+    upsert_packages_copy, upsert_packages_insert, upsert_vendors_insert,
+)
+
+class RecordingConnection:
+    """Stands in for a Connection: keeps each statement (compiled for Postgres) and COPY payload."""
+
+    def __init__(self, vendor_ids: dict):
+        self.vendor_ids = vendor_ids
+        self.statements, self.copied = [], []
+        self.connection = SimpleNamespace(cursor=lambda: SimpleNamespace(copy_expert=self._copy))
+
+    def _copy(self, sql, buffer):
+        self.copied.append((sql, buffer.read()))
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt.compile(dialect=postgresql.dialect()))
+        self.statements.append((sql, params))
+        if sql.startswith("SELECT vendors.email"):
+            return SimpleNamespace(all=lambda: list(self.vendor_ids.items()))
+        if sql.startswith("WITH matched"):
+            # What the join finds: rows whose vendor exists
+            sent = [line.split(",")[0] for line in self.copied[-1][1].splitlines()]
+            return SimpleNamespace(scalar_one=lambda: sum(1 for email in sent if email in self.vendor_ids))
+        return None
+
+ROWS = [clean_package({"vendor_email": email, "name": name, "price": price, "tags": "quiet"}) for email, name, price in (
+    ("a@x.lk", "Loft", 3000),
+    ("a@x.lk", "Loft", 3500),  # re-sent in the same chunk: the last one wins
+    ("ghost@x.lk", "Nope", 1),
+    ("a@x.lk", " ", 1),
+)]
+
+def test_csv_rows_are_cleaned(tmp_path):
+    path = tmp_path / "packages.csv"
+    path.write_text(
+        "vendor_email,name,price,price_per_head,min_guests,max_guests,tags\n"
+        "Stay@Colonial.lk,Hermit,3500,,1,4,quiet|secluded\n"
+        "stay@colonial.lk,Garden,2000,500,,,\"[\"\"garden\"\", \"\"outdoor\"\"]\"\n"
+    )
+    first, second = [clean_package(r) for r in iter_records(str(path))]
+
+    assert first["vendor_email"] == "stay@colonial.lk"
+    assert first["price"] == 3500.0 and first["price_per_head"] is None
+    assert first["tags"] == ["quiet", "secluded"]
+    assert second["min_guests"] is None
+    assert second["tags"] == ["garden", "outdoor"]
+
+def test_jsonl_vendor_rows(tmp_path):
+    path = tmp_path / "vendors.jsonl"
+    path.write_text('{"business_name": "Cloud9", "email": "LOVE@cloud9.lk", "is_verified": "yes"}\n\n')
+    (vendor,) = [clean_vendor(r) for r in iter_records(str(path))]
+    assert vendor["email"] == "love@cloud9.lk"
+    assert vendor["is_verified"] is True
+
+def test_chunked_is_lazy_and_complete():
+    produced = []
+
+    def rows():
+        for i in range(7):
+            produced.append(i)
+            yield {"i": i}
+
+    chunks = chunked(rows(), 3)
+    assert len(next(chunks)) == 3
+    assert len(produced) == 3  # never reads ahead of the current chunk
+    assert [len(c) for c in chunks] == [3, 1]
+
+def test_copy_array_literal_escapes_quotes():
+    assert _pg_array(["quiet", 'a"b', "x,y"]) == '{"quiet","a\\"b","x,y"}'
+
+def test_insert_method_upserts_on_vendor_and_name():
+    conn = RecordingConnection({"a@x.lk": 7})
+    assert upsert_packages_insert(conn, ROWS) == (2, 2)  # ghost vendor and the nameless row are skipped
+    sql, params = conn.statements[-1]
+    assert "ON CONFLICT (vendor_id, name) DO UPDATE SET" in sql and "price = excluded.price" in sql
+    assert [(p["vendor_id"], p["name"], p["price"]) for p in params] == [(7, "Loft", 3500.0)]
+
+def test_copy_method_upserts_the_last_row_per_key():
+    conn = RecordingConnection({"a@x.lk": 7})
+    assert upsert_packages_copy(conn, ROWS) == (2, 2)
+    copy_sql, payload = conn.copied[0]
+    assert copy_sql.startswith("COPY import_packages (vendor_email, name,")
+    assert len(payload.splitlines()) == 3 and '"{""quiet""}"' in payload
+    sql, _ = conn.statements[-1]
+    assert "DISTINCT ON (vendor_id, name)" in sql and "ORDER BY vendor_id, name, line DESC" in sql
+    assert "ON CONFLICT (vendor_id, name) DO UPDATE SET" in sql
+
+def test_vendors_without_an_email_are_counted_as_skipped():
+    conn = RecordingConnection({})
+    rows = [clean_vendor({"business_name": n, "email": e}) for n, e in (("A", "a@x.lk"), ("B", " "), ("A2", "A@x.lk"))]
+    assert upsert_vendors_insert(conn, rows) == (1, 1)
+    assert "ON CONFLICT (email) DO UPDATE" in conn.statements[-1][0]
@@ -0,0 +1,35 @@
+import pytest
+from collections import namedtuple
+from sqlalchemy.dialects import postgresql
+from app.services.catalog_service import (
+    InvalidCursor, browse_filters, build_browse_query, decode_cursor, encode_cursor, page_of
+)
+
+def test_cursor_round_trips_exact_keys():
+    for key in (1234.5, 0.1 + 0.2, float("inf")):
+        assert decode_cursor(encode_cursor("price", key, 42), "price") == (key, 42)
+
+def test_cursor_is_rejected_for_another_sort_or_garbage():
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor("price", 10.0, 1), "score")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor", "price")
+
+def test_price_pages_seek_past_the_cursor_instead_of_offset():
+    filters = browse_filters("Galle", ["Romantic"], None, 5000, 2)
+    query = build_browse_query(filters, cursor=encode_cursor("price", 3000.0, 7), limit=10)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "OFFSET" not in sql
+    assert "(coalesce(packages.price_per_head, packages.price, 'Infinity'::double precision), packages.id) >" in sql
+    assert "LIMIT" in sql and query._limit_clause.value == 11  # one extra row = "is there a next page?"
+    assert filters["tags"] == ["romantic"]
+
+def test_page_has_next_cursor_only_when_more_rows_exist():
+    Row = namedtuple("Row", "id tags sort_key")  # same _fields/_asdict as a SQLAlchemy Row
+
+    rows = [Row(1, None, 10.0), Row(2, ["a"], 20.0), Row(3, [], 30.0)]
+    page = page_of(rows, "price", limit=2)
+    assert page["items"] == [{"id": 1, "tags": []}, {"id": 2, "tags": ["a"]}]
+    assert decode_cursor(page["next_cursor"], "price") == (20.0, 2)
+    assert page_of(rows, "price", limit=3)["next_cursor"] is None
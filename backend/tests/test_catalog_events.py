@@ -0,0 +1,40 @@
+from contextlib import nullcontext
+from app.services.catalog_events import parse_change
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+
+def row(pkg_id, tags, price=3000.0, location="Colombo"):
+    return (pkg_id, 1, f"Package {pkg_id}", None, price, price, 2, 50, tags, None, location)
+
+def make_catalog(rows_in_db: dict) -> tuple:
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot([row(1, ["party"]), row(2, ["quiet"]), row(3, ["party"])], version=(5, 3, 3))
+    reloads = []
+    catalog.fetch_rows = lambda db, ids: [rows_in_db[i] for i in ids if i in rows_in_db]
+    catalog.load_fresh = lambda session_factory: reloads.append(True)
+    return catalog, reloads
+
+def test_with_changes_replaces_inserts_and_deletes_in_id_order():
+    snapshot = CatalogSnapshot([row(1, ["party"]), row(2, ["quiet"]), row(3, ["party"])])
+    updated = snapshot.with_changes([row(2, ["party"], price=900.0), row(7, ["garden"])], [2, 3, 7])
+    assert list(updated.ids) == [1, 2, 7]
+    assert sorted(updated.tag_index) == ["garden", "party"] and list(updated.tag_index["party"]) == [0, 1]
+    assert list(updated.price_sorted) == [900.0, 3000.0, 3000.0]
+    assert list(snapshot.ids) == [1, 2, 3]  # the old snapshot is untouched
+
+def test_notified_versions_apply_in_place_and_gaps_reload():
+    catalog, reloads = make_catalog({2: row(2, ["garden"]), 4: row(4, ["party"])})
+    session_factory = lambda: nullcontext()
+
+    assert not catalog.apply_changes(session_factory, [(5, [1])])  # already have it
+    assert catalog.apply_changes(session_factory, [(7, [4]), (6, [2, 3])])  # a burst, out of order
+    assert catalog.version == (7, 3, 4) and list(catalog.snapshot.ids) == [1, 2, 4]
+    assert list(catalog.snapshot.tag_index["garden"]) == [1] and not reloads
+
+    catalog.apply_changes(session_factory, [(9, [1])])  # v8 never arrived
+    catalog.apply_changes(session_factory, [(8, None)])  # bulk import
+    assert len(reloads) == 2
+
+def test_parse_change_ignores_malformed_payloads():
+    assert parse_change('{"version": 3, "package_ids": [1, "2"]}') == (3, [1, 2])
+    assert parse_change('{"version": 4, "package_ids": null}') == (4, None)
+    assert parse_change("not json") is None and parse_change('{"package_ids": [1]}') is None
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.common.circuit_breaker import CLOSED, HALF_OPEN, OPEN, AdaptiveTimeout, CircuitBreaker
+from app.services.ai_service import AIService
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_breaker_opens_on_failure_rate_and_recovers_through_probes():
+    clock = Clock()
+    breaker = CircuitBreaker("t", window=10, min_calls=4, failure_rate=0.5, open_seconds=30, half_open_probes=2, clock=clock)
+    for ok in (True, False, True, False):
+        assert breaker.allow()
+        breaker.record(ok, 0.1)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock.now = 31
+    assert breaker.allow() and breaker.allow()   # two probe slots
+    assert breaker.state == HALF_OPEN and not breaker.allow()
+    breaker.record(True, 0.1)
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+def test_failed_or_slow_probe_reopens_and_cancelled_probe_frees_its_slot():
+    clock = Clock()
+    breaker = CircuitBreaker("t", min_calls=2, slow_call_seconds=5, slow_call_rate=1.0, half_open_probes=1, clock=clock)
+    breaker.record(True, 9)
+    breaker.record(True, 9)
+    assert breaker.state == OPEN  # every call was slow
+
+    clock.now = 100
+    assert breaker.allow()
+    breaker.release()              # cancelled: no verdict
+    assert breaker.allow()
+    breaker.record(True, 9)        # slow probe
+    assert breaker.state == OPEN and breaker.stats()["opened"] == 2
+
+def test_adaptive_timeout_follows_latency_within_bounds():
+    timeout = AdaptiveTimeout(minimum=2, maximum=45, percentile=90, multiplier=2, min_samples=10)
+    assert timeout.current() == 45
+    for _ in range(10):
+        timeout.observe(1.5)
+    assert timeout.current() == 3.0
+    for _ in range(10):
+        timeout.observe(60)
+    assert timeout.current() == 45
+
+def test_timeout_grows_back_after_langflow_gets_slower():
+    clock = Clock()
+    service = AIService()
+    service.timeout = AdaptiveTimeout(minimum=1, maximum=30, percentile=99, multiplier=2, window=20, min_samples=5)
+    service.breaker = CircuitBreaker("langflow", window=10, min_calls=5, failure_rate=0.5, open_seconds=30,
+                                     half_open_probes=1, clock=clock)
+
+    def call(latency: float) -> bool:
+        assert service._admit()
+        limit = service._call_timeout()
+        waited = min(latency, limit)
+        service._settle(latency <= limit, time.perf_counter() - waited, timed_out=latency > limit)
+        return latency <= limit
+
+    for _ in range(10):
+        call(1.0)
+    assert service._call_timeout() == pytest.approx(2.0, rel=0.01)
+
+    # Langflow now takes 5s: each timeout is a sample at the time waited, so the limit climbs past it
+    assert [call(5.0) for _ in range(4)] == [False, False, True, True]
+    assert service.breaker.state == CLOSED
+
+    # An outage (fast 500s) opens the breaker. Langflow comes back slower than the learned limit:
+    # the probe gets the full allowance, and closing starts the samples over
+    while service.breaker.state == CLOSED:
+        assert service._admit()
+        service._settle(False, time.perf_counter() - 0.1)
+    assert service.timeout.current() < 15
+    clock.now += 31
+    assert call(15.0) and service.breaker.state == CLOSED
+    assert service._call_timeout() == 30
+    assert service._call_timeout() == 30
+
+def test_open_circuit_fails_fast_with_service_unavailable():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        service = AIService()
+        service.cache = None
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service.breaker = CircuitBreaker("langflow", min_calls=1, failure_rate=1.0, open_seconds=60)
+        try:
+            await service.generate_date_plan("romantic dinner")
+        except httpx.HTTPStatusError:
+            pass
+        return await service.generate_date_plan("romantic dinner")
+
+    answer = asyncio.run(run())
+    assert len(calls) == 1  # no retries into the open breaker, no call once open
+    assert answer["missing_info"] == ["SERVICE_UNAVAILABLE"]
@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+from app.common.circuit_breaker import CircuitBreaker
+from app.services.ai_service import AIService
+from app.services.intent_extractor import LocalIntentExtractor
+from app.services.location_index import KNOWN_LOCATIONS, LocationIndex
+
+def make_extractor() -> LocalIntentExtractor:
+    index = LocationIndex(threshold=85)
+    index.build((i, name, aliases, lat, lon) for i, (name, aliases, lat, lon) in enumerate(KNOWN_LOCATIONS, 1))
+    return LocalIntentExtractor(index)
+
+def test_extracts_the_fields_planning_consumes():
+    analysis, confidence = make_extractor().extract("Quiet garden lunch in Negombo for 12, Rs 3,000 pp")
+    assert confidence > 0.9
+    assert analysis["intent"] == "planning" and analysis["location"] == "Negombo"
+    assert analysis["guest_count"] == 12 and analysis["budget_per_head"] == 3000
+    assert analysis["venue_tags"] == ["quiet", "garden"]
+
+    # A total budget is split over the guests; misspelt places still resolve
+    analysis, _ = make_extractor().extract("corporate meeting in kandyy, 40 people, budget 200k")
+    assert (analysis["location"], analysis["guest_count"], analysis["budget_per_head"]) == ("Kandy", 40, 5000)
+
+def test_scaled_amounts_and_stay_lengths():
+    extractor = make_extractor()
+    analysis, _ = extractor.extract("wedding in Kandy for 150 guests, budget 5 lakhs")
+    assert (analysis["guest_count"], analysis["budget_per_head"]) == (150, 3333.33)
+    assert extractor.extract("gala dinner in Colombo for 100, rs 2.5 million")[0]["budget_per_head"] == 25000
+
+    # "for 2 nights" is a stay: no guest count, so the budget isn't split and the fast path isn't taken
+    analysis, confidence = extractor.extract("anniversary dinner in Galle for 2 nights under 20000 rs")
+    assert (analysis["guest_count"], analysis["budget_per_head"]) == (0, 20000)
+    assert confidence < 0.85
+    assert extractor.extract("dinner in Galle for two nights, table for 4")[0]["guest_count"] == 4
+
+def test_negated_budget_words_are_ruled_out_and_left_to_langflow():
+    extractor = make_extractor()
+    analysis, confidence = extractor.extract("birthday in colombo for 10, not cheap, luxury please")
+    assert analysis["budget"] == "Luxury"
+    assert confidence <= 0.5  # below LOCAL_INTENT_MIN_CONFIDENCE: Langflow gets the final say
+
+    analysis, _ = extractor.extract("quiet dinner in Galle for 4, don't want anything fancy")
+    assert analysis["budget"] is None and analysis["venue_tags"] == ["quiet"]
+    # Conflicting brackets: the last one stated wins
+    assert extractor.extract("cheap or actually premium wedding in Kandy for 100")[0]["budget"] == "Luxury"
+
+def test_free_form_and_chat_queries_stay_low_confidence():
+    extractor = make_extractor()
+    assert extractor.extract("hello, who are you?")[1] == 0.0
+    assert extractor.extract("somewhere my girlfriend who loves old books and rain would enjoy")[1] < 0.3
+    assert extractor.extract("rooftop party in Ella")[1] < 0.85  # no guests or budget yet
+
+def test_confident_queries_skip_langflow_and_back_it_up_when_down():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    async def run():
+        service = AIService(local_intent=make_extractor())
+        service.cache = None
+        service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        service.breaker = CircuitBreaker("langflow", min_calls=1, failure_rate=1.0, open_seconds=60)
+        fast = await service.generate_date_plan("cheap birthday party in Colombo for 20")
+        degraded = await service.generate_date_plan("rooftop party in Ella")
+        return fast, degraded
+
+    fast, degraded = asyncio.run(run())
+    assert fast["location"] == "Colombo" and fast["guest_count"] == 20 and fast["budget"] == "Cheap"
+    assert len(calls) == 1  # only the second query went to Langflow
+    assert degraded["intent"] == "planning" and degraded["location"] == "Ella"
+    assert "SERVICE_UNAVAILABLE" not in degraded["missing_info"]
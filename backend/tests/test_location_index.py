@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+from app.services.location_index import KNOWN_LOCATIONS, LocationIndex, bounding_box, haversine_km, link_vendor_locations
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+from app.services.vendor_service import VendorService
+
+def make_index() -> LocationIndex:
+    index = LocationIndex(threshold=85)
+    index.build((i, name, aliases, lat, lon) for i, (name, aliases, lat, lon) in enumerate(KNOWN_LOCATIONS, 1))
+    return index
+
+def test_resolves_aliases_and_misspellings():
+    index = make_index()
+    assert index.resolve("Kandy City").name == "Kandy"
+    assert index.resolve("  nuwara elia ").name == "Nuwara Eliya"
+    assert index.resolve("Little England").name == "Nuwara Eliya"
+    assert index.resolve("Matara") is None
+    assert index.resolve("") is None
+
+def test_resolves_whole_address_parts_not_aliases_inside_words():
+    index = make_index()
+    assert index.resolve("Colombo 07").name == "Colombo"
+    assert index.resolve("Wellawatte, Colombo 06").name == "Colombo"
+    for text in ("Wellawatte", "Bellanwila", "Umbrella Bay", "Galle Face", "Kandy Road, Kadawatha", "Kandy, Colombo"):
+        assert index.resolve(text) is None, text
+
+def test_within_uses_haversine_inside_the_bounding_box():
+    index = make_index()
+    colombo = index.resolve("Colombo")
+    assert 90 < haversine_km(6.9271, 79.8612, 7.2906, 80.6337) < 100  # Colombo -> Kandy
+    assert [p.name for p, _ in index.within(colombo, 40)] == ["Colombo", "Negombo"]
+    min_lat, max_lat, min_lon, max_lon = bounding_box(colombo.latitude, colombo.longitude, 40)
+    assert min_lat < colombo.latitude < max_lat and min_lon < colombo.longitude < max_lon
+
+def test_catalog_matches_vendors_whose_location_resolves_to_the_place():
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot([
+        (1, 1, "Hermit", None, 3500.0, None, 1, 4, ["quiet"], None, "Kandy City"),
+        (2, 2, "Boardroom", None, 5000.0, None, 5, 20, ["quiet"], None, "Colombo"),
+        (3, 3, "Tea Bungalow", None, 9000.0, None, 2, 6, ["quiet"], None, "Nuwara Eliya"),
+    ])
+    service = VendorService(catalog, make_index())
+
+    criteria = service.extract_criteria({"location": "kandyy", "venue_tags": ["quiet"]})
+    assert criteria["location"] is None and len(criteria["location_ids"]) == 1
+    assert [r.id for r in service.search_catalog(criteria)] == [1]
+
+    nearby = service.extract_criteria({"location": "Kandy", "radius_km": 60, "venue_tags": ["quiet"]})
+    assert sorted(r.id for r in service.search_catalog(nearby)) == [1, 3]
+
+def test_backfill_links_vendors_the_exact_alias_match_missed():
+    executed = []
+
+    class FakeConnection:
+        def execute(self, stmt):
+            executed.append(stmt)
+            if len(executed) == 1:  # the distinct unlinked location_base values
+                return SimpleNamespace(scalars=lambda: iter(["Kandy, Sri Lanka", "Colombo 07", "Kandy Town", "Matara", "Wellawatte"]))
+            return SimpleNamespace(rowcount=len(stmt.compile().params["location_base_1"]))
+
+    assert link_vendor_locations(FakeConnection(), make_index()) == 3
+    updates = {stmt.compile().params["location_id"]: stmt.compile().params["location_base_1"] for stmt in executed[1:]}
+    assert updates == {1: ["Colombo 07"], 2: ["Kandy, Sri Lanka", "Kandy Town"]}  # Matara isn't a known place, Wellawatte isn't Ella
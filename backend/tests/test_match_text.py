@@ -0,0 +1,29 @@
+from unittest.mock import patch
+from sqlalchemy.dialects import postgresql
+from app.services import match_scoring
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+from app.services.vendor_service import VendorService
+
+def test_text_terms_are_words_and_off_by_default():
+    assert match_scoring.text_terms("Secluded garden", ["rooftop-sunset"]) == []
+    with patch.object(match_scoring, "TEXT_WEIGHT", 1.5):
+        assert match_scoring.text_terms("Secluded garden!", ["rooftop-sunset", None, "garden"], None) == [
+            "secluded", "garden", "rooftop", "sunset"
+        ]
+
+def test_text_relevance_is_ranked_and_filtered_in_postgres():
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot([
+        (1, 1, "Garden Hideaway", "Secluded.", 5000.0, None, 2, 2, ["quiet"], "Kandy", "Kandy"),
+    ])
+    service = VendorService(catalog)
+    with patch.object(match_scoring, "TEXT_WEIGHT", 1.5):
+        criteria = service.extract_criteria({"venue_tags": ["quiet"], "keywords": "secluded garden"})
+
+    assert criteria["text"] == ["secluded", "garden", "quiet"]
+    assert service.search_catalog(criteria) is None  # the snapshot has no tsvector
+
+    with patch.object(match_scoring, "TEXT_WEIGHT", 1.5):
+        sql = str(service.build_match_query(criteria).compile(dialect=postgresql.dialect()))
+    assert "packages.search_vector @@ to_tsquery(" in sql
+    assert "ts_rank(packages.search_vector, to_tsquery(" in sql
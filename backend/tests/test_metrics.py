@@ -0,0 +1,29 @@
+from app.core.metrics import Counter, Histogram, Registry
+
+def test_histogram_renders_cumulative_buckets():
+    latency = Histogram("test_seconds", "Test latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, "/a")
+
+    lines = latency.samples()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/a"} 4' in lines
+    assert 'test_seconds_sum{route="/a"} 4.05' in lines
+
+def test_bucket_bounds_are_inclusive():
+    latency = Histogram("edge_seconds", "Edge.", buckets=(1.0,))
+    latency.observe(1.0)
+    assert "edge_seconds_bucket{le=\"1.0\"} 1" in latency.samples()
+
+def test_registry_renders_help_and_type_once_per_metric():
+    registry = Registry()
+    retries = registry.register(Counter("test_retries_total", "Retries.", ("kind",)))
+    retries.inc("http")
+    retries.inc("http")
+    assert registry.register(Counter("test_retries_total", "Duplicate.")) is retries
+
+    text = registry.render()
+    assert text.count("# TYPE test_retries_total counter") == 1
+    assert 'test_retries_total{kind="http"} 2' in text
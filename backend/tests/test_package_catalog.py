@@ -0,0 +1,103 @@
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+from app.schemas.vendor_schema import PackageCreate, PackageUpdate
+from app.scripts.bulk_import import clean_package
+from app.services.vendor_service import BUDGET_BUCKETS, VendorService
+
+# (id, vendor_id, name, description, price, price_per_head, min, max, tags, coverage, location)
+ROWS = [
+    (1, 1, "The Hermit's Dinner", "Secluded garden booth.", 3500.0, None, 1, 4, ["private-dining", "quiet"], "Kandy", "Kandy"),
+    (2, 2, "Executive Boardroom", "5G Wifi.", 5000.0, None, 5, 20, ["wifi", "business"], "Colombo", "Colombo"),
+    (3, 3, "Sunset Proposal Package", "Rooftop.", 15000.0, None, 2, 2, ["romantic", "luxury"], "Galle", "Galle"),
+    (4, 4, "Student Birthday Bash", "Loud music.", 1500.0, None, 10, 30, ["budget", "party"], "Colombo", "Colombo"),
+    (5, 5, "Kandy Lake Picnic", "By the lake.", 2000.0, 500.0, 2, 8, ["Quiet", "nature"], "Kandy", "Kandy City"),
+]
+
+def make_service():
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot(ROWS, version=(5, 5))
+    return VendorService(catalog)
+
+def names(results):
+    return [r.name for r in results]
+
+def criteria(location=None, price_range=None, tags=(), budget_per_head=0, guest_count=0):
+    return {
+        "location": location,
+        "price_range": price_range,
+        "tags": [t.lower() for t in tags],
+        "budget_per_head": budget_per_head,
+        "guest_count": guest_count,
+    }
+
+def test_location_matches_like_ilike_substring():
+    snapshot = CatalogSnapshot(ROWS)
+    assert names(snapshot.search(criteria(location="kandy"))) == ["The Hermit's Dinner", "Kandy Lake Picnic"]
+
+def test_budget_buckets_use_sorted_price_ranges():
+    snapshot = CatalogSnapshot(ROWS)
+    assert names(snapshot.search(criteria(price_range=BUDGET_BUCKETS["Cheap"]))) == ["Student Birthday Bash", "Kandy Lake Picnic"]
+    assert names(snapshot.search(criteria(price_range=BUDGET_BUCKETS["Moderate"]))) == ["The Hermit's Dinner", "Executive Boardroom"]
+    assert names(snapshot.search(criteria(price_range=BUDGET_BUCKETS["Luxury"]))) == ["Sunset Proposal Package"]
+
+def test_filters_are_and_ed_and_tags_or_ed():
+    snapshot = CatalogSnapshot(ROWS)
+    results = snapshot.search(criteria(location="Colombo", tags=["party", "wifi"], price_range=BUDGET_BUCKETS["Cheap"]))
+    assert names(results) == ["Student Birthday Bash"]
+    assert names(snapshot.search(criteria(tags=["QUIET"]))) == ["The Hermit's Dinner", "Kandy Lake Picnic"]
+
+def test_results_are_ranked_by_tags_price_and_guests():
+    snapshot = CatalogSnapshot(ROWS)
+    # Both Kandy packages are "quiet"; only the picnic is also "nature", fits 6 guests and 600/head
+    results = snapshot.search(criteria(location="Kandy", tags=["quiet", "nature"], budget_per_head=600, guest_count=6))
+    assert names(results) == ["Kandy Lake Picnic", "The Hermit's Dinner"]
+
+    # Guest fit alone reorders an otherwise unfiltered search
+    assert names(snapshot.search(criteria(guest_count=25), limit=1)) == ["Student Birthday Bash"]
+
+def test_service_reads_the_keys_the_ai_sends():
+    found = VendorService().extract_criteria(
+        {"location": "Kandy", "venue_tags": ["Romantic", "romantic"], "budget_per_head": "5000", "guest_count": None}
+    )
+    assert found["tags"] == ["romantic"]
+    assert found["budget_per_head"] == 5000.0
+    assert found["guest_count"] == 0
+
+def test_tags_are_written_the_way_sql_matching_searches_them():
+    # packages.tags && ARRAY[...] is case-sensitive and query tags are lowercased
+    assert PackageCreate(name="Loft", tags=["Romantic ", "romantic", "Rooftop  Bar", " "]).tags == ["romantic", "rooftop bar"]
+    assert PackageUpdate(tags=None).tags is None  # the route rejects an explicit null
+    assert clean_package({"name": "Loft", "tags": "Quiet|WiFi"})["tags"] == ["quiet", "wifi"]
+    assert VendorService().extract_criteria({"venue_tags": ["Quiet"]})["tags"] == ["quiet"]
+
+def test_records_look_like_packages():
+    record = CatalogSnapshot(ROWS).record(4)
+    assert record.price_per_head == 500.0
+    assert record.tags == ["Quiet", "nature"]
+    assert CatalogSnapshot(ROWS).record(0).price_per_head is None
+
+def test_service_serves_from_catalog_without_a_session():
+    service = make_service()
+    results = service.find_perfect_matches(None, {"intent": "planning", "location": "Galle", "budget": "Luxury"})
+    assert names(results) == ["Sunset Proposal Package"]
+
+def test_service_respects_service_unavailable_flag():
+    service = make_service()
+    assert service.find_perfect_matches(None, {"missing_info": ["SERVICE_UNAVAILABLE"]}) == []
+
+def test_mapped_snapshot_file_matches_the_in_memory_snapshot(tmp_path):
+    from app.services.shared_catalog import MappedCatalogSnapshot, write_snapshot_file
+
+    snapshot = CatalogSnapshot(ROWS, version=(5, 5))
+    write_snapshot_file(snapshot, str(tmp_path / "catalog.bin"))
+    mapped = MappedCatalogSnapshot(str(tmp_path / "catalog.bin"))
+
+    assert mapped.version == (5, 5)
+    for search in (
+        criteria(location="kandy"),
+        criteria(price_range=BUDGET_BUCKETS["Cheap"]),
+        criteria(tags=["quiet", "romantic"], budget_per_head=4000, guest_count=2),
+    ):
+        assert names(mapped.search(search)) == names(snapshot.search(search))
+    record = mapped.record(4)
+    assert (record.price_per_head, record.tags, record.location_base) == (500.0, ["Quiet", "nature"], "Kandy City")
+    assert mapped.record(0).price_per_head is None
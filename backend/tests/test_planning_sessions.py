@@ -0,0 +1,65 @@
+import asyncio
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+from app.services.planning_sessions import merge_analysis
+from app.services.vendor_service import AsyncVendorService
+
+def make_service() -> AsyncVendorService:
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot([
+        (1, 1, "Hall", None, 2500.0, 2500.0, 10, 100, ["party"], None, "Colombo"),
+        (2, 1, "Roof", None, 4000.0, 4000.0, 10, 40, ["party", "rooftop"], None, "Colombo"),
+        (3, 2, "Garden", None, 2000.0, 2000.0, 2, 20, ["garden"], None, "Colombo"),
+        (4, 3, "Lake", None, 3000.0, 3000.0, 10, 80, ["party"], None, "Kandy"),
+    ])
+    return AsyncVendorService(catalog)
+
+def test_follow_up_merges_only_what_the_new_turn_states():
+    first = {"intent": "planning", "location": "Colombo", "venue_tags": ["party"], "missing_info": ["guest_count"]}
+    merged, changed = merge_analysis(first, {"intent": "chat", "guest_count": 30, "location": "Any"})
+    assert changed == {"guest_count"}
+    assert merged["intent"] == "planning" and merged["location"] == "Colombo" and merged["guest_count"] == 30
+    assert merged["missing_info"] == []
+
+    same, changed = merge_analysis(merged, {"intent": "chat", "missing_info": ["SERVICE_UNAVAILABLE"]})
+    assert changed == set() and same == merged
+
+def test_tightening_narrows_the_candidates_and_a_new_place_searches_again():
+    service = make_service()
+    first = {"intent": "planning", "location": "Colombo", "venue_tags": ["party"]}
+
+    async def run():
+        candidates, narrowed = await service.find_session_matches(None, first, limit=50)
+        assert [c.id for c in candidates] == [1, 2] and not narrowed
+
+        bigger = dict(first, guest_count=60)
+        ranked, narrowed = await service.find_session_matches(None, bigger, first, [1, 2], limit=50)
+        assert narrowed and [c.id for c in ranked] == [1, 2]  # re-ranked within the last turn's candidates
+
+        # A new tag widens the any-of filter: Garden was never a candidate but fits best
+        garden = dict(first, venue_tags=["party", "garden"], guest_count=2)
+        widened, narrowed = await service.find_session_matches(None, garden, first, [1, 2], limit=50)
+        assert not narrowed and [c.id for c in widened] == [3, 1, 2]
+
+        kandy = dict(first, location="Kandy")
+        moved, narrowed = await service.find_session_matches(None, kandy, first, [1, 2], limit=50)
+        assert not narrowed and [c.id for c in moved] == [4]
+
+    asyncio.run(run())
+
+def test_a_truncated_candidate_list_is_only_narrowed_when_scores_hold():
+    service = make_service()
+    first = {"intent": "planning", "location": "Colombo", "venue_tags": ["party", "rooftop"], "guest_count": 20}
+
+    async def run():
+        candidates, _ = await service.find_session_matches(None, first, limit=1)
+        assert [c.id for c in candidates] == [2]  # the Roof has both tags; the Hall was cut off
+
+        # 80 guests on 2500 a head: now the Hall ranks first, and it was never a candidate
+        crowd = dict(first, guest_count=80, budget_per_head=2500)
+        ranked, narrowed = await service.find_session_matches(None, crowd, first, [2], limit=1)
+        assert not narrowed and [c.id for c in ranked] == [1]
+
+        same, narrowed = await service.find_session_matches(None, dict(first), first, [2], limit=1)
+        assert narrowed and [c.id for c in same] == [2]
+
+    asyncio.run(run())
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import httpx
+
+from app.routers.planning import sse, stream_plan_events
+from app.services.ai_service import AIService, ChatResponseTap
+from app.services.package_catalog import CatalogSnapshot, PackageCatalog
+from app.services.vendor_service import AsyncVendorService
+
+def collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+def parse_sse(chunks):
+    events = []
+    for chunk in chunks:
+        head, data = chunk.strip().split("\n")
+        events.append((head[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_tap_decodes_chat_response_across_chunks():
+    tap = ChatResponseTap()
+    text = '{"intent": "chat", "chat_response": "Hi \\"there\\"\\n caf\\u00e9", "reasoning": "x"}'
+    pieces = [tap.feed(text[i:i + 3]) for i in range(0, len(text), 3)]
+    assert "".join(pieces) == 'Hi "there"\n café'
+    assert tap.done
+
+def test_tap_joins_surrogate_pairs_split_anywhere():
+    text = '{"chat_response": "hi \\ud83d\\ude00 \\udc00!"}'
+    for size in range(1, 14):
+        tap = ChatResponseTap()
+        decoded = "".join(tap.feed(text[i:i + size]) for i in range(0, len(text), size))
+        assert decoded == "hi \U0001F600 \ufffd!"  # the lone low surrogate can't be encoded
+    sse("token", {"text": decoded})  # orjson rejects surrogates
+
+def test_bad_escape_falls_back_to_the_regular_request():
+    answer = '{"intent": "chat", "chat_response": "caf\\u00zz", "reasoning": "x"}'
+    cut = answer.index("\\")
+    stream_body = "\n".join(
+        json.dumps({"event": "token", "data": {"chunk": chunk}}) for chunk in (answer[:cut], answer[cut:])
+    ).encode()
+    regular = {"intent": "chat", "chat_response": "café", "reasoning": "retry"}
+    regular_body = {"outputs": [{"outputs": [{"results": {"message": {"text": json.dumps(regular)}}}]}]}
+
+    def handler(request):
+        if request.url.params.get("stream") == "true":
+            return httpx.Response(200, content=stream_body)
+        return httpx.Response(200, json=regular_body)
+
+    service = AIService()
+    service.cache = None
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with patch("app.services.ai_service.settings.LANGFLOW_STREAMING", True):
+        events = collect(service.stream_date_plan("hi"))
+
+    assert events == [("token", "caf"), ("analysis", regular)]
+
+def test_stream_emits_tokens_then_analysis():
+    answer = json.dumps({"intent": "chat", "chat_response": "Hello friend", "reasoning": "small talk"})
+    lines = [json.dumps({"event": "token", "data": {"chunk": answer[i:i + 7]}}) for i in range(0, len(answer), 7)]
+    body = "\n".join(lines).encode()
+
+    service = AIService()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    with patch("app.services.ai_service.settings.LANGFLOW_STREAMING", True):
+        events = collect(service.stream_date_plan("hi"))
+
+    tokens = "".join(value for kind, value in events if kind == "token")
+    assert tokens == "Hello friend"
+    assert events[-1] == ("analysis", json.loads(answer))
+
+def test_sse_endpoint_sends_analysis_venues_and_done():
+    analysis = {"intent": "planning", "location": "Galle", "venue_tags": ["romantic"], "guest_count": 2}
+
+    async def fake_stream(query):
+        yield "analysis", analysis
+
+    catalog = PackageCatalog()
+    catalog.snapshot = CatalogSnapshot([
+        (1, 1, "Sunset Proposal Package", "Rooftop.", 15000.0, None, 2, 2, ["romantic"], "Galle", "Galle"),
+    ])
+    with patch("app.routers.planning.ai_service.stream_date_plan", fake_stream), \
+         patch("app.routers.planning.async_vendor_service", AsyncVendorService(catalog)):
+        events = parse_sse(collect(stream_plan_events("romantic proposal in galle")))
+
+    assert [kind for kind, _ in events] == ["analysis", "venue", "done"]
+    assert events[0][1]["location"] == "Galle"
+    assert events[1][1]["name"] == "Sunset Proposal Package"
+    assert events[2][1] == {"matched": 1}
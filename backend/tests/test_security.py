@@ -0,0 +1,23 @@
+import asyncio
+
+import pytest
+from passlib.hash import bcrypt
+
+from app.common import security
+
+def test_outdated_cost_is_rehashed_on_verify():
+    old_hash = bcrypt.using(rounds=4).hash("s3cret")
+
+    valid, new_hash = security.verify_and_update("s3cret", old_hash)
+    assert valid
+    assert new_hash.startswith(f"$2b${security.BCRYPT_ROUNDS:02d}$")
+
+    assert security.verify_and_update("wrong", old_hash) == (False, None)
+    assert security.verify_and_update("s3cret", None) == (False, None)
+
+def test_full_hash_queue_is_refused_without_touching_the_pool(monkeypatch):
+    monkeypatch.setattr(security, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(security, "PASSWORD_HASH_MAX_QUEUE", 0)
+    with pytest.raises(security.PasswordHashingBusy):
+        asyncio.run(security.hash_password_async("s3cret"))
+    assert security._pool is None
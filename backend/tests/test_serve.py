@@ -0,0 +1,9 @@
+from app.serve import pool_sizes
+
+def test_pool_sizes_split_the_connection_budget_across_workers():
+    assert pool_sizes(1, 90) == (10, 20)  # one worker keeps the usual pool
+    for workers in (2, 4, 8, 16):
+        pool_size, max_overflow = pool_sizes(workers, 90)
+        assert workers * (2 * (pool_size + max_overflow) + 1) <= 90
+        assert pool_size >= 1
+    assert pool_sizes(8, 90) == (1, 4)
@@ -0,0 +1,120 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.common.singleflight import SingleFlight
+from app.services.ai_service import AIService
+from app.services.vendor_service import AsyncVendorService
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"intent": "planning"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("same", work) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(r == {"intent": "planning"} for r in results)
+    assert flight.stats() == {"calls": 5, "executions": 1, "collapsed": 4, "in_flight": 0}
+
+def test_errors_reach_every_waiter_and_are_not_remembered():
+    flight = SingleFlight("test")
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("langflow down")
+
+    async def ok():
+        return "fine"
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+        after = await flight.do("k", ok)
+        return results, after
+
+    results, after = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert after == "fine"
+
+def test_one_waiter_cancelling_does_not_cancel_the_others():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def main():
+        impatient = asyncio.ensure_future(flight.do("k", work))
+        patient = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(main()) == 42
+
+def test_ai_service_coalesces_identical_queries():
+    service = AIService()
+    service.cache = None
+    calls = []
+
+    async def fake_langflow(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return {"intent": "chat", "chat_response": "hi"}
+
+    async def main():
+        with patch.object(service, "_ask_langflow", fake_langflow):
+            return await asyncio.gather(
+                service.generate_date_plan("Hi there"),
+                service.generate_date_plan("hi there!"),
+            )
+
+    first, second = asyncio.run(main())
+    assert len(calls) == 1
+    assert first == second and first is not second
+    assert service.single_flight.stats()["collapsed"] == 1
+
+def test_match_query_outlives_the_caller_that_started_it():
+    sessions = []
+
+    class FakeSession:
+        def __init__(self):
+            self.open = True
+            sessions.append(self)
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            self.open = False
+
+        async def execute(self, stmt):
+            await asyncio.sleep(0.02)
+            assert self.open
+            return type("Result", (), {"all": lambda _: [(1, "Hall", None, 2500.0, ["party"])]})()
+
+    class ClosedRequestSession:
+        async def execute(self, stmt):
+            raise AssertionError("coalesced queries must not use a caller's session")
+
+    service = AsyncVendorService(session_factory=FakeSession)
+    analysis = {"intent": "planning", "location": "Colombo", "venue_tags": ["party"]}
+
+    async def main():
+        first = asyncio.ensure_future(service.find_perfect_matches(ClosedRequestSession(), analysis))
+        second = asyncio.ensure_future(service.find_perfect_matches(ClosedRequestSession(), analysis))
+        await asyncio.sleep(0)
+        first.cancel()  # client disconnected: its request session is torn down
+        return await second
+
+    assert asyncio.run(main()) == [(1, "Hall", None, 2500.0, ["party"])]
+    assert len(sessions) == 1 and not sessions[0].open
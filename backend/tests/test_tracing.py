@@ -0,0 +1,50 @@
+import asyncio
+import logging
+
+from app.core.tracing import TracingMiddleware, current_request_id, span
+
+def run_app(app, headers=()):
+    """Drives one GET through an ASGI app; returns the response start message."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/x", "headers": list(headers)}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]
+
+async def endpoint(scope, receive, send):
+    with span("db"):
+        await asyncio.sleep(0)
+    with span("db"):
+        pass
+    with span("ai"):
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"x-seen-id", current_request_id().encode())]})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+def test_server_timing_sums_spans_per_name_and_echoes_request_id():
+    start = run_app(TracingMiddleware(endpoint), headers=[(b"x-request-id", b"abc123")])
+    headers = dict(start["headers"])
+
+    assert headers[b"x-request-id"] == b"abc123"
+    assert headers[b"x-seen-id"] == b"abc123"
+    timing = headers[b"server-timing"].decode()
+    assert timing.startswith('db;dur=') and 'desc="x2"' in timing
+    assert ", ai;dur=" in timing and ", total;dur=" in timing
+
+def test_only_slow_requests_are_logged(caplog):
+    with caplog.at_level(logging.INFO, logger="app.core.tracing"):
+        run_app(TracingMiddleware(endpoint, slow_ms=10_000, sample_rate=0.0))
+        assert not caplog.records
+        run_app(TracingMiddleware(endpoint, slow_ms=0, sample_rate=0.0))
+    assert "Slow request" in caplog.records[0].getMessage()
+    assert "db +" in caplog.records[0].getMessage()
+
+def test_span_outside_a_request_is_a_no_op():
+    with span("anything"):
+        assert current_request_id() is None
@@ -0,0 +1,152 @@
+import json
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import get_db
+from app.models.marketplace import Package
+from app.routers import packages
+from app.routers.auth import get_current_vendor
+
+class FakeSession:
+    """
+    Just enough of a Session for the package routes. Statements and transaction
+    calls land in `log`; NOTIFYs are delivered on commit only, like Postgres does.
+    """
+
+    def __init__(self, *rows):
+        self.rows = {p.id: p for p in rows}
+        self.log = []
+        self.pending, self.notified = [], []
+        self.version = 0
+        self.flush_error = None  # an IntegrityError the next flush raises
+        self._snapshot()
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "catalog_version" in sql:
+            self.log.append("bump")
+            self.version += 1
+            return SimpleNamespace(scalar_one=lambda: self.version)
+        if "pg_notify" in sql:
+            self.log.append("notify")
+            self.pending.append(json.loads(params["payload"]))
+            return None
+        where = stmt.compile().params
+        found = [p for p in self.rows.values()
+                 if p.vendor_id == where["vendor_id_1"] and where.get("id_1", p.id) == p.id]
+        return SimpleNamespace(
+            scalar_one_or_none=lambda: found[0] if found else None,
+            scalars=lambda: SimpleNamespace(all=lambda: found),
+        )
+
+    def add(self, package):
+        self.log.append("add")
+        self.rows[package.id] = package
+
+    def flush(self):
+        self.log.append("flush")
+        if self.flush_error is not None:
+            error, self.flush_error = self.flush_error, None
+            raise error
+        new = self.rows.pop(None, None)
+        if new is not None:
+            new.id = max(self.rows, default=0) + 1
+            self.rows[new.id] = new
+
+    def delete(self, package):
+        self.log.append("delete")
+        del self.rows[package.id]
+
+    def commit(self):
+        self.log.append("commit")
+        self.notified += self.pending
+        self.pending = []
+        self._snapshot()
+
+    def rollback(self):
+        self.log.append("rollback")
+        self.pending = []
+        for package_id, columns in self.committed.items():
+            for name, value in columns.items():
+                setattr(self.rows[package_id], name, value)
+
+    def _snapshot(self):
+        self.committed = {
+            p.id: {c.name: getattr(p, c.name) for c in Package.__table__.columns} for p in self.rows.values()
+        }
+
+    def refresh(self, package):
+        pass
+
+def make_client(db: FakeSession, vendor_id: int = 1) -> TestClient:
+    app = FastAPI()
+    app.include_router(packages.router)
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_vendor] = lambda: SimpleNamespace(id=vendor_id)
+    return TestClient(app)
+
+def violation(pgcode: str, constraint: str) -> IntegrityError:
+    orig = SimpleNamespace(pgcode=pgcode, diag=SimpleNamespace(constraint_name=constraint))
+    return IntegrityError("INSERT INTO packages ...", {}, orig)
+
+def package(package_id: int, vendor_id: int, **fields) -> Package:
+    return Package(id=package_id, vendor_id=vendor_id, name=f"Package {package_id}", tags=["quiet"], **fields)
+
+def test_another_vendors_package_looks_missing():
+    db = FakeSession(package(1, 1), package(2, 2))
+    client = make_client(db, vendor_id=1)
+
+    assert [p["id"] for p in client.get("/vendors/me/packages").json()] == [1]
+    assert client.get("/vendors/me/packages/2").status_code == 404
+    assert client.patch("/vendors/me/packages/2", json={"name": "Mine now"}).status_code == 404
+    assert client.delete("/vendors/me/packages/2").status_code == 404
+    assert db.rows[2].name == "Package 2" and db.notified == []
+
+def test_patch_rejects_nulls_and_an_inverted_guest_range():
+    db = FakeSession(package(1, 1, min_guests=2, max_guests=20))
+    client = make_client(db)
+
+    assert client.patch("/vendors/me/packages/1", json={"name": None}).status_code == 400
+    assert client.patch("/vendors/me/packages/1", json={"tags": None}).status_code == 400
+    assert client.patch("/vendors/me/packages/1", json={"min_guests": 9, "max_guests": 3}).status_code == 422
+    # Only one side sent: checked against the stored other side, and nothing is announced
+    assert client.patch("/vendors/me/packages/1", json={"min_guests": 50}).status_code == 400
+    assert db.log[-1] == "rollback" and "bump" not in db.log and db.notified == []
+
+    response = client.patch("/vendors/me/packages/1", json={"tags": ["Rooftop", "rooftop "]})
+    assert response.status_code == 200 and response.json()["tags"] == ["rooftop"]
+    assert db.notified == [{"version": 1, "package_ids": [1]}]
+
+def test_writes_notify_in_the_same_transaction():
+    db = FakeSession(package(1, 1))
+    client = make_client(db)
+
+    response = client.post("/vendors/me/packages", json={"name": "Garden", "price": 2000, "tags": ["Garden"]})
+    assert response.status_code == 201
+    created = response.json()["id"]
+    # The version bump and NOTIFY ride on the write's transaction: one commit, after both
+    assert db.log == ["add", "flush", "bump", "notify", "commit"]
+
+    assert client.delete(f"/vendors/me/packages/{created}").status_code == 204
+    assert db.log[-4:] == ["delete", "bump", "notify", "commit"]
+    assert db.notified == [{"version": 1, "package_ids": [created]}, {"version": 2, "package_ids": [created]}]
+
+def test_only_a_duplicate_name_is_reported_as_one():
+    db = FakeSession(package(1, 1))
+    client = make_client(db)
+    body = {"name": "Package 1", "price": 2000}
+
+    db.flush_error = violation("23505", "uq_packages_vendor_name")
+    response = client.post("/vendors/me/packages", json=body)
+    assert response.status_code == 400 and response.json()["detail"] == "You already have a package with this name."
+
+    # The vendor was deleted on another worker whose auth cache still had it
+    db.flush_error = violation("23503", "packages_vendor_id_fkey")
+    assert client.post("/vendors/me/packages", json=body).status_code == 404
+
+    db.flush_error = violation("23514", "some_check")
+    assert client.patch("/vendors/me/packages/1", json={"name": "Renamed"}).status_code == 409
+    assert db.rows[1].name == "Package 1" and db.log[-1] == "rollback" and db.notified == []